@@ -1,11 +1,15 @@
 import os
 import sys
 import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, FileResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
+
+from core.page_cache import PAGE_CACHE_CONTROL, HashedStaticFiles, get_page_cache
 
 # Get the project root directory
 ROOT_DIR = Path(__file__).parent.parent
@@ -14,15 +18,10 @@ if str(ROOT_DIR) not in sys.path:
 
 # Set up logging
 logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
 logger = logging.getLogger("myra-stt")
 
-# Print debug info
-logger.info(f"Current working directory: {os.getcwd()}")
-logger.info(f"ROOT_DIR: {ROOT_DIR}")
-
 # Try to load environment variables only if the package is available
 # This avoids import errors in environments where dotenv isn't available
 env_vars_loaded = False
@@ -30,6 +29,7 @@ try:
     # Only attempt to import dotenv if it's installed
     try:
         from dotenv import load_dotenv
+
         load_dotenv()
         env_vars_loaded = True
         logger.info("Environment variables loaded from .env")
@@ -38,34 +38,57 @@ try:
 except Exception as e:
     logger.warning(f"Error loading environment variables: {str(e)}")
 
-# Now import router after setting up paths
-try:
-    from api.routes import router
-except ImportError as e:
-    print(f"Failed to import router: {str(e)}")
-    # Fallback to direct import
+# Now import router after setting up paths; the routes defer the recognition stack to core.startup
+from api.routes import router
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load the recognition stack per WARMUP_MODE, warm slow-loading models when configured to, and run the job workers while the app is up"""
     try:
-        import api.routes
-        router = api.routes.router
-    except Exception as e2:
-        print(f"Fallback import also failed: {str(e2)}")
-        raise
+        from core.startup import schedule_warmup
+
+        await schedule_warmup()
+    except Exception as e:
+        logger.warning(f"Startup warmup failed: {str(e)}")
+    try:
+        from config.settings import RECOGNITION_WORKERS, SPHINX_PRELOAD
+        from core.worker_pool import get_recognition_pool
+
+        # Worker processes warm their own decoders through the pool initializer
+        if SPHINX_PRELOAD and not get_recognition_pool().is_process_pool:
+            from core.sphinx_decoder import preload_sphinx
+
+            await run_in_threadpool(preload_sphinx, RECOGNITION_WORKERS)
+    except Exception as e:
+        logger.warning(f"Startup warmup failed: {str(e)}")
+    job_workers = None
+    try:
+        from routes.jobs import get_job_workers
+
+        job_workers = get_job_workers()
+        job_workers.start()
+    except Exception as e:
+        logger.warning(f"Could not start job workers: {str(e)}")
+    yield
+    if job_workers is not None:
+        # Unfinished jobs stay queued and resume on the next start
+        await run_in_threadpool(job_workers.stop)
+    # Recognition worker processes exit with the app rather than at interpreter shutdown
+    from core.worker_pool import get_recognition_pool
+
+    await run_in_threadpool(get_recognition_pool().shutdown)
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
-logger = logging.getLogger("myra-stt")
 
 # Configure for Vercel deployment
 app = FastAPI(
+    lifespan=lifespan,
     title="MyraSTT API",
     description="Speech to Text API",
     version="1.0.0",
     root_path=os.getenv("ROOT_PATH", ""),
     # Ensure we get proper error reports
-    debug=True
+    debug=True,
 )
 
 # Add CORS middlewaresti
@@ -77,24 +100,37 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Request latency by route for /metrics; added last so it also times the CORS handling
+try:
+    from core.metrics import RequestMetricsMiddleware
+
+    app.add_middleware(RequestMetricsMiddleware)
+except Exception as e:
+    logger.warning(f"Request metrics disabled: {str(e)}")
+
 app.include_router(router)
 
 # Mount static directories with error handling
 try:
     static_path = os.path.join(ROOT_DIR, "static")
     templates_path = os.path.join(ROOT_DIR, "templates")
-    
+
     # Log the paths for debugging
     logger.info(f"Static path: {static_path}")
     logger.info(f"Templates path: {templates_path}")
-    
+
     # Check if directories exist
     if os.path.isdir(static_path):
-        app.mount("/static", StaticFiles(directory=static_path), name="static")
+        # Content-hashed page assets come from the page cache, everything else from disk
+        app.mount(
+            "/static",
+            HashedStaticFiles(directory=static_path, page_cache=get_page_cache()),
+            name="static",
+        )
         logger.info("Static directory mounted successfully")
     else:
         logger.warning(f"Static directory not found at: {static_path}")
-    
+
     if os.path.isdir(templates_path):
         app.mount("/templates", StaticFiles(directory=templates_path), name="templates")
         logger.info("Templates directory mounted successfully")
@@ -108,19 +144,24 @@ except Exception as e:
 async def favicon():
     return FileResponse(os.path.join(static_path, "SVG", "bot.svg"))
 
+
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
+async def read_root(request: Request):
     try:
-        template_path = os.path.join(templates_path, "sst_core.html")
-        logger.info(f"Reading template from: {template_path}")
-        with open(template_path, "r", encoding="utf-8") as f:
-            return HTMLResponse(content=f.read(), status_code=200)
+        # Read and compressed once per process; the first load runs off the event loop
+        page_cache = get_page_cache()
+        page = (
+            page_cache.page()
+            if page_cache.loaded
+            else await run_in_threadpool(page_cache.page)
+        )
+        return page.response(request.headers, PAGE_CACHE_CONTROL)
     except Exception as e:
         error_message = f"Error reading template: {str(e)}"
         logger.error(error_message)
         return HTMLResponse(
             content=f"<html><body><h1>Error</h1><p>{error_message}</p></body></html>",
-            status_code=500
+            status_code=500,
         )
 
 
@@ -134,7 +175,9 @@ async def debug_info():
         "static_path_exists": os.path.isdir(static_path),
         "templates_path_exists": os.path.isdir(templates_path),
         "static_files": os.listdir(static_path) if os.path.isdir(static_path) else [],
-        "template_files": os.listdir(templates_path) if os.path.isdir(templates_path) else []
+        "template_files": (
+            os.listdir(templates_path) if os.path.isdir(templates_path) else []
+        ),
     }
     return debug_info
 
@@ -144,13 +187,15 @@ async def general_exception_handler(request: Request, exc: Exception):
     logger.error(f"Unhandled exception: {str(exc)}", exc_info=True)
     return HTMLResponse(
         content=f"<html><body><h1>Server Error</h1><p>An error occurred on the server. Please try again later.</p><p>Error: {str(exc)}</p></body></html>",
-        status_code=500
+        status_code=500,
     )
 
 
 def create_app():
     return app
 
+
 if __name__ == "__main__":
     import uvicorn
+
     uvicorn.run("api.main:app", host="0.0.0.0", port=5000, reload=True)
@@ -1,9 +1,6 @@
-import os
 import sys
 import logging
-from fastapi import APIRouter, Request
-from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
+from fastapi import APIRouter
 from pathlib import Path
 
 # Set up logging
@@ -14,41 +11,91 @@ ROOT_DIR = Path(__file__).parent.parent
 if str(ROOT_DIR) not in sys.path:
     sys.path.insert(0, str(ROOT_DIR))
 
-# Log for debugging
-logger.info(f"routes.py - ROOT_DIR: {ROOT_DIR}")
-logger.info(f"routes.py - sys.path: {sys.path}")
-
 # Import after adding to path with more resilient error handling
 try:
     # Try direct import since we added ROOT_DIR to sys.path
-    import sys
     from routes.speech import router as speech_router
+
     logger.info("Imported speech_router directly")
-    speech = type('obj', (object,), {'router': speech_router})
+    speech = type("obj", (object,), {"router": speech_router})
 except Exception as e:
     logger.error(f"Failed to import speech module: {e}")
     logger.error(f"sys.path: {sys.path}")
     # Create a temporary router for speech to avoid breaking the app
-    speech = type('obj', (object,), {'router': APIRouter()})
+    speech = type("obj", (object,), {"router": APIRouter()})
     logger.warning("Using empty speech router as fallback")
 
+try:
+    from routes.streaming import router as streaming_router
+
+    logger.info("Imported streaming_router directly")
+except Exception as e:
+    logger.error(f"Failed to import streaming module: {e}")
+    streaming_router = APIRouter()
+    logger.warning("Using empty streaming router as fallback")
+
+try:
+    from routes.batch import router as batch_router
+
+    logger.info("Imported batch_router directly")
+except Exception as e:
+    logger.error(f"Failed to import batch module: {e}")
+    batch_router = APIRouter()
+    logger.warning("Using empty batch router as fallback")
+
+try:
+    from routes.jobs import router as jobs_router
+
+    logger.info("Imported jobs_router directly")
+except Exception as e:
+    logger.error(f"Failed to import jobs module: {e}")
+    jobs_router = APIRouter()
+    logger.warning("Using empty jobs router as fallback")
+
+try:
+    from routes.uploads import router as uploads_router
+
+    logger.info("Imported uploads_router directly")
+except Exception as e:
+    logger.error(f"Failed to import uploads module: {e}")
+    uploads_router = APIRouter()
+    logger.warning("Using empty uploads router as fallback")
+
+try:
+    from routes.metrics import router as metrics_router
+
+    logger.info("Imported metrics_router directly")
+except Exception as e:
+    logger.error(f"Failed to import metrics module: {e}")
+    metrics_router = APIRouter()
+    logger.warning("Using empty metrics router as fallback")
+
 router = APIRouter()
-# Use absolute path to templates directory
-templates = Jinja2Templates(directory=os.path.join(ROOT_DIR, "templates"))
+
 
 # Add a test endpoint to verify routing works
 @router.get("/test")
 async def test_endpoint():
     # Get the routes from the speech router
     speech_routes = []
-    if hasattr(speech, 'router') and hasattr(speech.router, 'routes'):
-        speech_routes = [f"{route.methods} {route.path}" for route in speech.router.routes]
-    
+    if hasattr(speech, "router") and hasattr(speech.router, "routes"):
+        speech_routes = [
+            f"{route.methods} {route.path}" for route in speech.router.routes
+        ]
+
     return {
-        "message": "Router is working", 
-        "speech_router_included": hasattr(speech, 'router'),
+        "message": "Router is working",
+        "speech_router_included": hasattr(speech, "router"),
         "speech_routes": speech_routes,
-        "speech_router_type": str(type(speech.router)) if hasattr(speech, 'router') else "None"
+        "speech_router_type": (
+            str(type(speech.router)) if hasattr(speech, "router") else "None"
+        ),
     }
 
+
 router.include_router(speech.router, tags=["sst"])
+router.include_router(streaming_router, tags=["sst"])
+router.include_router(batch_router, tags=["sst"])
+router.include_router(uploads_router, tags=["sst"])
+router.include_router(jobs_router, tags=["jobs"])
+router.include_router(metrics_router, tags=["metrics"])
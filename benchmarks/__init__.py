@@ -0,0 +1,5 @@
+"""
+Benchmarks for MyraSTT.
+Each module can be run on its own, e.g. ``python -m benchmarks.ingest_memory``.
+micro and load_test save their results with --save, for benchmarks.compare.
+"""
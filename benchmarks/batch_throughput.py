@@ -0,0 +1,106 @@
+"""
+Batch versus single-file transcription throughput.
+Sends the same clips once per request to POST /transcribe and once as a single
+POST /transcribe/batch, in-process through the ASGI app, and reports files per
+second. Recognition uses the stub backend, so the numbers measure request
+overhead and scheduling rather than a network service.
+
+    python -m benchmarks.batch_throughput --clips 100 --latency 0.05 --duplicates 0.2
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+RATE = 16000
+
+
+def clip(seed: int, seconds: float) -> bytes:
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    samples = 0.3 * np.sin(2 * np.pi * (150 + seed) * t) + rng.normal(0, 0.01, t.size)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes())
+    return buffer.getvalue()
+
+
+def run(clip_count: int, seconds: float, duplicates: float) -> dict:
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    distinct = max(1, round(clip_count * (1 - duplicates)))
+    payloads = [clip(seed % distinct, seconds) for seed in range(clip_count)]
+    client = TestClient(app)
+
+    started = time.perf_counter()
+    for index, payload in enumerate(payloads):
+        response = client.post(
+            "/transcribe", files={"file": (f"clip-{index}.wav", payload)}
+        )
+        response.raise_for_status()
+    single_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    files = [
+        ("files", (f"clip-{index}.wav", payload))
+        for index, payload in enumerate(payloads)
+    ]
+    with client.stream("POST", "/transcribe/batch", files=files) as response:
+        response.raise_for_status()
+        lines = [json.loads(line) for line in response.iter_lines() if line]
+    batch_seconds = time.perf_counter() - started
+
+    return {
+        "benchmark": "batch_throughput",
+        "clips": clip_count,
+        "distinct_clips": distinct,
+        "clip_seconds": seconds,
+        "single_file": {
+            "seconds": round(single_seconds, 3),
+            "files_per_second": round(clip_count / single_seconds, 1),
+        },
+        "batch": {
+            "seconds": round(batch_seconds, 3),
+            "files_per_second": round(clip_count / batch_seconds, 1),
+            "summary": lines[-1]["summary"],
+        },
+        "speedup": round(single_seconds / batch_seconds, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clips", type=int, default=100)
+    parser.add_argument("--seconds", type=float, default=2)
+    parser.add_argument(
+        "--latency", type=float, default=0.05, help="stub backend latency in seconds"
+    )
+    parser.add_argument(
+        "--duplicates", type=float, default=0.0, help="fraction of repeated clips"
+    )
+    args = parser.parse_args()
+    # Settings are read at import time, so configure them before the app is loaded
+    os.environ["RECOGNITION_BACKENDS"] = "stub"
+    os.environ["STUB_BACKEND_LATENCY"] = str(args.latency)
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    os.environ["LANGUAGE_ID_ENABLED"] = "false"
+    print(json.dumps(run(args.clips, args.seconds, args.duplicates), indent=2))
+
+
+if __name__ == "__main__":
+    main()
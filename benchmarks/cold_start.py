@@ -0,0 +1,127 @@
+"""
+Cold start time of the app: import api.main and serve the first GET / in fresh interpreters.
+Every run is a new Python process, so nothing is already imported. Reports the
+median import time, time to the first response, and which of the heavy modules
+the import loaded. With --budget or --forbid it exits with status 1 when the
+import is slower than the budget or loads a forbidden module, so CI can hold
+the line on import-time work.
+
+    python -m benchmarks.cold_start --runs 5 --budget 1.5 --forbid numpy,av,speech_recognition,jinja2
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import parse_list  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+HEAVY_MODULES = ("numpy", "av", "speech_recognition", "jinja2", "pocketsphinx")
+
+# Runs in the fresh interpreter; prints one JSON line
+PROBE = """
+import asyncio, json, sys, time
+started = time.perf_counter()
+import api.main
+imported = time.perf_counter() - started
+heavy = [name for name in {heavy!r} if name in sys.modules]
+import httpx
+
+async def first_response():
+    transport = httpx.ASGITransport(app=api.main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        return (await client.get("/")).status_code
+
+status = asyncio.run(first_response())
+print(json.dumps({{"import_seconds": imported, "first_response_seconds": time.perf_counter() - started,
+                  "status": status, "heavy_modules": heavy}}))
+"""
+
+
+def run_once(env: Dict[str, str]) -> dict:
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE.format(heavy=HEAVY_MODULES)],
+        cwd=str(ROOT_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(runs: int, warmup_mode: str) -> dict:
+    env = dict(os.environ, WARMUP_MODE=warmup_mode)
+    samples = [run_once(env) for _ in range(runs)]
+    return {
+        "benchmark": "cold_start",
+        "runs": runs,
+        "warmup_mode": warmup_mode,
+        "import_seconds": round(
+            statistics.median(s["import_seconds"] for s in samples), 4
+        ),
+        "first_response_seconds": round(
+            statistics.median(s["first_response_seconds"] for s in samples), 4
+        ),
+        "statuses": sorted({s["status"] for s in samples}),
+        "heavy_modules": sorted({name for s in samples for name in s["heavy_modules"]}),
+    }
+
+
+def check(result: dict, budget: float, forbidden: List[str]) -> List[str]:
+    failures = []
+    if budget and result["import_seconds"] > budget:
+        failures.append(f"import took {result['import_seconds']}s, budget is {budget}s")
+    loaded = [name for name in forbidden if name in result["heavy_modules"]]
+    if loaded:
+        failures.append(f"import loaded {', '.join(loaded)}")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--warmup-mode",
+        default="lazy",
+        help="WARMUP_MODE of the measured app, default lazy",
+    )
+    parser.add_argument(
+        "--budget",
+        type=float,
+        default=0.0,
+        help="fail when the median import takes longer (seconds)",
+    )
+    parser.add_argument(
+        "--forbid",
+        help=f"comma separated modules the import must not load, e.g. {','.join(HEAVY_MODULES)}",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+
+    result = run(args.runs, args.warmup_mode)
+    failures = check(result, args.budget, parse_list(args.forbid) or [])
+    result["failures"] = failures
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Compare two saved benchmark results, e.g. from two commits.
+Matches every numeric value present in both files by its path and reports the
+relative change. Times and memory are better lower, throughput and x_realtime
+better higher; changes for the worse beyond the threshold are listed as regressions.
+
+    python -m benchmarks.compare benchmarks/results/micro-1a2b3c.json benchmarks/results/micro-4d5e6f.json
+"""
+
+import argparse
+import json
+import sys
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+HIGHER_IS_BETTER = ("per_second", "x_realtime", "speedup", "succeeded")
+LOWER_IS_BETTER = ("seconds", "bytes", "rejected")
+# Inputs and descriptions rather than measurements, as are keys starting with "clip_"
+IGNORED = (
+    "environment",
+    "requests",
+    "repeat",
+    "rate",
+    "channels",
+    "stub_latency_seconds",
+    "stub_cpu_seconds",
+)
+
+
+def flatten(value: Any, path: str = "") -> Iterator[Tuple[str, float]]:
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if key in IGNORED or key.startswith("clip_"):
+                continue
+            yield from flatten(item, f"{path}.{key}" if path else str(key))
+    elif isinstance(value, (int, float)) and not isinstance(value, bool):
+        yield path, float(value)
+
+
+def direction(path: str) -> Optional[int]:
+    """1 if a larger value is better, -1 if smaller is, None if it is not a measurement"""
+    leaf = path.rsplit(".", 1)[-1]
+    if any(marker in leaf for marker in HIGHER_IS_BETTER):
+        return 1
+    if any(marker in leaf for marker in LOWER_IS_BETTER):
+        return -1
+    return None
+
+
+def compare(
+    baseline: Dict[str, Any], candidate: Dict[str, Any], threshold: float
+) -> Dict[str, Any]:
+    before = dict(flatten(baseline))
+    after = dict(flatten(candidate))
+    changes, regressions, improvements = {}, [], []
+    for path, old in before.items():
+        new = after.get(path)
+        better = direction(path)
+        if new is None or better is None:
+            continue
+        change = (new - old) / old if old else 0.0
+        changes[path] = {"before": old, "after": new, "change": round(change, 4)}
+        if change * better < -threshold:
+            regressions.append(path)
+        elif change * better > threshold:
+            improvements.append(path)
+    return {
+        "baseline": baseline.get("environment", {}).get("commit"),
+        "candidate": candidate.get("environment", {}).get("commit"),
+        "threshold": threshold,
+        "regressions": regressions,
+        "improvements": improvements,
+        "changes": changes,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="relative change counted as a regression",
+    )
+    parser.add_argument(
+        "--fail-on-regression",
+        action="store_true",
+        help="exit with status 1 on any regression",
+    )
+    args = parser.parse_args()
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+    if baseline.get("benchmark") != candidate.get("benchmark"):
+        raise SystemExit(
+            f"Different benchmarks: {baseline.get('benchmark')} and {candidate.get('benchmark')}"
+        )
+
+    result = compare(baseline, candidate, args.threshold)
+    print(json.dumps(result, indent=2))
+    if args.fail_on_regression and result["regressions"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Synthetic audio corpus shared by the benchmarks.
+Speech-like clips (a gliding harmonic voice, syllable gating, pauses and a little
+noise) in every supported format and several lengths. Generation is deterministic,
+so a corpus built on two commits is the same audio. Formats other than WAV need PyAV.
+
+    python -m benchmarks.corpus --out /tmp/myra-corpus --formats wav,flac,mp3 --lengths 2,15,60
+"""
+
+import argparse
+import io
+import json
+import sys
+import wave
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# The keys of benchmarks.decode_throughput.ENCODINGS
+DEFAULT_FORMATS = ("wav", "aiff", "flac", "mp3", "ogg", "opus", "webm", "m4a", "aac")
+DEFAULT_LENGTHS = (2.0, 15.0, 60.0)
+
+
+def speech_like(seconds: float, rate: int, seed: int = 0) -> np.ndarray:
+    """
+    Voiced syllables of about 0.2 s in phrases of 1-4 s, separated by pauses of
+    0.3-1 s, so long clips are split at silences like real speech.
+    """
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * rate)) / rate
+    pitch = 130 + 30 * np.sin(2 * np.pi * 0.7 * t + seed)
+    phase = 2 * np.pi * np.cumsum(pitch) / rate
+    voice = sum(np.sin(k * phase) / k for k in range(1, 8))
+    syllables = 0.6 + 0.4 * np.sin(2 * np.pi * 5 * t)
+
+    gate = np.zeros(t.size)
+    position = 0.0
+    while position < seconds:
+        phrase = rng.uniform(1.0, 4.0)
+        gate[int(position * rate) : int(min(position + phrase, seconds) * rate)] = 1.0
+        position += phrase + rng.uniform(0.3, 1.0)
+
+    samples = 0.15 * voice * syllables * gate + rng.normal(0, 0.003, t.size)
+    return np.clip(samples, -1, 1)
+
+
+def to_wav(signal: np.ndarray, rate: int, channels: int) -> bytes:
+    frames = np.repeat((signal * 32767).astype("<i2")[:, None], channels, axis=1)
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(frames.tobytes())
+    return buffer.getvalue()
+
+
+class Clip:
+    """One encoded corpus file"""
+
+    def __init__(self, audio_format: str, seconds: float, data: bytes):
+        self.audio_format = audio_format
+        self.seconds = seconds
+        self.data = data
+
+    @property
+    def name(self) -> str:
+        return f"{self.audio_format}-{self.seconds:g}s"
+
+    @property
+    def filename(self) -> str:
+        return f"{self.name}.{self.audio_format}"
+
+
+def build_corpus(
+    formats: Iterable[str] = DEFAULT_FORMATS,
+    lengths: Iterable[float] = DEFAULT_LENGTHS,
+    rate: int = 44100,
+    channels: int = 1,
+    seed: int = 0,
+) -> List[Clip]:
+    """Every format at every length; formats this machine cannot encode are skipped"""
+    # Imported here because they load the settings, which benchmarks configure first
+    from benchmarks.decode_throughput import encode
+    from core.decoders import av
+
+    clips = []
+    for seconds in lengths:
+        signal = speech_like(seconds, rate, seed)
+        for audio_format in formats:
+            if audio_format == "wav":
+                data = to_wav(signal, rate, channels)
+            elif av is None:
+                continue
+            else:
+                try:
+                    data = encode(audio_format, signal, rate, channels)
+                except Exception:
+                    # e.g. an FFmpeg build without that encoder
+                    continue
+            clips.append(Clip(audio_format, seconds, data))
+    return clips
+
+
+def parse_list(value: Optional[str], cast=str) -> Optional[list]:
+    """Comma separated command line option"""
+    if not value:
+        return None
+    return [cast(item.strip()) for item in value.split(",") if item.strip()]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--out", required=True, help="directory to write the files to")
+    parser.add_argument(
+        "--formats", help=f"comma separated, default {','.join(DEFAULT_FORMATS)}"
+    )
+    parser.add_argument("--lengths", help="comma separated seconds, default 2,15,60")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=1, choices=(1, 2))
+    args = parser.parse_args()
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    clips = build_corpus(
+        parse_list(args.formats) or DEFAULT_FORMATS,
+        parse_list(args.lengths, float) or DEFAULT_LENGTHS,
+        args.rate,
+        args.channels,
+    )
+    for clip in clips:
+        (out / clip.filename).write_bytes(clip.data)
+    print(json.dumps({clip.filename: len(clip.data) for clip in clips}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""
+Per-format decode throughput.
+Encodes one synthetic clip into every supported format (encoding needs PyAV), then
+decodes each with the decoder registry, and with sr.AudioFile where it can read
+the format, reporting the speed as a multiple of real time.
+
+    python -m benchmarks.decode_throughput --seconds 30 --repeat 5
+"""
+
+import argparse
+import io
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import speech_recognition as sr
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.decoders import av, decoder_registry, probe_format  # noqa: E402
+
+# format -> (container, codec, sample format)
+ENCODINGS = {
+    "wav": ("wav", "pcm_s16le", "s16"),
+    "aiff": ("aiff", "pcm_s16be", "s16"),
+    "flac": ("flac", "flac", "s16"),
+    "mp3": ("mp3", "libmp3lame", "s16p"),
+    "ogg": ("ogg", "vorbis", "fltp"),
+    "opus": ("ogg", "libopus", "s16"),
+    "webm": ("webm", "libopus", "s16"),
+    "m4a": ("ipod", "aac", "fltp"),
+    "aac": ("adts", "aac", "fltp"),
+}
+# sr.AudioFile reads these; FLAC additionally needs the flac command line tool
+LEGACY_FORMATS = ("wav", "aiff", "flac")
+
+
+def synth(seconds: float, rate: int) -> np.ndarray:
+    t = np.arange(int(seconds * rate)) / rate
+    return 0.3 * np.sin(2 * np.pi * 180 * t) * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+
+
+def encode(audio_format: str, signal: np.ndarray, rate: int, channels: int) -> bytes:
+    container_format, codec, sample_format = ENCODINGS[audio_format]
+    # Opus only encodes at 48 kHz
+    if codec == "libopus":
+        rate = 48000
+        signal = np.interp(
+            np.arange(int(len(signal) * 48000 / 44100)) * 44100 / 48000,
+            np.arange(len(signal)),
+            signal,
+        )
+    layout = "stereo" if channels == 2 else "mono"
+    output = io.BytesIO()
+    with av.open(output, mode="w", format=container_format) as container:
+        # FFmpeg's own Vorbis encoder is flagged experimental; unlike libvorbis it is always built in
+        stream = container.add_stream(
+            codec, rate=rate, options={"strict": "experimental"}
+        )
+        stream.layout = layout
+        samples = np.repeat(signal[None, :], channels, axis=0)
+        if sample_format.startswith("s16"):
+            samples = (samples * 32767).astype(np.int16)
+        else:
+            samples = samples.astype(np.float32)
+        frame_size = stream.codec_context.frame_size or 1024
+        for start in range(0, samples.shape[1], frame_size):
+            chunk = samples[:, start : start + frame_size]
+            if not sample_format.endswith("p"):
+                # Packed formats interleave the channels in one plane
+                chunk = chunk.T.reshape(1, -1)
+            frame = av.AudioFrame.from_ndarray(
+                np.ascontiguousarray(chunk), format=sample_format, layout=layout
+            )
+            frame.sample_rate = rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+    return output.getvalue()
+
+
+def time_decode(decode, data: bytes, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        decode(io.BytesIO(data))
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def legacy_decode(source) -> sr.AudioData:
+    with sr.AudioFile(source) as audio_file:
+        return sr.Recognizer().record(audio_file)
+
+
+def run(seconds: float, rate: int, channels: int, repeat: int) -> dict:
+    if av is None:
+        raise SystemExit(
+            "PyAV is required to encode the benchmark corpus: pip install av"
+        )
+    signal = synth(seconds, rate)
+    results = {}
+    for audio_format in ENCODINGS:
+        try:
+            data = encode(audio_format, signal, rate, channels)
+        except Exception as e:
+            results[audio_format] = {"error": f"encoder unavailable: {str(e)}"}
+            continue
+        entry = {"bytes": len(data), "probed": probe_format(data[:64])}
+        decoder = decoder_registry.for_format(entry["probed"])
+        if decoder is None:
+            entry["error"] = "no decoder available"
+            results[audio_format] = entry
+            continue
+        elapsed = time_decode(decoder_registry.decode, data, repeat)
+        entry.update(
+            {
+                "decoder": decoder.name,
+                "seconds": round(elapsed, 4),
+                "x_realtime": round(seconds / elapsed, 1),
+            }
+        )
+        if audio_format in LEGACY_FORMATS:
+            try:
+                legacy = time_decode(legacy_decode, data, repeat)
+                entry["legacy_x_realtime"] = round(seconds / legacy, 1)
+            except Exception as e:
+                entry["legacy_error"] = str(e)
+        else:
+            entry["legacy_error"] = "not readable by sr.AudioFile"
+        results[audio_format] = entry
+    return {
+        "benchmark": "decode_throughput",
+        "seconds": seconds,
+        "rate": rate,
+        "channels": channels,
+        "formats": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    print(
+        json.dumps(run(args.seconds, args.rate, args.channels, args.repeat), indent=2)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+"""
+Bytes sent to get large files transcribed over a connection that keeps dropping.
+Every clip goes up once as a single POST /transcribe, started over after each
+drop, and once through the resumable /uploads protocol, which resends only the
+chunk a drop interrupted. Drops come after an exponentially distributed number of
+bytes (--mean-bytes between drops) with the same seed for both, and interrupted
+chunks are really sent, truncated, so the server's checksum check refuses them.
+Runs in-process through the ASGI app with the stub backend.
+
+    python -m benchmarks.flaky_upload --formats wav,mp3 --lengths 300 --mean-bytes 2000000 --save
+"""
+
+import argparse
+import json
+import os
+import sys
+import zlib
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import build_corpus, parse_list  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+
+class FlakyLink:
+    """How many bytes get through before the next drop"""
+
+    def __init__(self, mean_bytes: float, seed: int):
+        self.mean_bytes = mean_bytes
+        self.rng = np.random.default_rng(seed)
+        self.remaining = self._next()
+
+    def _next(self) -> int:
+        return (
+            int(self.rng.exponential(self.mean_bytes))
+            if self.mean_bytes
+            else sys.maxsize
+        )
+
+    def send(self, size: int) -> int:
+        """Bytes of a size byte request that arrive; fewer than size means the connection dropped"""
+        if size <= self.remaining:
+            self.remaining -= size
+            return size
+        arrived, self.remaining = self.remaining, self._next()
+        return arrived
+
+
+def whole_file(
+    client, link: FlakyLink, filename: str, data: bytes, max_attempts: int
+) -> Dict:
+    sent = attempts = 0
+    while attempts < max_attempts:
+        attempts += 1
+        arrived = link.send(len(data))
+        sent += arrived
+        if arrived == len(data):
+            response = client.post("/transcribe", files={"file": (filename, data)})
+            return {
+                "bytes_sent": sent,
+                "requests": attempts,
+                "succeeded": response.status_code == 200,
+            }
+    return {"bytes_sent": sent, "requests": attempts, "succeeded": False}
+
+
+def resumable(
+    client, link: FlakyLink, filename: str, data: bytes, max_attempts: int
+) -> Dict:
+    response = client.post(
+        "/uploads", data={"size": str(len(data)), "filename": filename}
+    )
+    response.raise_for_status()
+    upload = response.json()
+    url = f"/uploads/{upload['id']}"
+    sent = offset = failures = 0
+    requests = 1
+    while offset < len(data) and failures < max_attempts:
+        chunk = data[offset : offset + upload["chunk_size"]]
+        arrived = link.send(len(chunk))
+        sent += arrived
+        requests += 1
+        response = client.patch(
+            url,
+            content=chunk[:arrived],
+            headers={
+                "Upload-Offset": str(offset),
+                "Upload-Checksum": f"crc32 {zlib.crc32(chunk):08x}",
+            },
+        )
+        if response.status_code == 200:
+            offset = response.json()["offset"]
+            continue
+        # What a client does after a drop: ask where to resume
+        failures += 1
+        requests += 1
+        offset = client.get(url).json()["offset"]
+    succeeded = offset == len(data)
+    if succeeded:
+        requests += 1
+        succeeded = client.post(f"{url}/finalize").status_code == 200
+    else:
+        client.delete(url)
+    return {"bytes_sent": sent, "requests": requests, "succeeded": succeeded}
+
+
+def summarize(runs: List[Dict], total_bytes: int) -> Dict:
+    sent = sum(run["bytes_sent"] for run in runs)
+    return {
+        "bytes_sent": sent,
+        "retransmitted_bytes": max(0, sent - total_bytes),
+        "overhead": round(sent / total_bytes - 1, 3),
+        "requests": sum(run["requests"] for run in runs),
+        "succeeded": sum(run["succeeded"] for run in runs),
+    }
+
+
+def run(
+    formats: List[str],
+    lengths: List[float],
+    mean_bytes: float,
+    max_attempts: int,
+    seed: int,
+) -> dict:
+    from fastapi.testclient import TestClient
+    from api.main import app
+
+    clips = build_corpus(formats, lengths)
+    client = TestClient(app)
+    results = {}
+    for name, strategy in (("whole_file", whole_file), ("resumable", resumable)):
+        link = FlakyLink(mean_bytes, seed)
+        runs = [
+            strategy(client, link, clip.filename, clip.data, max_attempts)
+            for clip in clips
+        ]
+        results[name] = summarize(runs, sum(len(clip.data) for clip in clips))
+    return {
+        "benchmark": "flaky_upload",
+        "clips": [{"name": clip.name, "bytes": len(clip.data)} for clip in clips],
+        "mean_bytes_between_drops": mean_bytes,
+        "max_attempts": max_attempts,
+        **results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--formats", default="wav,mp3", help="comma separated")
+    parser.add_argument("--lengths", default="300", help="comma separated seconds")
+    parser.add_argument(
+        "--mean-bytes",
+        type=float,
+        default=2_000_000,
+        help="mean bytes between drops, 0 for none",
+    )
+    parser.add_argument(
+        "--max-attempts",
+        type=int,
+        default=20,
+        help="drops tolerated per file before giving up",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+    # Settings are read at import time, so configure them before the app is loaded
+    os.environ["RECOGNITION_BACKENDS"] = "stub"
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+    os.environ["LANGUAGE_ID_ENABLED"] = "false"
+
+    result = run(
+        parse_list(args.formats),
+        parse_list(args.lengths, float),
+        args.mean_bytes,
+        args.max_attempts,
+        args.seed,
+    )
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
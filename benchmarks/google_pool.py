@@ -0,0 +1,278 @@
+"""
+Connections opened and latency of Google recognition, per-request urllib vs the pooled client.
+Serves a local stand-in for the Web Speech API that stalls every new connection for
+--handshake-ms (the TCP and TLS handshakes to Google) and every request for
+--latency-ms, and does not understand any language but the last, so each
+transcription makes one request per language, --fanout at a time. "urllib" sends
+them the way recognize_google does, encoding the FLAC body and opening a connection
+for every request; "pooled" is core.google_client, which encodes once per
+transcription and keeps its connections alive.
+
+    python -m benchmarks.google_pool --transcriptions 20 --languages 11 --fanout 6 --handshake-ms 60 --save
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import speech_like  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+MODES = ("urllib", "pooled")
+LANGUAGES = (
+    "gu-IN",
+    "hi-IN",
+    "en-US",
+    "fr-FR",
+    "es-ES",
+    "de-DE",
+    "it-IT",
+    "ja-JP",
+    "ko-KR",
+    "zh-CN",
+    "ru-RU",
+)
+NOT_UNDERSTOOD = b'{"result":[]}\n'
+UNDERSTOOD = (
+    b'{"result":[]}\n'
+    b'{"result":[{"alternative":[{"transcript":"hello world","confidence":0.92}],"final":true}],"result_index":0}\n'
+)
+
+
+class StandIn(ThreadingHTTPServer):
+    """The Web Speech API's request and response format, counting connections and requests"""
+
+    daemon_threads = True
+
+    def __init__(self, handshake: float, latency: float, understood: str):
+        super().__init__(("127.0.0.1", 0), StandInHandler)
+        self.handshake = handshake
+        self.latency = latency
+        self.understood = understood
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+            self.flac_requests = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/speech-api/v2/recognize"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The headers and body go out in separate writes; without this a reused connection
+    # waits on the client's delayed ACK before every response body
+    disable_nagle_algorithm = True
+
+    def setup(self) -> None:
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake)
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.requests += 1
+            self.server.flac_requests += body[:4] == b"fLaC"
+        time.sleep(self.server.latency)
+        content = (
+            UNDERSTOOD
+            if f"lang={self.server.understood}" in self.path
+            else NOT_UNDERSTOOD
+        )
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args) -> None:
+        pass
+
+
+def urllib_transcriber(url: str) -> Callable:
+    import speech_recognition as sr
+
+    recognizer = sr.Recognizer()
+
+    def recognize(audio_data, language: str):
+        return recognizer.recognize_google(
+            audio_data, language=language, show_all=True, endpoint=url
+        )
+
+    return recognize, lambda audio_data: audio_data, lambda: None
+
+
+def pooled_transcriber(url: str, pool_size: int) -> Callable:
+    from core.google_client import GoogleAudio, GoogleSpeechClient
+
+    client = GoogleSpeechClient(url=url, pool_size=pool_size)
+    return client.recognize, GoogleAudio, client.close
+
+
+def transcribe(
+    executor: ThreadPoolExecutor, recognize: Callable, audio, languages: List[str]
+) -> str:
+    import speech_recognition as sr
+
+    def attempt(language: str):
+        try:
+            return recognize(audio, language)
+        except sr.UnknownValueError:
+            return None
+
+    results = [result for result in executor.map(attempt, languages) if result]
+    return results[0]["alternative"][0]["transcript"] if results else None
+
+
+def run_mode(
+    mode: str,
+    server: StandIn,
+    audio_data,
+    transcriptions: int,
+    languages: List[str],
+    fanout: int,
+) -> Dict:
+    if mode == "urllib":
+        recognize, encode, close = urllib_transcriber(server.url)
+    else:
+        recognize, encode, close = pooled_transcriber(server.url, fanout)
+    server.reset()
+    latencies = []
+    transcripts = set()
+    with ThreadPoolExecutor(max_workers=fanout) as executor:
+        for _ in range(transcriptions):
+            started = time.perf_counter()
+            transcripts.add(
+                transcribe(executor, recognize, encode(audio_data), languages)
+            )
+            latencies.append(time.perf_counter() - started)
+    close()
+    latencies.sort()
+    return {
+        "transcripts": sorted(t for t in transcripts if t is not None),
+        "requests": server.requests,
+        "flac_requests": server.flac_requests,
+        "connections": server.connections,
+        "requests_per_connection": (
+            round(server.requests / server.connections, 2)
+            if server.connections
+            else None
+        ),
+        "p50_seconds": round(statistics.median(latencies), 4),
+        "p95_seconds": round(
+            latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 4
+        ),
+        "total_seconds": round(sum(latencies), 4),
+    }
+
+
+def run(
+    transcriptions: int,
+    languages: List[str],
+    fanout: int,
+    handshake_ms: float,
+    latency_ms: float,
+    seconds: float,
+) -> dict:
+    import numpy as np
+    import speech_recognition as sr
+
+    rate = 16000
+    audio_data = sr.AudioData(
+        (speech_like(seconds, rate) * 32767).astype(np.int16).tobytes(), rate, 2
+    )
+    server = StandIn(handshake_ms / 1000, latency_ms / 1000, languages[-1])
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        modes = {
+            mode: run_mode(mode, server, audio_data, transcriptions, languages, fanout)
+            for mode in MODES
+        }
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    urllib, pooled = modes["urllib"], modes["pooled"]
+    return {
+        "benchmark": "google_pool",
+        "transcriptions": transcriptions,
+        "languages": len(languages),
+        "fanout": fanout,
+        "handshake_ms": handshake_ms,
+        "latency_ms": latency_ms,
+        "audio_seconds": seconds,
+        "modes": modes,
+        "handshakes_saved": urllib["connections"] - pooled["connections"],
+        "flac_encodings": {"urllib": urllib["requests"], "pooled": transcriptions},
+        "p50_reduction": (
+            round(1 - pooled["p50_seconds"] / urllib["p50_seconds"], 3)
+            if urllib["p50_seconds"]
+            else None
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcriptions", type=int, default=20)
+    parser.add_argument(
+        "--languages",
+        type=int,
+        default=len(LANGUAGES),
+        help=f"languages tried per transcription, at most {len(LANGUAGES)}",
+    )
+    parser.add_argument(
+        "--fanout",
+        type=int,
+        default=6,
+        help="concurrent requests per transcription, as GOOGLE_FANOUT_CONCURRENCY",
+    )
+    parser.add_argument(
+        "--handshake-ms", type=float, default=60, help="stall of every new connection"
+    )
+    parser.add_argument(
+        "--latency-ms", type=float, default=40, help="stall of every request"
+    )
+    parser.add_argument("--seconds", type=float, default=5, help="length of the clip")
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+
+    languages = list(LANGUAGES[: max(1, args.languages)])
+    result = run(
+        args.transcriptions,
+        languages,
+        args.fanout,
+        args.handshake_ms,
+        args.latency_ms,
+        args.seconds,
+    )
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Peak memory of the WAV ingest path.
+Compares the legacy path (read the whole upload, wrap it in BytesIO, sr.AudioFile +
+record) with the streaming WavStreamDecoder, using tracemalloc on a synthetic file.
+
+    python -m benchmarks.ingest_memory --seconds 120 --rate 48000 --channels 2
+"""
+
+import argparse
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+import wave
+from pathlib import Path
+
+import numpy as np
+import speech_recognition as sr
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.audio_ingest import WavStreamDecoder  # noqa: E402
+
+CHUNK_SIZE = 64 * 1024
+
+
+def write_wav(path: str, seconds: float, rate: int, channels: int) -> None:
+    """Write a synthetic speech-like signal without holding it all in memory"""
+    with wave.open(path, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        for start in range(0, int(seconds * rate), rate):
+            t = np.arange(start, min(start + rate, int(seconds * rate))) / rate
+            signal = (
+                0.3
+                * np.sin(2 * np.pi * 180 * t)
+                * (0.5 + 0.5 * np.sin(2 * np.pi * 4 * t))
+            )
+            frames = np.repeat(
+                (signal * 32767).astype("<i2")[:, None], channels, axis=1
+            )
+            w.writeframes(frames.tobytes())
+
+
+def legacy_path(path: str) -> int:
+    with open(path, "rb") as f:
+        content = f.read()
+    with sr.AudioFile(io.BytesIO(content)) as source:
+        audio_data = sr.Recognizer().record(source)
+    return len(audio_data.frame_data)
+
+
+def streaming_path(path: str) -> int:
+    decoder = WavStreamDecoder()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            decoder.feed(chunk)
+    audio_data = decoder.finish()
+    return len(audio_data.frame_data)
+
+
+def measure(func, path: str) -> dict:
+    tracemalloc.start()
+    pcm_bytes = func(path)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "peak_bytes": peak,
+        "pcm_bytes": pcm_bytes,
+        "peak_over_pcm": round(peak / pcm_bytes, 2),
+    }
+
+
+def run(seconds: float, rate: int, channels: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "bench.wav")
+        write_wav(path, seconds, rate, channels)
+        file_bytes = os.path.getsize(path)
+        return {
+            "benchmark": "ingest_memory",
+            "seconds": seconds,
+            "rate": rate,
+            "channels": channels,
+            "file_bytes": file_bytes,
+            "legacy": measure(legacy_path, path),
+            "streaming": measure(streaming_path, path),
+        }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=120)
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2)
+    args = parser.parse_args()
+    print(json.dumps(run(args.seconds, args.rate, args.channels), indent=2))
+
+
+if __name__ == "__main__":
+    main()
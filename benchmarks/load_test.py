@@ -0,0 +1,230 @@
+"""
+In-process load test of POST /transcribe at several concurrency levels.
+Drives api.main:app through httpx's ASGI transport, so no server or network is
+involved, with clips from benchmarks.corpus sent round robin. Recognition uses the
+stub backend with a fixed latency standing in for the network service. For each
+level reports latency percentiles of successful requests, throughput, rejected
+(503) requests and the peak resident memory of the process during the level.
+
+    python -m benchmarks.load_test --concurrency 1,4,16,64 --requests 200 --latency 0.2 --save
+"""
+
+import argparse
+import asyncio
+import collections
+import json
+import math
+import os
+import resource
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import Clip, build_corpus, parse_list  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+
+def percentile(values: List[float], fraction: float) -> Optional[float]:
+    """Nearest-rank percentile, like the backend latency stats"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[
+        min(len(ordered) - 1, max(0, math.ceil(fraction * len(ordered)) - 1))
+    ]
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size in bytes, where /proc is available"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class RssSampler:
+    """
+    Peak RSS over an interval, sampled on a background thread.
+    Without /proc it falls back to ru_maxrss, the peak over the whole process life.
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            rss = current_rss()
+            if rss is None:
+                return
+            self.peak = max(self.peak, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "RssSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._stop.set()
+        self._thread.join()
+        if not self.peak:
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            # Kilobytes on Linux, bytes on macOS
+            self.peak = max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+async def run_level(
+    client, clips: List[Clip], concurrency: int, requests: int
+) -> Dict[str, object]:
+    latencies = []
+    statuses = collections.Counter()
+    audio_seconds = 0.0
+    next_request = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal audio_seconds
+        for index in next_request:
+            clip = clips[index % len(clips)]
+            started = time.perf_counter()
+            response = await client.post(
+                "/transcribe",
+                files={"file": (clip.filename, clip.data)},
+                data={"language": "en-US"},
+            )
+            elapsed = time.perf_counter() - started
+            statuses[response.status_code] += 1
+            if response.status_code == 200:
+                latencies.append(elapsed)
+                audio_seconds += clip.seconds
+
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    def rounded(value: Optional[float]) -> Optional[float]:
+        return round(value, 4) if value is not None else None
+
+    return {
+        "requests": requests,
+        "succeeded": statuses.get(200, 0),
+        "rejected": statuses.get(503, 0),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "p50_seconds": rounded(percentile(latencies, 0.5)),
+        "p95_seconds": rounded(percentile(latencies, 0.95)),
+        "p99_seconds": rounded(percentile(latencies, 0.99)),
+        "max_seconds": rounded(max(latencies) if latencies else None),
+        "wall_seconds": round(elapsed, 3),
+        "requests_per_second": round(statuses.get(200, 0) / elapsed, 2),
+        "audio_seconds_per_second": round(audio_seconds / elapsed, 1),
+        "peak_rss_bytes": sampler.peak,
+    }
+
+
+async def run_levels(
+    levels: List[int], requests: int, clips: List[Clip]
+) -> Dict[str, object]:
+    import httpx
+    from api.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://benchmark", timeout=None
+    ) as client:
+        # Loads models and starts the worker pool outside the measured levels
+        await run_level(client, clips, 1, 1)
+        return {
+            str(level): await run_level(client, clips, level, requests)
+            for level in levels
+        }
+
+
+def run(
+    levels: List[int],
+    requests: int,
+    formats: List[str],
+    lengths: List[float],
+    latency: float,
+) -> dict:
+    from config.settings import (
+        RECOGNITION_EXECUTOR,
+        RECOGNITION_QUEUE_SIZE,
+        RECOGNITION_WORKERS,
+    )
+
+    clips = build_corpus(formats, lengths)
+    return {
+        "benchmark": "load_test",
+        "requests_per_level": requests,
+        "clips": [clip.name for clip in clips],
+        "stub_latency_seconds": latency,
+        "pool": {
+            "executor": RECOGNITION_EXECUTOR,
+            "workers": RECOGNITION_WORKERS,
+            "queue_size": RECOGNITION_QUEUE_SIZE,
+        },
+        "baseline_rss_bytes": current_rss(),
+        "levels": asyncio.run(run_levels(levels, requests, clips)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--concurrency", default="1,4,16,64", help="comma separated levels"
+    )
+    parser.add_argument("--requests", type=int, default=200, help="requests per level")
+    parser.add_argument("--formats", default="wav,mp3,m4a", help="comma separated")
+    parser.add_argument("--lengths", default="2,8", help="comma separated seconds")
+    parser.add_argument(
+        "--latency", type=float, default=0.2, help="stub backend latency in seconds"
+    )
+    parser.add_argument(
+        "--cpu",
+        type=float,
+        default=0.0,
+        help="CPU seconds the stub backend burns per request",
+    )
+    parser.add_argument(
+        "--cache",
+        action="store_true",
+        help="keep the result cache on; the corpus repeats",
+    )
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+    # Settings are read at import time, so configure them before the app is loaded
+    os.environ["RECOGNITION_BACKENDS"] = "stub"
+    os.environ["STUB_BACKEND_LATENCY"] = str(args.latency)
+    os.environ["STUB_BACKEND_CPU"] = str(args.cpu)
+    os.environ["RESULT_CACHE_ENABLED"] = "true" if args.cache else "false"
+
+    result = run(
+        parse_list(args.concurrency, int),
+        args.requests,
+        parse_list(args.formats),
+        parse_list(args.lengths, float),
+        args.latency,
+    )
+    result["result_cache"] = args.cache
+    result["stub_cpu_seconds"] = args.cpu
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Microbenchmarks of the transcription stages on the synthetic corpus.
+For every clip of benchmarks.corpus: decode with the decoder registry, preprocess
+with AudioPreprocessor, and recognise with SpeechRecognizer on a zero-latency stub
+backend (which covers language identification and, for long clips, segmentation).
+Reports median and best seconds of each stage and the peak traced allocation.
+
+    python -m benchmarks.micro --formats wav,flac,mp3 --lengths 2,15,60 --repeat 5 --save
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable, Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import (
+    DEFAULT_FORMATS,
+    DEFAULT_LENGTHS,
+    build_corpus,
+    parse_list,
+)  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    """Median and best wall time over repeat runs, then one traced run for peak memory"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - started)
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "median_seconds": round(statistics.median(durations), 5),
+        "best_seconds": round(min(durations), 5),
+        "peak_alloc_bytes": peak,
+    }
+
+
+def run(
+    formats: List[str], lengths: List[float], rate: int, channels: int, repeat: int
+) -> dict:
+    from core.decoders import decoder_registry
+    from core.preprocess import AudioPreprocessor
+    from core.speech_recognition import SpeechRecognizer
+
+    preprocessor = AudioPreprocessor()
+    recognizer = SpeechRecognizer()
+    clips = build_corpus(formats, lengths, rate, channels)
+
+    results = {}
+    for clip in clips:
+        decoded = decoder_registry.decode(io.BytesIO(clip.data))
+        prepared = preprocessor.process(decoded)
+        decode = measure(lambda: decoder_registry.decode(io.BytesIO(clip.data)), repeat)
+        decode["x_realtime"] = round(clip.seconds / decode["median_seconds"], 1)
+        results[clip.name] = {
+            "format": clip.audio_format,
+            "clip_seconds": clip.seconds,
+            "clip_bytes": len(clip.data),
+            "decode": decode,
+            "preprocess": measure(lambda: preprocessor.process(decoded), repeat),
+            # Already prepared audio, so this is language id, segmentation and backend scheduling
+            "recognize": measure(
+                lambda: recognizer.transcribe_audio_data(
+                    prepared.audio_data, calibrate=True
+                ),
+                repeat,
+            ),
+        }
+
+    return {
+        "benchmark": "micro",
+        "rate": rate,
+        "channels": channels,
+        "repeat": repeat,
+        "backends": recognizer.backend_chain,
+        "clips": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--formats", help=f"comma separated, default {','.join(DEFAULT_FORMATS)}"
+    )
+    parser.add_argument("--lengths", help="comma separated seconds, default 2,15,60")
+    parser.add_argument("--rate", type=int, default=44100)
+    parser.add_argument("--channels", type=int, default=1, choices=(1, 2))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+    # Settings are read at import time, so configure them before the recognizer is loaded
+    os.environ["RECOGNITION_BACKENDS"] = "stub"
+    os.environ["STUB_BACKEND_LATENCY"] = "0"
+    os.environ["RESULT_CACHE_ENABLED"] = "false"
+
+    result = run(
+        parse_list(args.formats) or list(DEFAULT_FORMATS),
+        parse_list(args.lengths, float) or list(DEFAULT_LENGTHS),
+        args.rate,
+        args.channels,
+        args.repeat,
+    )
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
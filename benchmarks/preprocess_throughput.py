@@ -0,0 +1,141 @@
+"""
+Audio preprocessing throughput on multi-minute recordings.
+Runs the same work (downmix, resample to 16 kHz, DC removal, noise floor, peak
+normalisation) three ways on one synthetic file:
+
+- sr_path: the original sr.AudioFile + adjust_for_ambient_noise + record path,
+  then the backends' conversion to 16 kHz; calibrates on the first 0.5 s only
+- audioop_loop: the same steps as AudioPreprocessor with audioop primitives and a
+  per-buffer Python loop for the noise floor
+- numpy: core.preprocess.AudioPreprocessor
+
+    python -m benchmarks.preprocess_throughput --seconds 300 --rate 48000 --channels 2
+"""
+
+import argparse
+import audioop
+import io
+import json
+import statistics
+import sys
+import time
+import wave
+from pathlib import Path
+
+import numpy as np
+import speech_recognition as sr
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.preprocess import AudioPreprocessor  # noqa: E402
+
+TARGET_RATE = 16000
+# sr.Recognizer reads and measures energy in buffers of this many frames
+BUFFER_FRAMES = 1024
+
+
+def synth_pcm(seconds: float, rate: int, channels: int) -> bytes:
+    """Gated tone over noise with a DC offset, interleaved 16-bit"""
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * rate)) / rate
+    speech = 0.2 * np.sin(2 * np.pi * 180 * t) * (np.sin(2 * np.pi * 0.3 * t) > -0.2)
+    mono = speech + rng.normal(0, 0.005, t.size) + 0.02
+    frames = np.repeat(np.clip(mono, -1, 1)[:, None], channels, axis=1)
+    return (frames * 32767).astype("<i2").tobytes()
+
+
+def to_wav(pcm: bytes, rate: int, channels: int) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(channels)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(pcm)
+    return buffer.getvalue()
+
+
+def sr_path(wav_bytes: bytes) -> float:
+    recognizer = sr.Recognizer()
+    with sr.AudioFile(io.BytesIO(wav_bytes)) as source:
+        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+        audio_data = recognizer.record(source)
+    audio_data.get_raw_data(convert_rate=TARGET_RATE, convert_width=2)
+    return recognizer.energy_threshold
+
+
+def audioop_loop(pcm: bytes, rate: int, channels: int) -> float:
+    mono = audioop.tomono(pcm, 2, 0.5, 0.5) if channels == 2 else pcm
+    mono, _ = audioop.ratecv(mono, 2, 1, rate, TARGET_RATE, None)
+    mono = audioop.bias(mono, 2, -audioop.avg(mono, 2))
+    chunk = BUFFER_FRAMES * 2
+    energies = [
+        audioop.rms(mono[offset : offset + chunk], 2)
+        for offset in range(0, len(mono), chunk)
+    ]
+    noise_floor = sorted(energies)[len(energies) // 10]
+    peak = audioop.max(mono, 2)
+    gain = min(0.95 * 32767 / peak, 10.0) if peak else 1.0
+    audioop.mul(mono, 2, gain)
+    return noise_floor * gain * 1.5
+
+
+def numpy_path(pcm: bytes, rate: int, channels: int) -> float:
+    prepared = AudioPreprocessor().process_pcm(pcm, rate, 2, channels)
+    return prepared.noise_floor * 1.5
+
+
+def timed(func, *args, repeat: int) -> dict:
+    """Each path returns the energy threshold it calibrated, reported alongside its time"""
+    durations = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        threshold = func(*args)
+        durations.append(time.perf_counter() - started)
+    return {
+        "median_seconds": round(statistics.median(durations), 4),
+        "energy_threshold": round(threshold, 1),
+    }
+
+
+def run(seconds: float, rate: int, channels: int, repeat: int) -> dict:
+    pcm = synth_pcm(seconds, rate, channels)
+    wav_bytes = to_wav(pcm, rate, channels)
+    results = {
+        "sr_path": timed(sr_path, wav_bytes, repeat=repeat),
+        "audioop_loop": timed(audioop_loop, pcm, rate, channels, repeat=repeat),
+        "numpy": timed(numpy_path, pcm, rate, channels, repeat=repeat),
+    }
+    for result in results.values():
+        result["x_realtime"] = round(seconds / result["median_seconds"], 1)
+    numpy_seconds = results["numpy"]["median_seconds"]
+    return {
+        "benchmark": "preprocess_throughput",
+        "seconds": seconds,
+        "rate": rate,
+        "channels": channels,
+        **results,
+        "speedup_vs_sr_path": round(
+            results["sr_path"]["median_seconds"] / numpy_seconds, 2
+        ),
+        "speedup_vs_audioop_loop": round(
+            results["audioop_loop"]["median_seconds"] / numpy_seconds, 2
+        ),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--rate", type=int, default=48000)
+    parser.add_argument("--channels", type=int, default=2, choices=(1, 2))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    print(
+        json.dumps(run(args.seconds, args.rate, args.channels, args.repeat), indent=2)
+    )
+
+
+if __name__ == "__main__":
+    main()
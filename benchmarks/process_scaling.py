@@ -0,0 +1,141 @@
+"""
+Throughput of a CPU-bound backend with thread and process recognition pools.
+Runs benchmarks.load_test in a fresh interpreter for every pool configuration, with
+a stub backend that burns --cpu seconds per request holding the GIL (as Sphinx does)
+and twice as many concurrent requests as workers. Thread pools stay at one core's
+worth of throughput whatever their size; process pools, which get the audio through
+shared memory, should scale with the cores available.
+
+    python -m benchmarks.process_scaling --workers 1,2,4 --cpu 0.2 --requests 40 --save
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import parse_list  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+EXECUTORS = ("thread", "process")
+
+
+def run_config(
+    executor: str, workers: int, cpu: float, requests: int, formats: str, lengths: str
+) -> Dict:
+    concurrency = 2 * workers
+    env = dict(
+        os.environ,
+        RECOGNITION_EXECUTOR=executor,
+        RECOGNITION_WORKERS=str(workers),
+        # Nothing should be rejected; this measures throughput, not admission control
+        RECOGNITION_QUEUE_SIZE=str(concurrency),
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, "load_test.json")
+        subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.load_test",
+                "--concurrency",
+                str(concurrency),
+                "--requests",
+                str(requests),
+                "--formats",
+                formats,
+                "--lengths",
+                lengths,
+                "--latency",
+                "0",
+                "--cpu",
+                str(cpu),
+                "--output",
+                output,
+            ],
+            cwd=str(ROOT_DIR),
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+        with open(output) as f:
+            level = json.load(f)["levels"][str(concurrency)]
+    return {
+        "concurrency": concurrency,
+        "succeeded": level["succeeded"],
+        "requests_per_second": level["requests_per_second"],
+        "p50_seconds": level["p50_seconds"],
+        "p95_seconds": level["p95_seconds"],
+        "peak_rss_bytes": level["peak_rss_bytes"],
+    }
+
+
+def run(
+    workers: List[int], cpu: float, requests: int, formats: str, lengths: str
+) -> dict:
+    results = {}
+    for executor in EXECUTORS:
+        results[executor] = {
+            str(count): run_config(executor, count, cpu, requests, formats, lengths)
+            for count in workers
+        }
+    base = results["thread"][str(workers[0])]["requests_per_second"]
+    for executor in EXECUTORS:
+        for level in results[executor].values():
+            level["speedup"] = (
+                round(level["requests_per_second"] / base, 2) if base else None
+            )
+    return {
+        "benchmark": "process_scaling",
+        "stub_cpu_seconds": cpu,
+        "requests": requests,
+        "cpus": os.cpu_count(),
+        "pools": results,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", default="1,2,4", help="comma separated pool sizes")
+    parser.add_argument(
+        "--cpu",
+        type=float,
+        default=0.2,
+        help="CPU seconds the stub backend burns per request",
+    )
+    parser.add_argument(
+        "--requests", type=int, default=40, help="requests per configuration"
+    )
+    parser.add_argument("--formats", default="wav,mp3", help="comma separated")
+    parser.add_argument("--lengths", default="8", help="comma separated seconds")
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+
+    result = run(
+        parse_list(args.workers, int),
+        args.cpu,
+        args.requests,
+        args.formats,
+        args.lengths,
+    )
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
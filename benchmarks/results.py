@@ -0,0 +1,68 @@
+"""
+Saving benchmark results for comparison across commits.
+Each result is written as JSON together with the commit, interpreter and machine it
+was measured on; benchmarks.compare reads two of these files back.
+"""
+
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+ROOT_DIR = Path(__file__).parent.parent
+RESULTS_DIR = ROOT_DIR / "benchmarks" / "results"
+
+
+def _git(*args: str) -> Optional[str]:
+    try:
+        output = subprocess.run(
+            ["git", *args],
+            cwd=ROOT_DIR,
+            capture_output=True,
+            text=True,
+            timeout=10,
+            check=True,
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return output.strip()
+
+
+def environment() -> Dict[str, Any]:
+    """Where and on what a result was measured"""
+    import numpy as np
+
+    status = _git("status", "--porcelain", "--untracked-files=no")
+    return {
+        "commit": _git("rev-parse", "HEAD"),
+        "dirty": bool(status) if status is not None else None,
+        "measured_at": datetime.datetime.now(datetime.timezone.utc).isoformat(
+            timespec="seconds"
+        ),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def save(result: Dict[str, Any], output: Optional[str] = None) -> Path:
+    """
+    Write result with its environment to output, or by default to
+    benchmarks/results/<benchmark>-<commit>.json, and return the path.
+    """
+    record = {**result, "environment": environment()}
+    if output:
+        path = Path(output)
+    else:
+        commit = (record["environment"]["commit"] or "unknown")[:10]
+        suffix = "-dirty" if record["environment"]["dirty"] else ""
+        path = RESULTS_DIR / f"{result['benchmark']}-{commit}{suffix}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(record, indent=2) + "\n")
+    print(f"Saved to {path}", file=sys.stderr)
+    return path
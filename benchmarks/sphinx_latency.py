@@ -0,0 +1,83 @@
+"""
+Offline Sphinx fallback latency.
+Compares sr.Recognizer.recognize_sphinx, which loads the models on every call,
+with the warm decoders of core.sphinx_decoder on the same synthetic voiced clips.
+
+    python -m benchmarks.sphinx_latency --clips 5 --seconds 3
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import speech_recognition as sr
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from core.sphinx_decoder import get_sphinx_pool  # noqa: E402
+
+RATE = 16000
+
+
+def voiced_clip(seed: int, seconds: float) -> sr.AudioData:
+    """Harmonic buzz with a gliding pitch and syllable-like gating; Sphinx finds words in it"""
+    rng = np.random.default_rng(seed)
+    t = np.arange(int(seconds * RATE)) / RATE
+    pitch = 120 + 40 * np.sin(2 * np.pi * 3 * t + seed)
+    phase = 2 * np.pi * np.cumsum(pitch) / RATE
+    signal = sum(np.sin(k * phase) / k for k in range(1, 12))
+    gate = (np.sin(2 * np.pi * (2 + seed % 3) * t) > -0.2).astype(float)
+    samples = signal * gate * 0.2 + rng.normal(0, 0.01, t.size)
+    return sr.AudioData(
+        (np.clip(samples, -1, 1) * 32767).astype("<i2").tobytes(), RATE, 2
+    )
+
+
+def timed(recognize, clips) -> dict:
+    latencies = []
+    for clip in clips:
+        started = time.perf_counter()
+        try:
+            recognize(clip)
+        except sr.UnknownValueError:
+            pass
+        latencies.append(time.perf_counter() - started)
+    return {
+        "mean_seconds": round(statistics.mean(latencies), 3),
+        "max_seconds": round(max(latencies), 3),
+    }
+
+
+def run(clip_count: int, seconds: float) -> dict:
+    clips = [voiced_clip(seed, seconds) for seed in range(clip_count)]
+    recognizer = sr.Recognizer()
+    pool = get_sphinx_pool()
+    started = time.perf_counter()
+    pool.warmup(["en-US"])
+    warmup_seconds = time.perf_counter() - started
+    return {
+        "benchmark": "sphinx_latency",
+        "clips": clip_count,
+        "clip_seconds": seconds,
+        "per_call_load": timed(recognizer.recognize_sphinx, clips),
+        "warm_decoder": timed(pool.recognize, clips),
+        "warmup_seconds": round(warmup_seconds, 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--clips", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=3)
+    args = parser.parse_args()
+    print(json.dumps(run(args.clips, args.seconds), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""
+Concurrent upload spooling: the old synchronous copy against the disk, tmpfs and memfd spools.
+Saves --uploads files of --size-mb each at once through FileHandler, as disk mode
+does for /transcribe, then releases them, while a ticker measures how late the
+event loop runs it. The old implementation copied and removed files on the event
+loop (kept here as "legacy"), so every other request waited behind the disk.
+Each spool runs in a fresh interpreter with its UPLOAD_SPOOL.
+
+    python -m benchmarks.spool_throughput --uploads 16 --size-mb 8 --spools legacy,disk,tmpfs,memfd --save
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+from benchmarks.corpus import parse_list  # noqa: E402
+from benchmarks.results import save  # noqa: E402
+
+SPOOLS = ("legacy", "disk", "tmpfs", "memfd")
+# Starlette keeps smaller multipart files in memory and rolls larger ones over to a temporary file
+UPLOAD_MEMORY_LIMIT = 1024 * 1024
+TICK_SECONDS = 0.001
+
+
+async def legacy_save(upload_file) -> Path:
+    """FileHandler's disk path before spooling moved off the event loop"""
+    from config.settings import AUDIO_DIR
+    from core.upload_store import upload_store
+
+    AUDIO_DIR.mkdir(exist_ok=True)
+    file_path = AUDIO_DIR / upload_store.unique_filename(upload_file.filename)
+    with file_path.open("wb") as buffer:
+        shutil.copyfileobj(upload_file.file, buffer)
+    if not file_path.exists():
+        raise IOError("File was not saved successfully")
+    return upload_store.put_path(file_path)
+
+
+async def ticker(lags: List[float], stop: asyncio.Event) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(TICK_SECONDS)
+        lags.append(time.perf_counter() - started - TICK_SECONDS)
+
+
+async def measure(spool: str, uploads: int, size: int) -> Dict:
+    from fastapi import UploadFile
+
+    from core.file_handler import FileHandler
+
+    payload = os.urandom(size)
+    files = []
+    for index in range(uploads):
+        spooled = tempfile.SpooledTemporaryFile(max_size=UPLOAD_MEMORY_LIMIT)
+        spooled.write(payload)
+        spooled.seek(0)
+        files.append(
+            UploadFile(file=spooled, size=size, filename=f"upload-{index}.wav")
+        )
+
+    lags: List[float] = []
+    stop = asyncio.Event()
+    tick = asyncio.ensure_future(ticker(lags, stop))
+    await asyncio.sleep(0.05)
+    started = time.perf_counter()
+    if spool == "legacy":
+        references = await asyncio.gather(*(legacy_save(f) for f in files))
+    else:
+        references = await asyncio.gather(
+            *(FileHandler.save_upload_file(f) for f in files)
+        )
+    saved = time.perf_counter() - started
+    if spool == "legacy":
+        for reference in references:
+            FileHandler.cleanup_file(reference)
+    else:
+        await asyncio.gather(
+            *(FileHandler.release_file(reference) for reference in references)
+        )
+    total = time.perf_counter() - started
+    stop.set()
+    await tick
+
+    lags.sort()
+    return {
+        "save_seconds": round(saved, 4),
+        "total_seconds": round(total, 4),
+        "megabytes_per_second": round(uploads * size / saved / 1e6, 1),
+        "loop_lag_p50_ms": round(statistics.median(lags) * 1000, 2),
+        "loop_lag_p99_ms": round(lags[int(0.99 * (len(lags) - 1))] * 1000, 2),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2),
+        # Few ticks means the loop was blocked for most of the run
+        "ticks": len(lags),
+    }
+
+
+def run_spool(spool: str, uploads: int, size_mb: float, spool_dir: str) -> Dict:
+    env = dict(os.environ, UPLOAD_SPOOL="disk" if spool == "legacy" else spool)
+    if spool_dir:
+        env["UPLOAD_SPOOL_DIR"] = spool_dir
+    env.pop("VERCEL", None)
+    env.pop("VERCEL_ENV", None)
+    completed = subprocess.run(
+        [
+            sys.executable,
+            "-m",
+            "benchmarks.spool_throughput",
+            "--run",
+            spool,
+            "--uploads",
+            str(uploads),
+            "--size-mb",
+            str(size_mb),
+        ],
+        cwd=str(ROOT_DIR),
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def run(spools: List[str], uploads: int, size_mb: float, spool_dir: str) -> dict:
+    return {
+        "benchmark": "spool_throughput",
+        "uploads": uploads,
+        "size_mb": size_mb,
+        "spools": {
+            spool: run_spool(spool, uploads, size_mb, spool_dir) for spool in spools
+        },
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--uploads", type=int, default=16, help="uploads saved at once")
+    parser.add_argument("--size-mb", type=float, default=8, help="size of each upload")
+    parser.add_argument("--spools", default=",".join(SPOOLS), help="comma separated")
+    parser.add_argument("--spool-dir", help="UPLOAD_SPOOL_DIR for the tmpfs spool")
+    parser.add_argument("--run", choices=SPOOLS, help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--save",
+        action="store_true",
+        help="also write the result to benchmarks/results/",
+    )
+    parser.add_argument("--output", help="write the result to this JSON file")
+    args = parser.parse_args()
+
+    if args.run:
+        # One measurement in this interpreter, configured by the parent
+        print(
+            json.dumps(
+                asyncio.run(
+                    measure(args.run, args.uploads, int(args.size_mb * 1024 * 1024))
+                )
+            )
+        )
+        return
+
+    result = run(parse_list(args.spools), args.uploads, args.size_mb, args.spool_dir)
+    if args.save or args.output:
+        save(result, args.output)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+from typing import Optional
+
+from config.settings import (
+    ADMISSION_MAX_SAMPLE_RATE,
+    ADMISSION_MAX_SECONDS,
+    ADMISSION_MIN_SAMPLE_RATE,
+)
+from core.formats import AudioInfo, probe_info
+from core.metrics import ADMISSION_REJECTIONS
+
+
+class AdmissionError(Exception):
+    """Raised when an upload's headers rule it out before any decoding or recognition"""
+
+    def __init__(self, reason: str, detail: str, status_code: int = 400):
+        super().__init__(detail)
+        self.reason = reason
+        self.detail = detail
+        self.status_code = status_code
+
+
+def reject(reason: str, detail: str, status_code: int = 400) -> AdmissionError:
+    ADMISSION_REJECTIONS.inc(reason)
+    return AdmissionError(reason, detail, status_code)
+
+
+def check_audio_info(
+    info: AudioInfo, max_seconds: Optional[float] = ADMISSION_MAX_SECONDS
+) -> None:
+    """Raise AdmissionError if what is known of the audio is outside the limits; unknowns pass"""
+    if (
+        info.sample_rate is not None
+        and not ADMISSION_MIN_SAMPLE_RATE
+        <= info.sample_rate
+        <= ADMISSION_MAX_SAMPLE_RATE
+    ):
+        raise reject(
+            "sample_rate",
+            f"Unsupported sample rate {info.sample_rate} Hz; "
+            f"expected {ADMISSION_MIN_SAMPLE_RATE} to {ADMISSION_MAX_SAMPLE_RATE} Hz",
+        )
+    if info.duration is not None:
+        if info.duration <= 0:
+            raise reject("empty", "The audio file contains no samples")
+        if max_seconds and info.duration > max_seconds:
+            raise reject(
+                "duration",
+                f"Audio is {info.duration:.0f}s long, the maximum is {max_seconds:.0f}s; use /jobs for long recordings",
+                413,
+            )
+
+
+def check_decoded(
+    audio_data, max_seconds: Optional[float] = ADMISSION_MAX_SECONDS
+) -> None:
+    """The duration check for decoded audio whose header did not give its length"""
+    seconds = len(audio_data.frame_data) / (
+        audio_data.sample_rate * audio_data.sample_width
+    )
+    check_audio_info(AudioInfo("wav", duration=seconds), max_seconds)
+
+
+def corrupt(error: Exception) -> AdmissionError:
+    """AdmissionError for headers that could not be parsed"""
+    return reject("corrupt", f"Corrupt audio file: {str(error)}")
+
+
+def admit_header(
+    header: bytes, max_seconds: Optional[float] = ADMISSION_MAX_SECONDS
+) -> AudioInfo:
+    """What the upload's leading bytes say about it, or AdmissionError if that rules it out"""
+    try:
+        info = probe_info(header)
+    except ValueError as e:
+        raise corrupt(e)
+    check_audio_info(info, max_seconds)
+    return info
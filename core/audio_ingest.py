@@ -0,0 +1,292 @@
+import audioop
+import hashlib
+import logging
+import struct
+from typing import Optional
+
+import numpy as np
+import speech_recognition as sr
+from fastapi import UploadFile
+
+from config.settings import INGEST_CHUNK_SIZE, INGEST_TARGET_RATE
+from core.formats import UNKNOWN_SIZES
+from core.upload_store import upload_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+class PCMBuffer:
+    """
+    Growable PCM buffer that hands out a memoryview instead of copying.
+    Sized up front when the decoder knows the output length, so a complete
+    decode normally fills one allocation.
+    """
+
+    def __init__(self, capacity: int = 0):
+        self._buffer = bytearray(capacity)
+        self.length = 0
+
+    @property
+    def capacity(self) -> int:
+        return len(self._buffer)
+
+    def reserve(self, capacity: int) -> None:
+        if capacity > len(self._buffer):
+            self._buffer.extend(bytes(capacity - len(self._buffer)))
+
+    def write(self, data) -> None:
+        end = self.length + len(data)
+        if end > len(self._buffer):
+            # Geometric growth keeps appends amortised O(1) when the size was unknown
+            self.reserve(max(end, len(self._buffer) * 3 // 2))
+        self._buffer[self.length : end] = data
+        self.length = end
+
+    def view(self) -> memoryview:
+        return memoryview(self._buffer)[: self.length]
+
+
+class WavStreamDecoder:
+    """
+    Incremental RIFF/WAVE decoder.
+    Bytes can be fed in arbitrary chunks; samples are downmixed to mono 16-bit and
+    downsampled to target_rate as they arrive and written straight into one PCMBuffer.
+    """
+
+    def __init__(self, target_rate: int = INGEST_TARGET_RATE):
+        self.target_rate = target_rate
+        self.buffer = PCMBuffer()
+        self.channels = 0
+        self.sample_rate = 0
+        self.sample_width = 0
+        self.format_tag = 0
+        self.output_rate = 0
+        self.expected_bytes: Optional[int] = None
+
+        self._header = bytearray()
+        self._parsed_riff = False
+        self._in_data = False
+        self._data_remaining: Optional[int] = None
+        self._skip = 0
+        self._carry = b""
+        self._ratecv_state = None
+
+    @property
+    def block_align(self) -> int:
+        return self.channels * self.sample_width
+
+    def feed(self, chunk) -> None:
+        if self._in_data:
+            self._feed_data(chunk)
+            return
+        self._header.extend(chunk)
+        self._parse_header()
+
+    def finish(self) -> sr.AudioData:
+        if not self._in_data:
+            raise ValueError(
+                "Failed to process audio file: no audio data found in WAV upload"
+            )
+        if self.buffer.length == 0:
+            raise ValueError(
+                "Failed to process audio file: WAV upload contains no samples"
+            )
+        return sr.AudioData(self.buffer.view(), self.output_rate, 2)
+
+    def _parse_header(self) -> None:
+        header = self._header
+        if not self._parsed_riff:
+            if len(header) < 12:
+                return
+            if header[0:4] != b"RIFF" or header[8:12] != b"WAVE":
+                raise ValueError("Failed to process audio file: not a RIFF/WAVE file")
+            del header[:12]
+            self._parsed_riff = True
+
+        while True:
+            if self._skip:
+                skipped = min(self._skip, len(header))
+                del header[:skipped]
+                self._skip -= skipped
+                if self._skip:
+                    return
+            if len(header) < 8:
+                return
+            chunk_id = bytes(header[0:4])
+            chunk_size = struct.unpack("<I", header[4:8])[0]
+
+            if chunk_id == b"data":
+                if not self.sample_rate:
+                    raise ValueError(
+                        "Failed to process audio file: WAV data chunk before fmt chunk"
+                    )
+                del header[:8]
+                self._start_data(chunk_size)
+                rest = bytes(header)
+                self._header = bytearray()
+                if rest:
+                    self._feed_data(rest)
+                return
+
+            padded = chunk_size + (chunk_size & 1)
+            if chunk_id == b"fmt ":
+                if len(header) < 8 + padded:
+                    return
+                self._parse_fmt(bytes(header[8 : 8 + chunk_size]))
+                del header[: 8 + padded]
+            else:
+                # LIST, fact, cue and friends carry nothing needed for recognition
+                del header[:8]
+                self._skip = padded
+
+    def _parse_fmt(self, fmt: bytes) -> None:
+        if len(fmt) < 16:
+            raise ValueError("Failed to process audio file: truncated WAV fmt chunk")
+        format_tag, channels, sample_rate, _, _, bits = struct.unpack(
+            "<HHIIHH", fmt[:16]
+        )
+        if format_tag == WAVE_FORMAT_EXTENSIBLE and len(fmt) >= 26:
+            # The real format is the first two bytes of the sub-format GUID
+            format_tag = struct.unpack("<H", fmt[24:26])[0]
+        if format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT):
+            raise ValueError(
+                f"Failed to process audio file: unsupported WAV encoding 0x{format_tag:04x}"
+            )
+        if format_tag == WAVE_FORMAT_IEEE_FLOAT and bits != 32:
+            raise ValueError(
+                "Failed to process audio file: only 32-bit float WAV is supported"
+            )
+        if channels < 1 or sample_rate < 1 or bits not in (8, 16, 24, 32):
+            raise ValueError("Failed to process audio file: invalid WAV format")
+        self.format_tag = format_tag
+        self.channels = channels
+        self.sample_rate = sample_rate
+        self.sample_width = bits // 8
+        # Never upsample; backends accept anything from 8 kHz up
+        self.output_rate = min(sample_rate, self.target_rate)
+
+    def _start_data(self, data_size: int) -> None:
+        self._in_data = True
+        if data_size in UNKNOWN_SIZES:
+            return
+        self._data_remaining = data_size
+        frames = data_size // self.block_align
+        output_frames = -(-frames * self.output_rate // self.sample_rate)
+        # A little slack for the resampler's rounding at chunk boundaries
+        self.expected_bytes = (output_frames + 16) * 2
+        self.buffer.reserve(self.expected_bytes)
+
+    def _feed_data(self, chunk) -> None:
+        if self._data_remaining is not None:
+            if self._data_remaining <= 0:
+                return
+            chunk = chunk[: self._data_remaining]
+            self._data_remaining -= len(chunk)
+
+        if self._carry:
+            chunk = self._carry + bytes(chunk)
+        usable = len(chunk) - len(chunk) % self.block_align
+        self._carry = bytes(chunk[usable:])
+        if usable:
+            self.buffer.write(self._convert(memoryview(chunk)[:usable]))
+
+    def _convert(self, data) -> bytes:
+        """Downmix, convert to signed 16-bit and resample one block-aligned piece"""
+        width = self.sample_width
+        if self.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+            samples = (
+                np.frombuffer(data, dtype="<f4").reshape(-1, self.channels).mean(axis=1)
+            )
+            data = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2").tobytes()
+            width = 2
+        else:
+            if width == 1:
+                # 8-bit WAV is unsigned
+                data = audioop.bias(data, 1, -128)
+            if self.channels == 2:
+                data = audioop.tomono(data, width, 0.5, 0.5)
+            elif self.channels > 2:
+                data = self._downmix(data, width)
+            if width != 2:
+                data = audioop.lin2lin(data, width, 2)
+
+        if self.output_rate != self.sample_rate:
+            data, self._ratecv_state = audioop.ratecv(
+                data, 2, 1, self.sample_rate, self.output_rate, self._ratecv_state
+            )
+        return data
+
+    def _downmix(self, data, width: int) -> bytes:
+        # audioop only knows stereo, so average wider layouts with numpy at 32 bits
+        wide = np.frombuffer(audioop.lin2lin(data, width, 4), dtype="<i4")
+        mono = wide.reshape(-1, self.channels).astype(np.int64).mean(axis=1)
+        return audioop.lin2lin(mono.astype("<i4").tobytes(), 4, width)
+
+
+class DecodedUpload:
+    """Decoded PCM of an upload plus the bookkeeping the route needs"""
+
+    def __init__(
+        self, audio_data: sr.AudioData, digest: str, reserved: int, source_bytes: int
+    ):
+        self.audio_data = audio_data
+        self.digest = digest
+        self.reserved = reserved
+        self.source_bytes = source_bytes
+
+    def release(self) -> None:
+        """Give the PCM's share of the upload memory budget back"""
+        upload_store.unreserve(self.reserved)
+        self.reserved = 0
+
+
+async def ingest_wav_upload(
+    upload_file: UploadFile, chunk_size: int = INGEST_CHUNK_SIZE
+) -> DecodedUpload:
+    """
+    Stream a WAV upload straight into decoded PCM without keeping the file bytes.
+    The content hash is computed on the way through for the result cache, and the
+    PCM size is reserved against the upload store's memory budget.
+    """
+    decoder = WavStreamDecoder()
+    digest = hashlib.sha256()
+    reserved = 0
+    source_bytes = 0
+    try:
+        while True:
+            chunk = await upload_file.read(chunk_size)
+            if not chunk:
+                break
+            source_bytes += len(chunk)
+            digest.update(chunk)
+            decoder.feed(chunk)
+            if not reserved and decoder.expected_bytes:
+                size = decoder.expected_bytes
+                await upload_store.reserve(size)
+                # Only once held: a rejected or cancelled reserve must not give back others' bytes
+                reserved = size
+        audio_data = decoder.finish()
+        if not reserved:
+            # Streamed WAVs without a length are only accounted once fully decoded
+            size = decoder.buffer.length
+            await upload_store.reserve(size)
+            reserved = size
+    except BaseException:
+        upload_store.unreserve(reserved)
+        raise
+    finally:
+        try:
+            upload_file.file.close()
+        except Exception as e:
+            logger.warning(f"Error closing upload file: {str(e)}")
+
+    logger.info(
+        f"Decoded {source_bytes} byte WAV upload into {decoder.buffer.length} bytes "
+        f"of {decoder.output_rate} Hz mono PCM"
+    )
+    return DecodedUpload(audio_data, digest.hexdigest(), reserved, source_bytes)
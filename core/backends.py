@@ -0,0 +1,507 @@
+import collections
+import logging
+import math
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, List, Optional
+
+import speech_recognition as sr
+
+from config.settings import (
+    RECOGNITION_BACKENDS,
+    RECOGNITION_BREAKER_COOLDOWN,
+    RECOGNITION_BREAKER_FAILURES,
+    RECOGNITION_ERROR_RATE_WINDOW,
+    RECOGNITION_HEDGE_DELAY,
+    RECOGNITION_HEDGE_MIN_SAMPLES,
+    RECOGNITION_HEDGING,
+    RECOGNITION_MAX_ERROR_RATE,
+    RECOGNITION_STATS_WINDOW,
+    RECOGNITION_WORKERS,
+    SEGMENT_CONCURRENCY,
+    STUB_BACKEND_CPU,
+    STUB_BACKEND_LATENCY,
+    STUB_BACKEND_TEXT,
+)
+from core.metrics import BACKEND_FAILURES, BACKEND_SECONDS, BACKEND_WINS, bind, record
+from core.sphinx_decoder import get_sphinx_pool
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Fewer recent calls than this are too few to call a backend unhealthy
+MIN_ERROR_RATE_SAMPLES = 5
+
+# Every in-flight transcription may run its primary and a hedge at the same time
+_backend_executor = ThreadPoolExecutor(
+    max_workers=2 * SEGMENT_CONCURRENCY * RECOGNITION_WORKERS,
+    thread_name_prefix="backend",
+)
+
+
+class RecognitionBackend:
+    """
+    Common interface of the speech-to-text services.
+    recognize returns a dict with text, confidence and language. None or
+    sr.UnknownValueError mean the service answered but understood nothing;
+    sr.RequestError (or any other exception) means the service itself failed.
+    """
+
+    name = "base"
+    service_name = "Base"
+
+    def recognize(
+        self,
+        audio_data: sr.AudioData,
+        languages: Optional[List[str]] = None,
+        fallback_languages: Optional[List[str]] = None,
+    ) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+
+class GoogleBackend(RecognitionBackend):
+    """Google Web Speech API, with the recognizer's language fan-out"""
+
+    name = "google"
+    service_name = "Google Speech Recognition"
+
+    def __init__(self, speech_recognizer):
+        self.speech_recognizer = speech_recognizer
+
+    def recognize(self, audio_data, languages=None, fallback_languages=None):
+        return self.speech_recognizer.try_google_recognition(
+            audio_data, languages=languages, fallback_languages=fallback_languages
+        )
+
+
+class SphinxBackend(RecognitionBackend):
+    """Offline CMU Sphinx with preloaded decoders"""
+
+    name = "sphinx"
+    service_name = "Sphinx (Offline)"
+
+    def recognize(self, audio_data, languages=None, fallback_languages=None):
+        result = get_sphinx_pool().recognize(audio_data, languages)
+        return {
+            "text": result["text"],
+            "confidence": 0.6,  # Default confidence for Sphinx
+            "language": result["language"],
+        }
+
+
+class StubBackend(RecognitionBackend):
+    """
+    Local stand-in for a network service, for tests and load tests.
+    Answers every request with a fixed transcript after a fixed delay, or raises error.
+    cpu_seconds of busy work per request stand in for a CPU-bound offline backend.
+    """
+
+    name = "stub"
+    service_name = "Stub"
+
+    def __init__(
+        self,
+        text: str = STUB_BACKEND_TEXT,
+        latency: float = STUB_BACKEND_LATENCY,
+        confidence: float = 0.9,
+        error: Optional[Exception] = None,
+        cpu_seconds: float = STUB_BACKEND_CPU,
+    ):
+        self.text = text
+        self.latency = latency
+        self.cpu_seconds = cpu_seconds
+        self.confidence = confidence
+        self.error = error
+
+    def recognize(self, audio_data, languages=None, fallback_languages=None):
+        if self.latency:
+            time.sleep(self.latency)
+        if self.cpu_seconds:
+            # Pure Python, so it holds the GIL the way a CPU-bound decoder would
+            deadline = time.thread_time() + self.cpu_seconds
+            while time.thread_time() < deadline:
+                pass
+        if self.error is not None:
+            raise self.error
+        return {
+            "text": self.text,
+            "confidence": self.confidence,
+            "language": (languages or [None])[0],
+        }
+
+
+class BackendStats:
+    """Latency and outcome of a backend's recent calls"""
+
+    def __init__(
+        self,
+        window: int = RECOGNITION_STATS_WINDOW,
+        error_window: float = RECOGNITION_ERROR_RATE_WINDOW,
+    ):
+        # (finished_at, seconds, failed) per call
+        self._samples = collections.deque(maxlen=window)
+        self.error_window = error_window
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.no_speech = 0
+        self.hedged = 0
+
+    def record(self, seconds: float, failed: bool, understood: bool = True) -> None:
+        with self._lock:
+            self._samples.append((time.monotonic(), seconds, failed))
+            self.calls += 1
+            if failed:
+                self.errors += 1
+            elif not understood:
+                self.no_speech += 1
+
+    def error_rate(self) -> float:
+        """
+        Share of failed calls within the last error_window seconds.
+        Old failures age out, so a demoted backend is preferred again once it has
+        been left alone for a while; too few recent calls count as healthy.
+        """
+        since = time.monotonic() - self.error_window
+        with self._lock:
+            recent = [
+                failed
+                for finished_at, _, failed in self._samples
+                if finished_at >= since
+            ]
+        if len(recent) < MIN_ERROR_RATE_SAMPLES:
+            return 0.0
+        return sum(recent) / len(recent)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        """Latency percentile over answered calls; failures are often fast and would skew it"""
+        with self._lock:
+            latencies = sorted(
+                seconds for _, seconds, failed in self._samples if not failed
+            )
+        if not latencies:
+            return None
+        return latencies[
+            min(len(latencies) - 1, math.ceil(fraction * len(latencies)) - 1)
+        ]
+
+    def hedge_delay(self, min_samples: int = RECOGNITION_HEDGE_MIN_SAMPLES) -> float:
+        """How long to wait for this backend before starting the next one as well"""
+        with self._lock:
+            answered = sum(1 for _, _, failed in self._samples if not failed)
+        if answered < min_samples:
+            return RECOGNITION_HEDGE_DELAY
+        return self.percentile(0.95)
+
+    def __getstate__(self):
+        # Locks cannot be pickled; worker processes collect their own samples
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class CircuitBreaker:
+    """
+    Skips a backend after consecutive service errors.
+    Once open it stays open for cooldown seconds. After that a single trial call
+    is let through (begin), which closes the circuit on success or reopens it on
+    failure; every other caller treats the circuit as open until the trial reports.
+    """
+
+    def __init__(
+        self,
+        failures: int = RECOGNITION_BREAKER_FAILURES,
+        cooldown: float = RECOGNITION_BREAKER_COOLDOWN,
+    ):
+        self.failures = failures
+        self.cooldown = cooldown
+        self._consecutive = 0
+        self._open_until = 0.0
+        # Whether the half-open circuit's one trial call is in flight
+        self._probing = False
+        self._lock = threading.Lock()
+        self.trips = 0
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._consecutive < self.failures:
+                return "closed"
+            return "open" if time.monotonic() < self._open_until else "half_open"
+
+    def allows(self) -> bool:
+        """Whether a call could be let through now, without claiming the trial"""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def begin(self) -> bool:
+        """Claim permission for one call; in the half-open state only one caller gets it"""
+        state = self.state
+        if state == "open":
+            return False
+        if state == "closed":
+            return True
+        with self._lock:
+            if self._probing:
+                return False
+            self._probing = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._consecutive = 0
+            self._probing = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._probing = False
+            self._consecutive += 1
+            if self._consecutive >= self.failures:
+                if self._consecutive == self.failures:
+                    self.trips += 1
+                # A failed trial in the half-open state reopens the circuit
+                self._open_until = time.monotonic() + self.cooldown
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+
+class BackendRegistry:
+    """
+    Recognition backends in configured order of preference, with per-backend
+    statistics and circuit breakers.
+    run() tries the healthiest preferred backend first. If it has not answered
+    after its p95 latency, the next one is started alongside it and whichever
+    answers first wins; a backend that fails hands over immediately.
+    """
+
+    def __init__(
+        self,
+        hedging: bool = RECOGNITION_HEDGING,
+        max_error_rate: float = RECOGNITION_MAX_ERROR_RATE,
+    ):
+        self.hedging = hedging
+        self.max_error_rate = max_error_rate
+        self._backends: List[RecognitionBackend] = []
+        self._stats: Dict[str, BackendStats] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    @classmethod
+    def from_settings(cls, speech_recognizer) -> "BackendRegistry":
+        factories = {
+            GoogleBackend.name: lambda: GoogleBackend(speech_recognizer),
+            SphinxBackend.name: SphinxBackend,
+            StubBackend.name: StubBackend,
+        }
+        registry = cls()
+        for name in RECOGNITION_BACKENDS:
+            if name not in factories:
+                logger.warning(
+                    f"Unknown recognition backend in RECOGNITION_BACKENDS: {name}"
+                )
+                continue
+            registry.register(factories[name]())
+        return registry
+
+    def register(self, backend: RecognitionBackend) -> None:
+        """Add a backend after the ones already registered, replacing one with the same name"""
+        self._backends = [b for b in self._backends if b.name != backend.name] + [
+            backend
+        ]
+        self._stats[backend.name] = BackendStats()
+        self._breakers[backend.name] = CircuitBreaker()
+
+    @property
+    def service_names(self) -> List[str]:
+        return [backend.service_name for backend in self._backends]
+
+    def ordered(self) -> List[RecognitionBackend]:
+        """
+        Backends to try, in order.
+        Open circuits are skipped. Backends whose recent error rate is above
+        max_error_rate go after the healthy ones, the least failing and then the
+        fastest first; healthy ones keep their configured order of preference.
+        """
+        healthy, degraded = [], []
+        for backend in self._backends:
+            if not self._breakers[backend.name].allows():
+                continue
+            if self._stats[backend.name].error_rate() > self.max_error_rate:
+                degraded.append(backend)
+            else:
+                healthy.append(backend)
+
+        def degraded_key(backend):
+            stats = self._stats[backend.name]
+            p95 = stats.percentile(0.95)
+            return stats.error_rate(), p95 if p95 is not None else float("inf")
+
+        return healthy + sorted(degraded, key=degraded_key)
+
+    def run(
+        self,
+        audio_data: sr.AudioData,
+        languages: Optional[List[str]] = None,
+        fallback_languages: Optional[List[str]] = None,
+    ) -> Dict[str, Any]:
+        """Recognise with the backends as described above; raises ValueError if none succeeds"""
+        pending = self.ordered()
+        if not pending:
+            raise ValueError(
+                "All recognition services are unavailable, try again later"
+            )
+
+        running: Dict[Future, RecognitionBackend] = {}
+        last_error = None
+
+        def launch() -> Optional[float]:
+            # A half-open circuit lets one trial call through; concurrent requests skip that backend
+            while pending:
+                backend = pending.pop(0)
+                if self._breakers[backend.name].begin():
+                    break
+                logger.info(
+                    f"Skipping {backend.service_name} while its circuit is being tested"
+                )
+            else:
+                return None
+            logger.info(f"Attempting transcription with {backend.service_name}")
+            future = _backend_executor.submit(
+                bind(self._call), backend, audio_data, languages, fallback_languages
+            )
+            running[future] = backend
+            return time.monotonic() + self._stats[backend.name].hedge_delay()
+
+        hedge_at = launch()
+        if hedge_at is None:
+            raise ValueError(
+                "All recognition services are unavailable, try again later"
+            )
+        while running:
+            timeout = None
+            if self.hedging and pending:
+                timeout = max(0.0, hedge_at - time.monotonic())
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                slow = list(running.values())[-1]
+                self._stats[slow.name].hedged += 1
+                logger.info(
+                    f"{slow.service_name} is slower than usual, starting the next backend alongside it"
+                )
+                hedge_at = launch()
+                continue
+
+            for future in done:
+                backend = running.pop(future)
+                try:
+                    result = future.result()
+                except sr.UnknownValueError:
+                    logger.warning(
+                        f"{backend.service_name} could not understand the audio"
+                    )
+                    last_error = "Speech was not understood"
+                    continue
+                except sr.RequestError as e:
+                    logger.error(f"{backend.service_name} service failed: {str(e)}")
+                    last_error = f"Service error: {str(e)}"
+                    continue
+                except Exception as e:
+                    logger.error(
+                        f"Unexpected error with {backend.service_name}: {str(e)}"
+                    )
+                    last_error = str(e)
+                    continue
+
+                if result:
+                    # Slower backends still running finish in the background and only update stats
+                    logger.info(
+                        f"Successfully transcribed using {backend.service_name}"
+                    )
+                    BACKEND_WINS.inc(backend.name)
+                    return {
+                        "text": result["text"],
+                        "confidence": result.get("confidence", 0.0),
+                        "language": result.get("language"),
+                        "service": backend.service_name,
+                    }
+
+            # Nothing to wait for on a backend that already gave up
+            if pending and len(running) == 0:
+                hedge_at = launch()
+
+        error_msg = (
+            last_error or "Could not recognize speech using any available service"
+        )
+        logger.error(f"All transcription services failed: {error_msg}")
+        raise ValueError(error_msg)
+
+    def _call(
+        self, backend: RecognitionBackend, audio_data, languages, fallback_languages
+    ):
+        """Runs on the backend executor; records every outcome, even of hedges that lost"""
+        started = time.monotonic()
+        try:
+            result = backend.recognize(audio_data, languages, fallback_languages)
+        except sr.UnknownValueError:
+            seconds = self._export(backend, started, "no_speech")
+            self._stats[backend.name].record(seconds, failed=False, understood=False)
+            self._breakers[backend.name].record_success()
+            raise
+        except Exception as e:
+            seconds = self._export(backend, started, "error")
+            BACKEND_FAILURES.inc(
+                backend.name,
+                "service_error" if isinstance(e, sr.RequestError) else "error",
+            )
+            self._stats[backend.name].record(seconds, failed=True)
+            self._breakers[backend.name].record_failure()
+            raise
+        seconds = self._export(backend, started, "ok" if result else "no_speech")
+        self._stats[backend.name].record(seconds, failed=False, understood=bool(result))
+        self._breakers[backend.name].record_success()
+        return result
+
+    @staticmethod
+    def _export(backend: RecognitionBackend, started: float, outcome: str) -> float:
+        """Report one call to /metrics and the request's timings; returns its duration"""
+        seconds = time.monotonic() - started
+        BACKEND_SECONDS.observe(seconds, backend.name, outcome)
+        record(f"backend:{backend.name}", seconds)
+        return seconds
+
+    def stats(self) -> Dict[str, Any]:
+        report = {}
+        for backend in self._backends:
+            stats = self._stats[backend.name]
+            breaker = self._breakers[backend.name]
+            p50, p95 = stats.percentile(0.5), stats.percentile(0.95)
+            report[backend.name] = {
+                "service": backend.service_name,
+                "calls": stats.calls,
+                "errors": stats.errors,
+                "no_speech": stats.no_speech,
+                "error_rate": round(stats.error_rate(), 4),
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "p95_seconds": round(p95, 3) if p95 is not None else None,
+                "hedge_delay_seconds": round(stats.hedge_delay(), 3),
+                "hedged": stats.hedged,
+                "circuit": breaker.state,
+                "circuit_trips": breaker.trips,
+            }
+        return {
+            "hedging": self.hedging,
+            "order": [b.name for b in self.ordered()],
+            "backends": report,
+        }
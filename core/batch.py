@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import posixpath
+import tarfile
+import zipfile
+from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import UploadFile
+from starlette.concurrency import run_in_threadpool
+
+from config.settings import BATCH_MAX_BYTES, BATCH_MAX_FILES
+from core.formats import PROBE_BYTES, probe_format, supported_formats
+from core.upload_store import UploadStore, upload_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Enough leading bytes to see the ustar magic at offset 257 of a tar header
+ARCHIVE_PROBE_BYTES = 512
+# Larger files are hashed on a worker thread; below this the thread hop costs more than the hash
+INLINE_HASH_BYTES = 256 * 1024
+
+
+class BatchTooLargeError(ValueError):
+    """Raised when a batch exceeds its file count or byte budget"""
+
+
+def probe_archive(header: bytes) -> Optional[str]:
+    """Identify a zip or (optionally compressed) tar archive from its leading bytes"""
+    if header[0:4] in (b"PK\x03\x04", b"PK\x05\x06"):
+        return "zip"
+    if header[257:262] == b"ustar":
+        return "tar"
+    # Compressed tars; no supported audio format starts with these
+    if (
+        header[0:2] == b"\x1f\x8b"
+        or header[0:3] == b"BZh"
+        or header[0:6] == b"\xfd7zXZ\x00"
+    ):
+        return "tar"
+    return None
+
+
+def _is_hidden(name: str) -> bool:
+    # Finder metadata and dotfiles packed alongside the clips
+    return name.startswith("__MACOSX/") or posixpath.basename(name).startswith(".")
+
+
+def iter_archive(
+    fileobj: BinaryIO, kind: str, max_bytes: int
+) -> Iterator[Tuple[str, bytes]]:
+    """
+    Regular files of a zip or tar archive as (name, contents).
+    Every member is read with a size cap, so a decompression bomb stops at max_bytes.
+    """
+    remaining = max_bytes
+    try:
+        if kind == "zip":
+            with zipfile.ZipFile(fileobj) as archive:
+                for info in archive.infolist():
+                    if info.is_dir() or _is_hidden(info.filename):
+                        continue
+                    with archive.open(info) as member:
+                        data = member.read(remaining + 1)
+                    remaining = _charge(remaining, len(data))
+                    yield info.filename, data
+        else:
+            with tarfile.open(fileobj=fileobj, mode="r:*") as archive:
+                for info in archive:
+                    if not info.isfile() or _is_hidden(info.name):
+                        continue
+                    member = archive.extractfile(info)
+                    data = member.read(remaining + 1)
+                    remaining = _charge(remaining, len(data))
+                    yield info.name, data
+    except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError) as e:
+        raise ValueError(f"Failed to read {kind} archive: {str(e)}")
+
+
+def _charge(remaining: int, size: int) -> int:
+    if size > remaining:
+        raise BatchTooLargeError("Batch exceeds the maximum upload size")
+    return remaining - size
+
+
+class BatchEntry:
+    """One file of a batch, in upload order"""
+
+    def __init__(
+        self,
+        index: int,
+        filename: str,
+        digest: str,
+        audio_format: Optional[str],
+        duplicate: bool,
+    ):
+        self.index = index
+        self.filename = filename
+        self.digest = digest
+        self.audio_format = audio_format
+        # Same content as an earlier entry, which is the one actually transcribed
+        self.duplicate = duplicate
+
+    @property
+    def supported(self) -> bool:
+        return self.audio_format in supported_formats()
+
+
+class UploadBatch:
+    """
+    Files of one /transcribe/batch request, with archives expanded.
+    Identical payloads are stored once in the upload store and transcribed once;
+    every entry sharing a payload receives its result.
+    """
+
+    def __init__(
+        self,
+        max_files: int = BATCH_MAX_FILES,
+        max_bytes: int = BATCH_MAX_BYTES,
+        store: UploadStore = upload_store,
+    ):
+        self.max_files = max_files
+        self.max_bytes = max_bytes
+        self.store = store
+        self.entries: List[BatchEntry] = []
+        # digest -> upload store key of the payload, until its transcription finishes
+        self.payloads: Dict[str, str] = {}
+        self._seen = set()
+        self._bytes_read = 0
+
+    async def add_upload(self, upload: UploadFile) -> None:
+        """Add an uploaded file, or every member of an uploaded zip/tar archive"""
+        header = await upload.read(ARCHIVE_PROBE_BYTES)
+        await upload.seek(0)
+        kind = probe_archive(header)
+        if kind is None:
+            data = await upload.read(self.max_bytes - self._bytes_read + 1)
+            await self.add(upload.filename or f"file-{len(self.entries)}", data)
+            return
+
+        # Decompression runs off the event loop; the budget caps what it can produce
+        members = await run_in_threadpool(
+            lambda: list(
+                iter_archive(upload.file, kind, self.max_bytes - self._bytes_read)
+            )
+        )
+        logger.info(
+            f"Expanded {kind} archive {upload.filename} into {len(members)} files"
+        )
+        for name, data in members:
+            await self.add(f"{upload.filename}/{name}", data)
+
+    async def add(self, filename: str, data: bytes) -> BatchEntry:
+        if len(self.entries) >= self.max_files:
+            raise BatchTooLargeError(
+                f"Batch exceeds the maximum of {self.max_files} files"
+            )
+        _charge(self.max_bytes - self._bytes_read, len(data))
+        self._bytes_read += len(data)
+
+        if len(data) > INLINE_HASH_BYTES:
+            # Hashing tens of megabytes would hold up every other request on the event loop
+            digest = await run_in_threadpool(lambda: hashlib.sha256(data).hexdigest())
+        else:
+            digest = hashlib.sha256(data).hexdigest()
+        entry = BatchEntry(
+            len(self.entries),
+            filename,
+            digest,
+            probe_format(data[:PROBE_BYTES]),
+            digest in self._seen,
+        )
+        self.entries.append(entry)
+        if entry.supported and not entry.duplicate:
+            # Counted against the store's memory budget like single uploads
+            await self.store.reserve(len(data))
+            self.payloads[digest] = self.store.put_memory(data, len(data))
+        self._seen.add(digest)
+        return entry
+
+    def entries_for(self, digest: str) -> List[BatchEntry]:
+        return [
+            entry
+            for entry in self.entries
+            if entry.digest == digest and entry.supported
+        ]
+
+    def release_payload(self, digest: str) -> None:
+        key = self.payloads.pop(digest, None)
+        if key is not None:
+            self.store.release(key)
+
+    def release(self) -> None:
+        for digest in list(self.payloads):
+            self.release_payload(digest)
@@ -0,0 +1,262 @@
+import aifc
+import audioop
+import contextlib
+import logging
+from pathlib import Path
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+
+import speech_recognition as sr
+
+from config.settings import INGEST_CHUNK_SIZE, INGEST_TARGET_RATE
+from core.audio_ingest import PCMBuffer, WavStreamDecoder
+from core.formats import AudioInfo
+from core.formats import PROBE_BYTES, probe_format  # noqa: F401 (re-exported)
+
+try:
+    import av
+except ImportError:
+    av = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+AudioSource = Union[str, Path, BinaryIO]
+
+
+class UnsupportedAudioFormatError(ValueError):
+    """Raised when no available decoder handles an upload's format"""
+
+    def __init__(self, audio_format: Optional[str]):
+        super().__init__(
+            f"Failed to process audio file: unsupported audio format {audio_format or 'unknown'}"
+        )
+        self.audio_format = audio_format
+
+
+@contextlib.contextmanager
+def _open_source(source: AudioSource) -> Iterator[BinaryIO]:
+    """Open a path, or rewind a file-like object the caller keeps ownership of"""
+    if hasattr(source, "read"):
+        source.seek(0)
+        yield source
+    else:
+        with open(source, "rb") as f:
+            yield f
+
+
+def probe_source(source: AudioSource) -> Optional[str]:
+    with _open_source(source) as f:
+        header = f.read(PROBE_BYTES)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return probe_format(header)
+
+
+def probe_container(
+    source: AudioSource, audio_format: Optional[str] = None
+) -> AudioInfo:
+    """
+    Stream parameters of a compressed file from its container headers, without
+    decoding audio. Raises ValueError for files FFmpeg cannot make sense of.
+    """
+    if av is None:
+        return AudioInfo(audio_format)
+    with _open_source(source) as f:
+        try:
+            with av.open(f, mode="r") as container:
+                if not container.streams.audio:
+                    raise ValueError(
+                        "Failed to process audio file: no audio stream found"
+                    )
+                stream = container.streams.audio[0]
+                if stream.duration is not None and stream.time_base is not None:
+                    duration = float(stream.duration * stream.time_base)
+                elif container.duration is not None:
+                    duration = container.duration / av.time_base
+                else:
+                    duration = None
+                return AudioInfo(
+                    audio_format,
+                    stream.rate or None,
+                    stream.codec_context.channels or None,
+                    duration,
+                )
+        except av.error.FFmpegError as e:
+            raise ValueError(f"Failed to process audio file: {str(e)}")
+
+
+class AudioDecoder:
+    """
+    Decodes one family of formats to mono 16-bit PCM.
+    Output is at target_rate, or at the source rate when that is lower;
+    backends accept anything from 8 kHz up, so audio is never upsampled.
+    """
+
+    name = "base"
+    formats: Tuple[str, ...] = ()
+
+    def is_available(self) -> bool:
+        return True
+
+    def decode(self, source: AudioSource, target_rate: int) -> sr.AudioData:
+        raise NotImplementedError
+
+
+class WavDecoder(AudioDecoder):
+    """Native RIFF/WAVE decoding through the same converter as streamed uploads"""
+
+    name = "wav"
+    formats = ("wav",)
+
+    def decode(self, source: AudioSource, target_rate: int) -> sr.AudioData:
+        decoder = WavStreamDecoder(target_rate)
+        with _open_source(source) as f:
+            for chunk in iter(lambda: f.read(INGEST_CHUNK_SIZE), b""):
+                decoder.feed(chunk)
+        return decoder.finish()
+
+
+class PyAVDecoder(AudioDecoder):
+    """
+    In-process decoding of compressed formats with FFmpeg through PyAV.
+    The resampler downmixes, converts to 16-bit and resamples in a single pass.
+    """
+
+    name = "pyav"
+    formats = ("mp3", "ogg", "opus", "webm", "m4a", "aac", "flac", "aiff")
+
+    def is_available(self) -> bool:
+        return av is not None
+
+    def decode(self, source: AudioSource, target_rate: int) -> sr.AudioData:
+        with _open_source(source) as f:
+            try:
+                with av.open(f, mode="r") as container:
+                    if not container.streams.audio:
+                        raise ValueError(
+                            "Failed to process audio file: no audio stream found"
+                        )
+                    stream = container.streams.audio[0]
+                    output_rate = min(stream.rate or target_rate, target_rate)
+                    buffer = PCMBuffer(self._expected_bytes(stream, output_rate))
+                    resampler = av.AudioResampler(
+                        format="s16", layout="mono", rate=output_rate
+                    )
+                    for frame in container.decode(stream):
+                        self._write(buffer, resampler.resample(frame))
+                    # Drain the samples still held back by the resampler
+                    self._write(buffer, resampler.resample(None))
+            except av.error.FFmpegError as e:
+                raise ValueError(f"Failed to process audio file: {str(e)}")
+
+        if buffer.length == 0:
+            raise ValueError("Failed to process audio file: upload contains no samples")
+        return sr.AudioData(buffer.view(), output_rate, 2)
+
+    @staticmethod
+    def _expected_bytes(stream, output_rate: int) -> int:
+        if stream.duration is None or stream.time_base is None:
+            return 0
+        return (
+            int(stream.duration * stream.time_base * output_rate + output_rate // 10)
+            * 2
+        )
+
+    @staticmethod
+    def _write(buffer: PCMBuffer, frames) -> None:
+        for frame in frames:
+            # Planes can be padded past the last sample
+            buffer.write(memoryview(frame.planes[0])[: frame.samples * 2])
+
+
+class SpeechRecognitionDecoder(AudioDecoder):
+    """
+    Fallback through the speech_recognition readers when PyAV is not installed.
+    AIFF is read in-process; FLAC is converted by the flac command line tool.
+    """
+
+    name = "speech_recognition"
+    formats = ("aiff", "flac")
+
+    def decode(self, source: AudioSource, target_rate: int) -> sr.AudioData:
+        with _open_source(source) as f:
+            if probe_format(f.read(PROBE_BYTES)) == "aiff":
+                f.seek(0)
+                audio_data = self._read_aiff(f)
+            else:
+                f.seek(0)
+                with sr.AudioFile(f) as audio_file:
+                    audio_data = sr.Recognizer().record(audio_file)
+        output_rate = min(audio_data.sample_rate, target_rate)
+        return sr.AudioData(audio_data.get_raw_data(output_rate, 2), output_rate, 2)
+
+    @staticmethod
+    def _read_aiff(f: BinaryIO) -> sr.AudioData:
+        # sr.AudioFile does not rewind file objects after its WAV attempt, so AIFF
+        # from memory never reaches its AIFF reader; read it the same way directly
+        try:
+            reader = aifc.open(f, "rb")
+        except (aifc.Error, EOFError) as e:
+            raise ValueError(f"Failed to process audio file: {str(e)}")
+        with reader:
+            width = reader.getsampwidth()
+            frames = audioop.byteswap(reader.readframes(reader.getnframes()), width)
+            if reader.getnchannels() == 2:
+                frames = audioop.tomono(frames, width, 0.5, 0.5)
+            elif reader.getnchannels() != 1:
+                raise ValueError(
+                    "Failed to process audio file: AIFF must be mono or stereo"
+                )
+            return sr.AudioData(frames, reader.getframerate(), width)
+
+
+class DecoderRegistry:
+    """Decoders in order of preference; the first available one listing a format handles it"""
+
+    def __init__(self, decoders: Optional[List[AudioDecoder]] = None):
+        self._decoders: List[AudioDecoder] = list(decoders or [])
+
+    def register(self, decoder: AudioDecoder, first: bool = False) -> None:
+        if first:
+            self._decoders.insert(0, decoder)
+        else:
+            self._decoders.append(decoder)
+
+    def for_format(self, audio_format: Optional[str]) -> Optional[AudioDecoder]:
+        for decoder in self._decoders:
+            if audio_format in decoder.formats and decoder.is_available():
+                return decoder
+        return None
+
+    def formats(self) -> Tuple[str, ...]:
+        """Every format some available decoder can handle"""
+        seen = []
+        for decoder in self._decoders:
+            if decoder.is_available():
+                seen.extend(f for f in decoder.formats if f not in seen)
+        return tuple(seen)
+
+    def decode(
+        self,
+        source: AudioSource,
+        audio_format: Optional[str] = None,
+        target_rate: int = INGEST_TARGET_RATE,
+    ) -> sr.AudioData:
+        """Decode a path or file-like object, probing its format unless given"""
+        if audio_format is None:
+            audio_format = probe_source(source)
+        decoder = self.for_format(audio_format)
+        if decoder is None:
+            raise UnsupportedAudioFormatError(audio_format)
+        logger.info(f"Decoding {audio_format} audio with the {decoder.name} decoder")
+        return decoder.decode(source, target_rate)
+
+
+decoder_registry = DecoderRegistry(
+    [WavDecoder(), PyAVDecoder(), SpeechRecognitionDecoder()]
+)
+
+if av is None:
+    logger.info(
+        "PyAV is not installed; MP3, OGG, Opus, M4A and AAC uploads are not decodable"
+    )
@@ -1,102 +1,152 @@
 from pathlib import Path
-import shutil
+import asyncio
 import logging
 import os
 import io
-from typing import Union, BinaryIO, Tuple
+import hashlib
+from typing import Union, Optional
 from fastapi import UploadFile
-from config.settings import AUDIO_DIR, SUPPORTED_FORMATS, USE_MEMORY_STORAGE
+from starlette.concurrency import run_in_threadpool
+from config.settings import SUPPORTED_FORMATS, USE_MEMORY_STORAGE
+from core.formats import AudioInfo, probe_format, supported_formats
+from core.spool import reserve_spool, spool_upload
+from core.upload_store import (
+    MEMORY_KEY_PREFIX,
+    SpooledPath,
+    UploadStoreFullError,
+    upload_store,
+)
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+
 class FileHandler:
-    # In-memory storage for Vercel environment
-    memory_files = {}
-    
     @staticmethod
     async def save_upload_file(upload_file: UploadFile) -> Union[Path, str]:
         """
         Save uploaded file either to disk or to memory based on environment
         Returns either a Path object (for disk storage) or a string key (for memory storage)
+        Every call gets a unique reference; release it with cleanup_file() or release_file()
         """
-        file_path = None
-        memory_key = None
-        
         try:
             if USE_MEMORY_STORAGE:
                 # Store in memory for Vercel's read-only filesystem
-                memory_key = f"memory_file_{upload_file.filename}"
-                
                 logger.info(f"Using in-memory storage for: {upload_file.filename}")
-                
-                # Read file content into memory
-                content = await upload_file.read()
-                FileHandler.memory_files[memory_key] = content
-                
+                memory_key = await FileHandler._save_to_memory(upload_file)
                 logger.info(f"File stored in memory with key: {memory_key}")
                 return memory_key
             else:
                 # Standard file system storage for non-Vercel environments
                 try:
-                    # Create directory if it doesn't exist
-                    AUDIO_DIR.mkdir(exist_ok=True)
-                    
-                    # Create file path
-                    file_path = AUDIO_DIR / upload_file.filename
-                    logger.info(f"Saving uploaded file to: {file_path}")
-                    
-                    # Save uploaded file
-                    with file_path.open("wb") as buffer:
-                        shutil.copyfileobj(upload_file.file, buffer)
-                    
-                    if not file_path.exists():
-                        raise IOError("File was not saved successfully")
-                        
-                    logger.info("File saved successfully to disk")
-                    return file_path
+                    return await FileHandler._save_to_spool(upload_file)
+                except UploadStoreFullError:
+                    raise
                 except Exception as e:
-                    logger.error(f"Error saving to disk, falling back to memory: {str(e)}")
-                    
-                    # Fallback to memory if disk storage fails
-                    if file_path and os.path.exists(file_path):
-                        try:
-                            os.remove(file_path)
-                        except:
-                            pass
-                    
-                    # Reset file position and read content
+                    logger.error(
+                        f"Error saving to disk, falling back to memory: {str(e)}"
+                    )
+
+                    # Reset file position and store in memory
                     await upload_file.seek(0)
-                    content = await upload_file.read()
-                    
-                    # Store in memory
-                    memory_key = f"memory_file_{upload_file.filename}"
-                    FileHandler.memory_files[memory_key] = content
-                    logger.info(f"Fallback: File stored in memory with key: {memory_key}")
+                    memory_key = await FileHandler._save_to_memory(upload_file)
+                    logger.info(
+                        f"Fallback: File stored in memory with key: {memory_key}"
+                    )
                     return memory_key
-            
+
+        except UploadStoreFullError:
+            # Backpressure rather than a failure; the route turns it into a 503
+            raise
         except Exception as e:
             logger.error(f"Error saving upload file: {str(e)}", exc_info=True)
-            # Clean up partial file if it exists
-            if file_path and file_path.exists():
-                try:
-                    file_path.unlink()
-                except Exception as cleanup_error:
-                    logger.error(f"Error cleaning up failed upload: {str(cleanup_error)}")
             raise
         finally:
             try:
                 upload_file.file.close()
             except Exception as e:
                 logger.warning(f"Error closing upload file: {str(e)}")
-    
+
     @staticmethod
-    def validate_audio_format(filename: str) -> bool:
-        """Validate if the file format is supported"""
+    async def _save_to_spool(upload_file: UploadFile) -> Path:
+        """
+        Copy an upload to a spool file on a worker thread, so slow disks never block the
+        event loop. Partial files are removed by spool_upload when the copy fails.
+        """
+        size = upload_file.size or 0
+        kind, reserved = await reserve_spool(size)
+        try:
+            path, fd, written = await run_in_threadpool(
+                spool_upload, upload_file.file, upload_file.filename, kind, size
+            )
+        except BaseException:
+            upload_store.unreserve(reserved)
+            raise
+        logger.info(f"Spooled {written} bytes to {kind}: {path}")
+        return upload_store.put_path(path, fd, written if reserved else 0, reserved)
+
+    @staticmethod
+    async def _save_to_memory(upload_file: UploadFile) -> str:
+        """Read an upload into the store, waiting for room in its memory budget"""
+        # Reserve before reading when the size is known so bursts cannot overshoot the budget
+        reserved = upload_file.size or 0
+        if reserved:
+            await upload_store.reserve(reserved)
+        try:
+            content = await upload_file.read()
+            if not reserved:
+                await upload_store.reserve(len(content))
+                # Only once held: a rejected or cancelled reserve must not give back others' bytes
+                reserved = len(content)
+        except BaseException:
+            upload_store.unreserve(reserved)
+            raise
+        return upload_store.put_memory(content, reserved)
+
+    @staticmethod
+    def cleanup_file(file_reference: Union[Path, str]) -> None:
+        """Release a reference from save_upload_file; the upload is freed with the last one"""
+        if file_reference in upload_store:
+            upload_store.release(file_reference)
+        elif (
+            # A spooled upload already freed; its memfd path may name another upload now
+            not isinstance(file_reference, SpooledPath)
+            and isinstance(file_reference, Path)
+            and file_reference.exists()
+        ):
+            os.remove(file_reference)
+
+    @staticmethod
+    async def release_file(file_reference: Union[Path, str]) -> None:
+        """cleanup_file for async callers; spooled files are removed off the event loop"""
+        if isinstance(file_reference, Path):
+            # Shielded so a cancelled request still frees its file
+            await asyncio.shield(
+                run_in_threadpool(FileHandler.cleanup_file, file_reference)
+            )
+        else:
+            FileHandler.cleanup_file(file_reference)
+
+    @staticmethod
+    def validate_audio_format(filename: str, header: Optional[bytes] = None) -> bool:
+        """
+        Validate if the file format is supported
+        With the upload's leading bytes the format is probed from its content, so a
+        misnamed file is judged by what it is and only decodable formats pass
+        """
+        if header is not None:
+            audio_format = probe_format(header)
+            is_valid = audio_format in supported_formats()
+            if not is_valid:
+                logger.warning(
+                    f"Unsupported audio content ({audio_format or 'unknown'}): {filename}"
+                )
+            return is_valid
+
         if not filename:
             logger.warning("Empty filename provided for validation")
             return False
-            
+
         is_valid = filename.lower().endswith(SUPPORTED_FORMATS)
         if not is_valid:
             logger.warning(f"Unsupported audio format: {filename}")
@@ -107,6 +157,34 @@ class FileHandler:
         """
         Retrieve an in-memory file as a file-like object.
         """
-        if memory_key not in FileHandler.memory_files:
-            raise FileNotFoundError(f"Memory file with key {memory_key} not found")
-        return io.BytesIO(FileHandler.memory_files[memory_key])
\ No newline at end of file
+        return io.BytesIO(upload_store.get(memory_key))
+
+    @staticmethod
+    def probe_container(
+        file_reference: Union[Path, str], audio_format: Optional[str] = None
+    ) -> AudioInfo:
+        """Stream parameters of a stored upload from its container headers; ValueError if unreadable"""
+        # Needs PyAV; imported here to keep importing the routes light
+        from core.decoders import probe_container
+
+        if isinstance(file_reference, str) and file_reference.startswith(
+            MEMORY_KEY_PREFIX
+        ):
+            return probe_container(
+                FileHandler.get_memory_file(file_reference), audio_format
+            )
+        return probe_container(file_reference, audio_format)
+
+    @staticmethod
+    def content_digest(file_reference: Union[Path, str]) -> str:
+        """SHA-256 of a stored upload, read in chunks for files on disk"""
+        digest = hashlib.sha256()
+        if isinstance(file_reference, str) and file_reference.startswith(
+            MEMORY_KEY_PREFIX
+        ):
+            digest.update(upload_store.get(file_reference))
+        else:
+            with open(file_reference, "rb") as f:
+                for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(chunk)
+        return digest.hexdigest()
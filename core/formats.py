@@ -0,0 +1,151 @@
+import struct
+from typing import Optional, Tuple
+
+# Enough leading bytes to identify every supported container
+PROBE_BYTES = 64
+# Enough to reach the stream parameters of WAV, AIFF and FLAC headers past the usual metadata
+HEADER_PROBE_BYTES = 4096
+# Streaming writers put 0 or 0xFFFFFFFF in WAV size fields when the length is unknown
+UNKNOWN_SIZES = (0, 0xFFFFFFFF)
+
+# What browsers' MediaRecorder can produce, by the format the upload probes as, in order of preference
+RECORDING_MIME_TYPES = (
+    ("webm", "audio/webm;codecs=opus"),
+    ("opus", "audio/ogg;codecs=opus"),
+    ("m4a", "audio/mp4"),
+)
+
+
+def probe_format(header: bytes) -> Optional[str]:
+    """Identify an audio container from its leading bytes, independent of the filename"""
+    if header[0:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[0:4] == b"FORM" and header[8:12] in (b"AIFF", b"AIFC"):
+        return "aiff"
+    if header[0:4] == b"fLaC":
+        return "flac"
+    if header[0:4] == b"\x1a\x45\xdf\xa3":
+        # EBML, the Matroska container WebM is a profile of; MediaRecorder's Opus output in Chrome
+        return "webm"
+    if header[0:4] == b"OggS":
+        # The first page carries the codec identification header
+        return "opus" if b"OpusHead" in header else "ogg"
+    if header[4:8] == b"ftyp":
+        return "m4a"
+    if header[0:3] == b"ID3" and len(header) >= 10:
+        # ID3v2 tags precede MP3 and sometimes AAC/FLAC streams; the size is syncsafe
+        size = 10 + (
+            (header[6] << 21) | (header[7] << 14) | (header[8] << 7) | header[9]
+        )
+        return probe_format(header[size:]) if len(header) >= size + 4 else "mp3"
+    if len(header) >= 2 and header[0] == 0xFF:
+        if header[1] & 0xF6 == 0xF0:
+            # ADTS sync word with layer 0
+            return "aac"
+        if header[1] & 0xE0 == 0xE0 and header[1] & 0x06:
+            # MPEG audio frame sync with layer I-III
+            return "mp3"
+    return None
+
+
+class AudioInfo:
+    """What an upload's headers say about its audio; None where they do not say"""
+
+    def __init__(
+        self,
+        audio_format: Optional[str],
+        sample_rate: Optional[int] = None,
+        channels: Optional[int] = None,
+        duration: Optional[float] = None,
+    ):
+        self.audio_format = audio_format
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.duration = duration
+
+
+def _chunks(header: bytes, byte_order: str):
+    """(id, size, body offset) of the RIFF/IFF chunks within header"""
+    offset = 12
+    while offset + 8 <= len(header):
+        chunk_id = header[offset : offset + 4]
+        (size,) = struct.unpack(f"{byte_order}I", header[offset + 4 : offset + 8])
+        yield chunk_id, size, offset + 8
+        # Chunks are padded to an even length
+        offset += 8 + size + (size & 1)
+
+
+def _wav_info(header: bytes) -> AudioInfo:
+    info = AudioInfo("wav")
+    byte_rate = 0
+    for chunk_id, size, body in _chunks(header, "<"):
+        if chunk_id == b"fmt " and body + 16 <= len(header):
+            _, channels, rate, byte_rate = struct.unpack(
+                "<HHII", header[body : body + 12]
+            )
+            info.channels, info.sample_rate = channels, rate
+        elif chunk_id == b"data":
+            if byte_rate and size not in UNKNOWN_SIZES:
+                info.duration = size / byte_rate
+            break
+    if info.sample_rate is None and len(header) >= HEADER_PROBE_BYTES:
+        # Metadata longer than the probe; the decoder will find the format chunk
+        return AudioInfo("wav")
+    if not info.sample_rate or not info.channels:
+        raise ValueError("Corrupt WAV header: no valid format chunk")
+    return info
+
+
+def _aiff_info(header: bytes) -> AudioInfo:
+    for chunk_id, _, body in _chunks(header, ">"):
+        if chunk_id == b"COMM" and body + 18 <= len(header):
+            channels, frames, _ = struct.unpack(">hIh", header[body : body + 8])
+            # 80-bit extended precision float
+            exponent = ((header[body + 8] & 0x7F) << 8) | header[body + 9]
+            mantissa = int.from_bytes(header[body + 10 : body + 18], "big")
+            rate = int(mantissa * 2.0 ** (exponent - 16383 - 63))
+            if channels <= 0 or rate <= 0:
+                raise ValueError("Corrupt AIFF header: invalid common chunk")
+            return AudioInfo("aiff", rate, channels, frames / rate)
+    return AudioInfo("aiff")
+
+
+def _flac_info(header: bytes) -> AudioInfo:
+    # STREAMINFO is always the first metadata block
+    if len(header) < 42 or header[4] & 0x7F != 0:
+        raise ValueError("Corrupt FLAC header: no STREAMINFO block")
+    (packed,) = struct.unpack(">Q", header[18:26])
+    rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    if rate == 0:
+        raise ValueError("Corrupt FLAC header: invalid sample rate")
+    return AudioInfo(
+        "flac", rate, channels, total_samples / rate if total_samples else None
+    )
+
+
+def probe_info(header: bytes) -> AudioInfo:
+    """
+    Format and, for WAV, AIFF and FLAC, the stream parameters from an upload's leading
+    bytes. Raises ValueError when the header of one of those is corrupt.
+    """
+    audio_format = probe_format(header[:PROBE_BYTES])
+    if audio_format == "wav":
+        return _wav_info(header)
+    if audio_format == "aiff":
+        return _aiff_info(header)
+    if audio_format == "flac":
+        return _flac_info(header)
+    return AudioInfo(audio_format)
+
+
+def supported_formats() -> Tuple[str, ...]:
+    """
+    Formats some installed decoder can handle.
+    The decoders pull in PyAV, NumPy and speech_recognition, so they are only
+    imported here, on first use, and probing an upload's header stays cheap.
+    """
+    from core.decoders import decoder_registry
+
+    return decoder_registry.formats()
@@ -0,0 +1,284 @@
+import http.client
+import json
+import logging
+import os
+import socket
+import threading
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+import speech_recognition as sr
+
+from config.settings import (
+    GOOGLE_CONNECT_TIMEOUT,
+    GOOGLE_HTTP2,
+    GOOGLE_POOL_SIZE,
+    GOOGLE_READ_TIMEOUT,
+    GOOGLE_SPEECH_KEY,
+    GOOGLE_SPEECH_URL,
+)
+from core.metrics import GOOGLE_REQUESTS
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2
+except ImportError:
+    h2 = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# The service takes 16-bit samples at 8 kHz or more
+MIN_SAMPLE_RATE = 8000
+# Errors of a kept-alive connection the server closed while it sat idle
+STALE_CONNECTION_ERRORS = (ConnectionError, http.client.BadStatusLine)
+
+# (status, reason, body) of one response
+Response = Tuple[int, str, bytes]
+
+
+class GoogleAudio:
+    """
+    One clip as the Web Speech API takes it: FLAC, 16-bit, at least 8 kHz.
+    Encoded once and sent with every language tried.
+    """
+
+    __slots__ = ("body", "content_type")
+
+    def __init__(self, audio_data: sr.AudioData):
+        convert_rate = (
+            None if audio_data.sample_rate >= MIN_SAMPLE_RATE else MIN_SAMPLE_RATE
+        )
+        self.body = audio_data.get_flac_data(convert_rate=convert_rate, convert_width=2)
+        self.content_type = (
+            f"audio/x-flac; rate={convert_rate or audio_data.sample_rate}"
+        )
+
+
+def parse_response(text: str) -> Dict:
+    """
+    The first result in the service's newline-separated JSON, as recognize_google(show_all=True)
+    returns it; raises sr.UnknownValueError when there is none.
+    """
+    for line in text.split("\n"):
+        if not line:
+            continue
+        result = json.loads(line)["result"]
+        if result:
+            if not result[0].get("alternative"):
+                raise sr.UnknownValueError()
+            return result[0]
+    raise sr.UnknownValueError()
+
+
+class ConnectionPool:
+    """
+    Keep-alive HTTP/1.1 connections to one origin.
+    Idle connections are reused most recent first and at most size are kept;
+    connections opened while all of them are busy are closed after their request.
+    A request that finds its reused connection closed by the server is sent again
+    on another one.
+    """
+
+    def __init__(
+        self, url: str, size: int, connect_timeout: float, read_timeout: float
+    ):
+        parts = urlsplit(url)
+        self._connection_class = (
+            http.client.HTTPSConnection
+            if parts.scheme == "https"
+            else http.client.HTTPConnection
+        )
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path or "/"
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self._idle: List[http.client.HTTPConnection] = []
+        self._lock = threading.Lock()
+
+    def _checkout(self) -> Tuple[http.client.HTTPConnection, bool]:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop(), True
+        # The timeout covers connecting and, for https, the TLS handshake
+        return (
+            self._connection_class(self.host, self.port, timeout=self.connect_timeout),
+            False,
+        )
+
+    def _checkin(self, connection: http.client.HTTPConnection) -> None:
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def _send(
+        self,
+        connection: http.client.HTTPConnection,
+        target: str,
+        body: bytes,
+        headers: Dict[str, str],
+    ):
+        if connection.sock is None:
+            connection.connect()
+            GOOGLE_REQUESTS.inc("opened")
+        else:
+            GOOGLE_REQUESTS.inc("reused")
+        connection.sock.settimeout(self.read_timeout)
+        connection.request("POST", target, body=body, headers=headers)
+        return connection.getresponse()
+
+    def post(self, query: str, body: bytes, headers: Dict[str, str]) -> Response:
+        target = f"{self.path}?{query}"
+        while True:
+            connection, reused = self._checkout()
+            try:
+                response = self._send(connection, target, body, headers)
+                data = response.read()
+            except STALE_CONNECTION_ERRORS as e:
+                connection.close()
+                if reused:
+                    logger.debug(
+                        f"Google connection closed while idle, retrying: {str(e)}"
+                    )
+                    continue
+                raise sr.RequestError(f"recognition connection failed: {str(e)}")
+            except socket.timeout:
+                connection.close()
+                raise sr.RequestError("recognition request timed out")
+            except (OSError, http.client.HTTPException) as e:
+                connection.close()
+                raise sr.RequestError(f"recognition connection failed: {str(e)}")
+            except BaseException:
+                connection.close()
+                raise
+            if response.will_close:
+                connection.close()
+            else:
+                self._checkin(connection)
+            return response.status, response.reason, data
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+class Http2Pool:
+    """
+    HTTP/2 connections from httpx, each carrying many concurrent requests.
+    Requests that cannot share a connection (the server only speaks HTTP/1.1)
+    fall back to keep-alive connections, at most size of them kept idle.
+    """
+
+    def __init__(
+        self, url: str, size: int, connect_timeout: float, read_timeout: float
+    ):
+        self.url = url
+        self._client = httpx.Client(
+            http2=True,
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=size),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    def post(self, query: str, body: bytes, headers: Dict[str, str]) -> Response:
+        opened = []
+
+        def trace(event: str, info: Dict) -> None:
+            if event == "connection.connect_tcp.complete":
+                opened.append(event)
+
+        try:
+            response = self._client.post(
+                f"{self.url}?{query}",
+                content=body,
+                headers=headers,
+                extensions={"trace": trace},
+            )
+        except httpx.TimeoutException:
+            raise sr.RequestError("recognition request timed out")
+        except httpx.TransportError as e:
+            raise sr.RequestError(f"recognition connection failed: {str(e)}")
+        finally:
+            GOOGLE_REQUESTS.inc("opened" if opened else "reused")
+        return response.status_code, response.reason_phrase, response.content
+
+    def close(self) -> None:
+        self._client.close()
+
+
+class GoogleSpeechClient:
+    """
+    Google Web Speech API client shared by every recognition thread of a process.
+    Requests go over pooled keep-alive connections, multiplexed over HTTP/2 when
+    httpx and h2 are installed, so the TCP and TLS handshakes are paid per
+    connection rather than per language tried. Errors are those of
+    recognize_google: sr.UnknownValueError when the speech was not understood,
+    sr.RequestError when the service could not be reached or refused the request.
+    """
+
+    def __init__(
+        self,
+        url: str = GOOGLE_SPEECH_URL,
+        key: str = GOOGLE_SPEECH_KEY,
+        pool_size: int = GOOGLE_POOL_SIZE,
+        connect_timeout: float = GOOGLE_CONNECT_TIMEOUT,
+        read_timeout: float = GOOGLE_READ_TIMEOUT,
+        http2: bool = GOOGLE_HTTP2,
+    ):
+        self.key = key
+        # Without ALPN, which only TLS offers, HTTP/2 cannot be negotiated
+        self.http2 = (
+            http2
+            and httpx is not None
+            and h2 is not None
+            and urlsplit(url).scheme == "https"
+        )
+        pool_class = Http2Pool if self.http2 else ConnectionPool
+        self.pool = pool_class(url, pool_size, connect_timeout, read_timeout)
+        # Connections must not be shared with a forked child
+        self.pid = os.getpid()
+
+    def recognize(
+        self, audio: GoogleAudio, language: str, profanity_filter: int = 0
+    ) -> Dict:
+        """One round trip; the best result with its alternatives"""
+        query = urlencode(
+            {
+                "client": "chromium",
+                "lang": language,
+                "key": self.key,
+                "pFilter": profanity_filter,
+            }
+        )
+        status, reason, data = self.pool.post(
+            query, audio.body, {"Content-Type": audio.content_type}
+        )
+        if status >= 400:
+            raise sr.RequestError(f"recognition request failed: {reason}")
+        return parse_response(data.decode("utf-8"))
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+_google_client: Optional[GoogleSpeechClient] = None
+_google_client_lock = threading.Lock()
+
+
+def get_google_client() -> GoogleSpeechClient:
+    """The process's shared client; a forked process gets its own"""
+    global _google_client
+    if _google_client is None or _google_client.pid != os.getpid():
+        with _google_client_lock:
+            if _google_client is None or _google_client.pid != os.getpid():
+                _google_client = GoogleSpeechClient()
+    return _google_client
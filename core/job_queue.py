@@ -0,0 +1,443 @@
+import json
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from config.settings import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_MAX_QUEUED,
+    JOB_POLL_INTERVAL,
+    JOB_QUEUE_PATH,
+    JOB_RESULT_TTL,
+    JOB_WORKERS,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Lanes a job can be queued in; higher lanes are always served first
+PRIORITY_LANES = {"high": 2, "normal": 1, "low": 0}
+FINISHED_STATUSES = ("done", "failed", "cancelled")
+
+
+class JobQueueFullError(Exception):
+    """Raised when the queue already holds JOB_MAX_QUEUED waiting jobs"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Job queue is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class JobCancelledError(Exception):
+    """Raised inside a running job once its cancellation has been requested"""
+
+
+class JobQueue:
+    """
+    Persistent queue of transcription jobs in SQLite.
+    Queued jobs keep their audio in the database until a worker finishes them, so
+    they survive restarts. A worker claims a job with a lease it keeps renewing;
+    jobs of a worker that died are claimed again once the lease lapses. Finished
+    jobs keep their result until it expires.
+    """
+
+    def __init__(
+        self,
+        path: str = JOB_QUEUE_PATH,
+        max_queued: int = JOB_MAX_QUEUED,
+        result_ttl: int = JOB_RESULT_TTL,
+        lease_seconds: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.path = path
+        self.max_queued = max_queued
+        self.result_ttl = result_ttl
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        # Identifies this process's claims in the shared database
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        # Set on every submit so idle workers do not wait for their next poll
+        self.wakeup = threading.Event()
+        self._lock = threading.Lock()
+
+        # Autocommit; every statement below is atomic on its own
+        self._db = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, priority INTEGER NOT NULL, "
+            "language TEXT, filename TEXT, digest TEXT, audio BLOB, "
+            "progress REAL NOT NULL DEFAULT 0, result TEXT, error TEXT, "
+            "cancel_requested INTEGER NOT NULL DEFAULT 0, attempts INTEGER NOT NULL DEFAULT 0, "
+            "owner TEXT, lease_until REAL, created_at REAL NOT NULL, started_at REAL, "
+            "finished_at REAL, expires_at REAL)"
+        )
+        self._db.execute(
+            "CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (status, priority DESC, created_at)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_expiry ON jobs (expires_at)")
+        logger.info(f"Job queue stored in {path}")
+
+    def submit(
+        self,
+        audio: bytes,
+        digest: str,
+        language: Optional[str] = None,
+        lane: str = "normal",
+        filename: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        if lane not in PRIORITY_LANES:
+            raise ValueError(f"Unknown priority lane: {lane}")
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            queued = self._db.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status = 'queued'"
+            ).fetchone()[0]
+            if queued >= self.max_queued:
+                raise JobQueueFullError(self._estimate_retry_after(queued))
+            self._db.execute(
+                "INSERT INTO jobs (id, status, priority, language, filename, digest, audio, created_at) "
+                "VALUES (?, 'queued', ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id,
+                    PRIORITY_LANES[lane],
+                    language,
+                    filename,
+                    digest,
+                    audio,
+                    time.time(),
+                ),
+            )
+        self.wakeup.set()
+        return self.get(job_id)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Public view of a job, without its audio; None once unknown or expired"""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT id, status, priority, language, filename, progress, result, error, "
+                "cancel_requested, attempts, created_at, started_at, finished_at, expires_at "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+            if row is None or (row[13] is not None and row[13] <= time.time()):
+                return None
+            job = self._view(row)
+            if job["status"] == "queued":
+                job["queue_position"] = self._db.execute(
+                    "SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND "
+                    "(priority > ? OR (priority = ? AND created_at < ?))",
+                    (row[2], row[2], row[10]),
+                ).fetchone()[0]
+            return job
+
+    def cancel(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a queued job at once, or ask a running one to stop.
+        A running job stops at its next progress report; finished jobs are left alone.
+        """
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = 'cancelled', audio = NULL, finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND status = 'queued'",
+                (now, now + self.result_ttl, job_id),
+            )
+            self._db.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = 'running'",
+                (job_id,),
+            )
+        return self.get(job_id)
+
+    def claim(self) -> Optional[Dict[str, Any]]:
+        """
+        Take the next job for this process: highest lane first, oldest first within it.
+        Running jobs whose lease lapsed are claimed again until they run out of attempts.
+        """
+        now = time.time()
+        with self._lock:
+            self._fail_exhausted(now)
+            while True:
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' "
+                    "OR (status = 'running' AND lease_until < ?) "
+                    "ORDER BY priority DESC, created_at LIMIT 1",
+                    (now,),
+                ).fetchone()
+                if row is None:
+                    return None
+                # Another process may have claimed it in between; only one update wins
+                claimed = self._db.execute(
+                    "UPDATE jobs SET status = 'running', owner = ?, lease_until = ?, attempts = attempts + 1, "
+                    "started_at = ?, progress = 0 WHERE id = ? "
+                    "AND (status = 'queued' OR (status = 'running' AND lease_until < ?))",
+                    (self.owner, now + self.lease_seconds, now, row[0], now),
+                ).rowcount
+                if claimed:
+                    job = self._db.execute(
+                        "SELECT id, language, digest, audio, attempts FROM jobs WHERE id = ?",
+                        (row[0],),
+                    ).fetchone()
+                    if job[4] > 1:
+                        logger.warning(
+                            f"Retrying job {job[0]} after a lapsed lease (attempt {job[4]})"
+                        )
+                    return {
+                        "id": job[0],
+                        "language": job[1],
+                        "digest": job[2],
+                        "audio": job[3],
+                    }
+
+    def renew(self, job_ids: List[str]) -> None:
+        """Extend the leases of jobs this process is still working on"""
+        if not job_ids:
+            return
+        with self._lock:
+            self._db.executemany(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND owner = ? AND status = 'running'",
+                [
+                    (time.time() + self.lease_seconds, job_id, self.owner)
+                    for job_id in job_ids
+                ],
+            )
+
+    def report(self, job_id: str, progress: Optional[float] = None) -> bool:
+        """Record progress between 0 and 1; returns whether cancellation was requested"""
+        with self._lock:
+            if progress is not None:
+                self._db.execute(
+                    "UPDATE jobs SET progress = ? WHERE id = ? AND owner = ?",
+                    (round(min(max(progress, 0.0), 1.0), 4), job_id, self.owner),
+                )
+            row = self._db.execute(
+                "SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            return bool(row and row[0])
+
+    def finish(
+        self,
+        job_id: str,
+        status: str,
+        result: Optional[Dict[str, Any]] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """Store the outcome and drop the audio; the job expires after result_ttl"""
+        if status not in FINISHED_STATUSES:
+            raise ValueError(f"Not a finished status: {status}")
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, audio = NULL, lease_until = NULL, "
+                "progress = CASE WHEN ? = 'done' THEN 1 ELSE progress END, finished_at = ?, expires_at = ? "
+                "WHERE id = ? AND owner = ? AND status = 'running'",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    status,
+                    now,
+                    now + self.result_ttl,
+                    job_id,
+                    self.owner,
+                ),
+            )
+
+    def purge_expired(self) -> int:
+        with self._lock:
+            return self._db.execute(
+                "DELETE FROM jobs WHERE expires_at <= ?", (time.time(),)
+            ).rowcount
+
+    def _fail_exhausted(self, now: float) -> None:
+        # A job that keeps taking its worker down would otherwise be retried forever
+        self._db.execute(
+            "UPDATE jobs SET status = 'failed', error = 'Job was interrupted too many times', audio = NULL, "
+            "finished_at = ?, expires_at = ? WHERE status = 'running' AND lease_until < ? AND attempts >= ?",
+            (now, now + self.result_ttl, now, self.max_attempts),
+        )
+
+    def _estimate_retry_after(self, queued: int) -> int:
+        row = self._db.execute(
+            "SELECT AVG(finished_at - started_at) FROM jobs WHERE status = 'done'"
+        ).fetchone()
+        average = row[0] or 1.0
+        return max(
+            1, int(average * (queued - self.max_queued + 1) / max(1, JOB_WORKERS))
+        )
+
+    @staticmethod
+    def _view(row) -> Dict[str, Any]:
+        lanes = {priority: lane for lane, priority in PRIORITY_LANES.items()}
+        status = row[1]
+        if status == "running" and row[8]:
+            status = "cancelling"
+        job = {
+            "id": row[0],
+            "status": status,
+            "lane": lanes.get(row[2], str(row[2])),
+            "language": row[3],
+            "filename": row[4],
+            "progress": row[5],
+            "attempts": row[9],
+            "created_at": row[10],
+            "started_at": row[11],
+            "finished_at": row[12],
+            "expires_at": row[13],
+        }
+        if row[6] is not None:
+            job["result"] = json.loads(row[6])
+        if row[7] is not None:
+            job["error"] = row[7]
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            counts = dict(
+                self._db.execute(
+                    "SELECT status, COUNT(*) FROM jobs GROUP BY status"
+                ).fetchall()
+            )
+            lanes = {priority: lane for lane, priority in PRIORITY_LANES.items()}
+            queued = {
+                lanes.get(priority, str(priority)): count
+                for priority, count in self._db.execute(
+                    "SELECT priority, COUNT(*) FROM jobs WHERE status = 'queued' GROUP BY priority"
+                ).fetchall()
+            }
+        return {
+            "statuses": counts,
+            "queued_by_lane": queued,
+            "max_queued": self.max_queued,
+        }
+
+
+class JobWorkers:
+    """
+    Threads that take jobs off the queue and run them through handler(job, report).
+    report(progress) records progress and raises JobCancelledError once the job is
+    cancelled; report() without a value only checks. A separate thread renews the
+    leases of the jobs in progress.
+    """
+
+    def __init__(
+        self,
+        queue: JobQueue,
+        handler: Callable[[Dict[str, Any], Callable[..., None]], Dict[str, Any]],
+        workers: int = JOB_WORKERS,
+        poll_interval: float = JOB_POLL_INTERVAL,
+    ):
+        self.queue = queue
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.poll_interval = poll_interval
+        self._threads: List[threading.Thread] = []
+        self._active = set()
+        self._active_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._threads)
+
+    def start(self) -> None:
+        """Start the threads; calling it again while they run does nothing"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            self._threads = [
+                threading.Thread(target=self._work, name=f"job-worker-{n}", daemon=True)
+                for n in range(self.workers)
+            ]
+            self._threads.append(
+                threading.Thread(
+                    target=self._renew_leases, name="job-leases", daemon=True
+                )
+            )
+            for thread in self._threads:
+                thread.start()
+            logger.info(f"Started {self.workers} job workers")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """Stop claiming jobs; jobs still running are claimed again after their lease lapses"""
+        with self._start_lock:
+            self._stopping.set()
+            self.queue.wakeup.set()
+            for thread in self._threads:
+                thread.join(timeout)
+            self._threads = []
+
+    def _work(self) -> None:
+        while not self._stopping.is_set():
+            try:
+                job = self.queue.claim()
+                if job is None:
+                    self.queue.wakeup.wait(self.poll_interval)
+                    self.queue.wakeup.clear()
+                    self.queue.purge_expired()
+                    continue
+            except sqlite3.Error as e:
+                # A locked or broken database must not end the thread; try again later
+                logger.error(f"Could not claim a job: {str(e)}")
+                self._stopping.wait(self.poll_interval)
+                continue
+            self._process(job)
+
+    def _process(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+
+        def report(progress: Optional[float] = None) -> None:
+            if self.queue.report(job_id, progress):
+                raise JobCancelledError(job_id)
+
+        with self._active_lock:
+            self._active.add(job_id)
+        started = time.monotonic()
+        try:
+            result = self.handler(job, report)
+            # Jobs without progress reports only notice a cancellation here
+            report()
+        except JobCancelledError:
+            logger.info(f"Job {job_id} cancelled")
+            self.queue.finish(job_id, "cancelled")
+        except Exception as e:
+            logger.error(f"Job {job_id} failed: {str(e)}")
+            self.queue.finish(job_id, "failed", error=str(e))
+        else:
+            logger.info(f"Job {job_id} finished in {time.monotonic() - started:.2f}s")
+            self.queue.finish(job_id, "done", result=result)
+        finally:
+            with self._active_lock:
+                self._active.discard(job_id)
+
+    def _renew_leases(self) -> None:
+        while not self._stopping.wait(self.queue.lease_seconds / 3):
+            with self._active_lock:
+                job_ids = list(self._active)
+            try:
+                self.queue.renew(job_ids)
+            except sqlite3.Error as e:
+                logger.error(f"Could not renew job leases: {str(e)}")
+
+
+# One queue connection per process; the database itself is shared between processes
+_job_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue() -> JobQueue:
+    global _job_queue
+    with _queue_lock:
+        if _job_queue is None:
+            _job_queue = JobQueue()
+        return _job_queue
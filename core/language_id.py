@@ -0,0 +1,285 @@
+import argparse
+import json
+import logging
+import math
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import speech_recognition as sr
+
+from config.settings import (
+    DEFAULT_LANGUAGE,
+    LANGUAGE_ID_PROFILES_PATH,
+    SUPPORTED_LANGUAGES,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Analysis parameters, all at the 16 kHz mono rate the features are computed on
+ANALYSIS_RATE = 16000
+FRAME_SIZE = 400  # 25 ms
+HOP_SIZE = 160  # 10 ms
+MAX_SPECTRAL_FRAMES = 400  # spectra are only computed on an evenly spaced subset
+# A language profile needs this many training clips before its acoustics are trusted
+MIN_PROFILE_SAMPLES = 5
+
+
+class LanguageProfile:
+    """Running mean/variance of clip features plus how often the language was seen"""
+
+    def __init__(
+        self,
+        count: int = 0,
+        mean: Optional[List[float]] = None,
+        m2: Optional[List[float]] = None,
+    ):
+        self.count = count
+        self.mean = np.asarray(mean, dtype=np.float64) if mean is not None else None
+        self.m2 = np.asarray(m2, dtype=np.float64) if m2 is not None else None
+
+    def update(self, features: np.ndarray) -> None:
+        # Welford's algorithm so profiles can be refined one clip at a time
+        self.count += 1
+        if self.mean is None:
+            self.mean = features.copy()
+            self.m2 = np.zeros_like(features)
+            return
+        delta = features - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (features - self.mean)
+
+    def log_likelihood(self, features: np.ndarray) -> Optional[float]:
+        """Diagonal Gaussian log-likelihood, or None while the profile is too sparse"""
+        if self.mean is None or self.count < MIN_PROFILE_SAMPLES:
+            return None
+        variance = self.m2 / (self.count - 1) + 1e-3
+        return float(
+            -0.5 * np.sum((features - self.mean) ** 2 / variance + np.log(variance))
+        )
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean": self.mean.tolist() if self.mean is not None else None,
+            "m2": self.m2.tolist() if self.m2 is not None else None,
+        }
+
+
+class LanguageIdentifier:
+    """
+    Lightweight offline language ranking.
+    Each clip is summarised as a small vector of prosodic and spectral statistics
+    (energy dynamics, speaking rate, zero crossings, spectral shape). Languages are
+    ranked by a per-language Gaussian profile over those features combined with how
+    many clips the profile was trained on. Profiles are trained offline on labelled
+    clips and loaded from LANGUAGE_ID_PROFILES_PATH; they never learn from the
+    recognizer's own results, so a request's ranking does not depend on earlier ones.
+    Only languages with a trained profile are picked as candidates; the others,
+    which would rank by the prior alone, are left for callers to fall back to.
+    """
+
+    def __init__(
+        self,
+        languages: Optional[List[str]] = None,
+        default_language: str = DEFAULT_LANGUAGE,
+        profiles_path: Optional[str] = LANGUAGE_ID_PROFILES_PATH,
+    ):
+        self.languages = list(languages or SUPPORTED_LANGUAGES)
+        self.default_language = default_language
+        self.profiles_path = Path(profiles_path) if profiles_path else None
+        self.profiles = {lang: LanguageProfile() for lang in self.languages}
+        self._lock = threading.Lock()
+        self._load_profiles()
+
+    def __getstate__(self):
+        # Locks cannot be pickled, which process pools need to ship the recognizer
+        state = self.__dict__.copy()
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _load_profiles(self) -> None:
+        if not self.profiles_path or not self.profiles_path.exists():
+            return
+        try:
+            data = json.loads(self.profiles_path.read_text(encoding="utf-8"))
+            for lang, profile in data.items():
+                if lang in self.profiles:
+                    self.profiles[lang] = LanguageProfile(**profile)
+            logger.info(f"Loaded language profiles from {self.profiles_path}")
+        except Exception as e:
+            logger.warning(f"Could not load language profiles: {str(e)}")
+
+    def save_profiles(self, path: Optional[Path] = None) -> None:
+        path = Path(path) if path else self.profiles_path
+        with self._lock:
+            data = {lang: profile.to_dict() for lang, profile in self.profiles.items()}
+        path.write_text(json.dumps(data), encoding="utf-8")
+        logger.info(f"Saved language profiles to {path}")
+
+    @property
+    def trained_languages(self) -> List[str]:
+        """Languages whose profile has enough clips for its ranking to mean anything"""
+        with self._lock:
+            return [
+                lang
+                for lang in self.languages
+                if self.profiles[lang].count >= MIN_PROFILE_SAMPLES
+            ]
+
+    @staticmethod
+    def extract_features(audio_data: sr.AudioData) -> np.ndarray:
+        """Summarise a clip as a fixed-length feature vector"""
+        raw = audio_data.get_raw_data(convert_rate=ANALYSIS_RATE, convert_width=2)
+        samples = np.frombuffer(raw, dtype="<i2").astype(np.float32) / 32768.0
+        if samples.size < FRAME_SIZE:
+            samples = np.pad(samples, (0, FRAME_SIZE - samples.size))
+
+        frame_count = 1 + (samples.size - FRAME_SIZE) // HOP_SIZE
+        frames = np.lib.stride_tricks.as_strided(
+            samples,
+            shape=(frame_count, FRAME_SIZE),
+            strides=(samples.strides[0] * HOP_SIZE, samples.strides[0]),
+        )
+
+        log_energy = np.log10(np.mean(frames**2, axis=1) + 1e-10)
+        voiced = log_energy > (np.median(log_energy) - 0.5)
+        signs = np.signbit(frames)
+        zcr = np.mean(signs[:, 1:] != signs[:, :-1], axis=1)
+
+        # Speaking rate from peaks of the smoothed energy envelope
+        envelope = np.convolve(log_energy, np.ones(5) / 5, mode="same")
+        peaks = (
+            (envelope[1:-1] > envelope[:-2])
+            & (envelope[1:-1] >= envelope[2:])
+            & voiced[1:-1]
+        )
+        duration = samples.size / ANALYSIS_RATE
+        peak_rate = peaks.sum() / max(duration, 1e-3)
+
+        # Spectral shape on a bounded subset of voiced frames
+        voiced_frames = frames[voiced] if voiced.any() else frames
+        step = max(1, len(voiced_frames) // MAX_SPECTRAL_FRAMES)
+        spectrum = (
+            np.abs(np.fft.rfft(voiced_frames[::step] * np.hanning(FRAME_SIZE), axis=1))
+            + 1e-10
+        )
+        freqs = np.fft.rfftfreq(FRAME_SIZE, 1.0 / ANALYSIS_RATE)
+        power = spectrum.sum(axis=1)
+        centroid = (spectrum @ freqs) / power / 1000.0
+        cumulative = np.cumsum(spectrum, axis=1)
+        rolloff = (
+            freqs[np.argmax(cumulative >= 0.85 * cumulative[:, -1:], axis=1)] / 1000.0
+        )
+        flatness = np.exp(np.mean(np.log(spectrum), axis=1)) / np.mean(spectrum, axis=1)
+
+        return np.array(
+            [
+                log_energy.std(),
+                np.abs(np.diff(log_energy)).mean(),
+                voiced.mean(),
+                peak_rate,
+                zcr.mean(),
+                zcr.std(),
+                centroid.mean(),
+                centroid.std(),
+                rolloff.mean(),
+                flatness.mean(),
+            ],
+            dtype=np.float64,
+        )
+
+    def rank(
+        self, audio_data: sr.AudioData = None, features: Optional[np.ndarray] = None
+    ) -> List[str]:
+        """Return all configured languages, most likely first"""
+        if features is None and audio_data is not None:
+            features = self.extract_features(audio_data)
+
+        with self._lock:
+            total = sum(profile.count for profile in self.profiles.values())
+            scores = {}
+            for position, lang in enumerate(self.languages):
+                profile = self.profiles[lang]
+                # Laplace-smoothed prior with a head start for the default language
+                prior_count = profile.count + (
+                    2.0 if lang == self.default_language else 1.0
+                )
+                score = math.log(prior_count / (total + len(self.languages) + 1))
+                if features is not None:
+                    likelihood = profile.log_likelihood(features)
+                    if likelihood is not None:
+                        score += likelihood
+                scores[lang] = (score, -position)
+
+        return sorted(self.languages, key=lambda lang: scores[lang], reverse=True)
+
+    def candidates(
+        self,
+        audio_data: sr.AudioData = None,
+        k: int = 1,
+        features: Optional[np.ndarray] = None,
+    ) -> Tuple[Optional[List[str]], List[str]]:
+        """
+        The k likeliest languages with a trained profile, and every other language,
+        likeliest first, to fall back to. (None, []) while no profile is trained.
+        """
+        trained = self.trained_languages
+        if not trained:
+            return None, []
+        ranked = self.rank(audio_data, features)
+        first = [lang for lang in ranked if lang in trained][: max(1, k)]
+        return first, [lang for lang in ranked if lang not in first]
+
+    def train(
+        self,
+        language: str,
+        audio_data: sr.AudioData = None,
+        features: Optional[np.ndarray] = None,
+    ) -> None:
+        """Fold a clip known to be in language into its profile"""
+        if language not in self.profiles:
+            raise ValueError(f"Unsupported language: {language}")
+        if features is None:
+            features = self.extract_features(audio_data)
+        with self._lock:
+            self.profiles[language].update(features)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Train language profiles from labelled clips: <clips>/<language>/*.wav, e.g. clips/fr-FR/001.wav"
+    )
+    parser.add_argument(
+        "clips",
+        help="directory with one folder of WAV, AIFF or FLAC clips per language",
+    )
+    parser.add_argument(
+        "--out",
+        required=True,
+        help="profiles JSON to write; point LANGUAGE_ID_PROFILES_PATH at it",
+    )
+    args = parser.parse_args()
+
+    identifier = LanguageIdentifier(profiles_path=None)
+    for folder in sorted(Path(args.clips).iterdir()):
+        if not folder.is_dir():
+            continue
+        for clip in sorted(folder.iterdir()):
+            with sr.AudioFile(str(clip)) as source:
+                identifier.train(folder.name, sr.Recognizer().record(source))
+    identifier.save_profiles(Path(args.out))
+    counts = {lang: profile.count for lang, profile in identifier.profiles.items()}
+    print(
+        json.dumps({"trained": identifier.trained_languages, "clips": counts}, indent=2)
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+import bisect
+import contextvars
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.settings import METRICS_ENABLED
+
+# Upper bounds in seconds, from a cache hit to a long upload on a slow backend
+LATENCY_BUCKETS = (
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+    120.0,
+)
+
+# Timings of the request being served, set only when it asked for them
+current_timings: contextvars.ContextVar = contextvars.ContextVar(
+    "current_timings", default=None
+)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic count per label combination; label values are passed positionally"""
+
+    kind = "counter"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.enabled = enabled
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: Any, amount: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: Any) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_label_text(self.labels, key)} {value:.17g}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram per label combination, as Prometheus expects it"""
+
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+        enabled: bool = True,
+    ):
+        self.name = name
+        self.help_text = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = enabled
+        # Per label combination: [per-bucket counts ending with +Inf, not cumulative], sum, count
+        self._series: Dict[Tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float, *label_values: Any) -> None:
+        if not self.enabled:
+            return
+        index = bisect.bisect_left(self.buckets, seconds)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                    0,
+                ]
+            series[0][index] += 1
+            series[1] += seconds
+            series[2] += 1
+
+    def count(self, *label_values: Any) -> int:
+        with self._lock:
+            series = self._series.get(label_values)
+            return series[2] if series else 0
+
+    def render(self) -> List[str]:
+        with self._lock:
+            snapshot = sorted(
+                (key, (list(s[0]), s[1], s[2])) for key, s in self._series.items()
+            )
+        lines = []
+        for key, (counts, total, count) in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                labels = _label_text(self.labels, key, 'le="' + le + '"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_label_text(self.labels, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_label_text(self.labels, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Instruments of this process, rendered in the Prometheus text exposition format"""
+
+    def __init__(self, enabled: bool = METRICS_ENABLED):
+        self.enabled = enabled
+        self._instruments: List[Any] = []
+
+    def counter(self, name: str, help_text: str, labels: Sequence[str] = ()) -> Counter:
+        instrument = Counter(name, help_text, labels, enabled=self.enabled)
+        self._instruments.append(instrument)
+        return instrument
+
+    def histogram(
+        self, name: str, help_text: str, labels: Sequence[str] = (), **kwargs
+    ) -> Histogram:
+        instrument = Histogram(name, help_text, labels, enabled=self.enabled, **kwargs)
+        self._instruments.append(instrument)
+        return instrument
+
+    def render(self) -> str:
+        lines = []
+        for instrument in self._instruments:
+            lines.append(f"# HELP {instrument.name} {instrument.help_text}")
+            lines.append(f"# TYPE {instrument.name} {instrument.kind}")
+            lines.extend(instrument.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+REQUEST_SECONDS = registry.histogram(
+    "myra_request_seconds",
+    "End-to-end request latency by route",
+    ("method", "route", "status"),
+)
+STAGE_SECONDS = registry.histogram(
+    "myra_stage_seconds", "Time spent in each stage of a transcription", ("stage",)
+)
+BACKEND_SECONDS = registry.histogram(
+    "myra_backend_attempt_seconds",
+    "Duration of each recognition backend call",
+    ("backend", "outcome"),
+)
+LANGUAGE_SECONDS = registry.histogram(
+    "myra_google_language_seconds",
+    "Duration of each Google round trip by language",
+    ("language",),
+)
+BACKEND_WINS = registry.counter(
+    "myra_backend_wins_total", "Transcriptions answered by each backend", ("backend",)
+)
+BACKEND_FAILURES = registry.counter(
+    "myra_backend_failures_total",
+    "Backend calls that failed, by reason",
+    ("backend", "reason"),
+)
+CACHE_LOOKUPS = registry.counter(
+    "myra_result_cache_lookups_total", "Result cache lookups by outcome", ("result",)
+)
+BYTES_PROCESSED = registry.counter(
+    "myra_audio_bytes_total",
+    "Audio bytes received as uploads and produced by decoding",
+    ("kind",),
+)
+ADMISSION_REJECTIONS = registry.counter(
+    "myra_admission_rejections_total",
+    "Uploads answered without running the backends, by reason",
+    ("reason",),
+)
+UPLOAD_CHUNKS = registry.counter(
+    "myra_upload_chunks_total",
+    "Chunks of resumable uploads received, by outcome",
+    ("outcome",),
+)
+GOOGLE_REQUESTS = registry.counter(
+    "myra_google_requests_total",
+    "Google requests by whether they opened a connection or reused one",
+    ("connection",),
+)
+
+
+class Timings:
+    """
+    Stage durations of one request, returned in its response when it asks for them.
+    Stages recorded more than once, such as per-phrase backend calls, are summed.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._stages: Dict[str, List[float]] = {}
+        # Phrases and language fan-out record from several threads at once
+        self._lock = threading.Lock()
+
+    def add(self, stage: str, seconds: float) -> None:
+        with self._lock:
+            entry = self._stages.setdefault(stage, [0.0, 0])
+            entry[0] += seconds
+            entry[1] += 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            stages = {
+                stage: {"seconds": round(seconds, 4), "count": count}
+                for stage, (seconds, count) in self._stages.items()
+            }
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 4),
+            "stages": stages,
+        }
+
+
+class _Span:
+    __slots__ = ("stage", "timings", "started")
+
+    def __init__(self, stage: str, timings: Optional[Timings]):
+        self.stage = stage
+        self.timings = timings
+
+    def __enter__(self) -> "_Span":
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        seconds = time.perf_counter() - self.started
+        STAGE_SECONDS.observe(seconds, self.stage)
+        if self.timings is not None:
+            self.timings.add(self.stage, seconds)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(stage: str):
+    """Context manager timing one stage into STAGE_SECONDS and the request's timings"""
+    timings = current_timings.get()
+    if timings is None and not registry.enabled:
+        # Nothing would read the measurement, so do not take it
+        return _NULL_SPAN
+    return _Span(stage, timings)
+
+
+def record(stage: str, seconds: float) -> None:
+    """Add an already measured duration to the request's timings"""
+    timings = current_timings.get()
+    if timings is not None:
+        timings.add(stage, seconds)
+
+
+def bind(func: Callable) -> Callable:
+    """
+    func wrapped to run in a copy of the caller's context, for handing work to
+    another thread while it keeps recording into the same request's timings.
+    """
+    if current_timings.get() is None:
+        return func
+    return functools.partial(contextvars.copy_context().run, func)
+
+
+class RequestMetricsMiddleware:
+    """ASGI middleware recording REQUEST_SECONDS by route template, so /jobs/{job_id} is one series"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # The router stores the matched route in the scope on the way in
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, scope["method"], path, status[0]
+            )
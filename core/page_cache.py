@@ -0,0 +1,216 @@
+import gzip
+import hashlib
+import logging
+import mimetypes
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Mapping, Optional
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.staticfiles import StaticFiles
+
+from config.settings import (
+    BASE_DIR,
+    PAGE_BROTLI_QUALITY,
+    PAGE_GZIP_LEVEL,
+    STATIC_ASSET_MAX_AGE,
+)
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Local stylesheets and scripts the page links to; these are served under content-hashed names
+ASSET_REFERENCE = re.compile(
+    r'(?P<attr>href|src)="/static/(?P<path>[^"?#]+\.(?:css|js))"'
+)
+# Checked in order of preference against the client's Accept-Encoding
+ENCODINGS = ("br", "gzip")
+DIGEST_LENGTH = 12
+# The page revalidates on every visit (a 304 when unchanged); hashed assets never need to
+PAGE_CACHE_CONTROL = "no-cache"
+ASSET_CACHE_CONTROL = f"public, max-age={STATIC_ASSET_MAX_AGE}, immutable"
+
+
+def _accepted_encodings(header: str) -> Dict[str, float]:
+    """Accept-Encoding as {coding: q}"""
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        accepted[coding] = quality
+    return accepted
+
+
+class CachedAsset:
+    """
+    One file held in memory with its compressed variants, computed once.
+    Every variant has its own strong ETag derived from the content hash; a client
+    revalidating gets a 304 only for the variant it would be sent now, so a copy
+    in another encoding is never taken for it.
+    """
+
+    def __init__(self, body: bytes, media_type: str):
+        self.media_type = media_type
+        self.digest = hashlib.sha256(body).hexdigest()[:DIGEST_LENGTH]
+        self.variants: Dict[str, bytes] = {"identity": body}
+        compressed = gzip.compress(body, compresslevel=PAGE_GZIP_LEVEL, mtime=0)
+        if len(compressed) < len(body):
+            self.variants["gzip"] = compressed
+        if brotli is not None:
+            compressed = brotli.compress(body, quality=PAGE_BROTLI_QUALITY)
+            if len(compressed) < len(body):
+                self.variants["br"] = compressed
+        self.etags = {encoding: self._etag(encoding) for encoding in self.variants}
+
+    def _etag(self, encoding: str) -> str:
+        return (
+            f'"{self.digest}"'
+            if encoding == "identity"
+            else f'"{self.digest}-{encoding}"'
+        )
+
+    def negotiate(self, accept_encoding: str) -> str:
+        """The smallest variant the client accepts, by ENCODINGS preference"""
+        accepted = _accepted_encodings(accept_encoding)
+        for encoding in ENCODINGS:
+            if (
+                encoding in self.variants
+                and accepted.get(encoding, accepted.get("*", 0.0)) > 0
+            ):
+                return encoding
+        return "identity"
+
+    def not_modified(self, if_none_match: str, encoding: str) -> bool:
+        """Whether the client already holds the variant negotiated for it"""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().replace("W/", "", 1) for tag in if_none_match.split(",")}
+        return "*" in tags or self.etags[encoding] in tags
+
+    def response(self, headers: Mapping[str, str], cache_control: str) -> Response:
+        """A 304 when the client's copy is current, else the best encoded variant"""
+        encoding = self.negotiate(headers.get("accept-encoding", ""))
+        response_headers = {
+            "ETag": self.etags[encoding],
+            "Cache-Control": cache_control,
+            "Vary": "Accept-Encoding",
+        }
+        if self.not_modified(headers.get("if-none-match", ""), encoding):
+            return Response(status_code=304, headers=response_headers)
+        if encoding != "identity":
+            response_headers["Content-Encoding"] = encoding
+        return Response(
+            content=self.variants[encoding],
+            media_type=self.media_type,
+            headers=response_headers,
+        )
+
+
+class PageCache:
+    """
+    The UI page and the local assets it links to, loaded on first use.
+    Asset links in the page are rewritten to content-hashed names
+    (/static/css/sst_core.css to /static/css/sst_core.<digest>.css), so browsers
+    can keep the assets for STATIC_ASSET_MAX_AGE and still see every change.
+    """
+
+    def __init__(self, page_path: Path, static_dir: Path):
+        self.page_path = page_path
+        self.static_dir = static_dir
+        self._page: Optional[CachedAsset] = None
+        self._assets: Dict[str, CachedAsset] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        started = time.perf_counter()
+        html = self.page_path.read_text(encoding="utf-8")
+        assets = {}
+
+        def hashed(match: "re.Match") -> str:
+            path = match.group("path")
+            source = self.static_dir / path
+            if not source.is_file():
+                logger.warning(f"Page links to missing asset /static/{path}")
+                return match.group(0)
+            asset = CachedAsset(
+                source.read_bytes(),
+                mimetypes.guess_type(path)[0] or "application/octet-stream",
+            )
+            stem, dot, suffix = path.rpartition(".")
+            hashed_path = f"{stem}.{asset.digest}{dot}{suffix}"
+            assets[hashed_path] = asset
+            return f'{match.group("attr")}="/static/{hashed_path}"'
+
+        html = ASSET_REFERENCE.sub(hashed, html)
+        self._assets = assets
+        self._page = CachedAsset(html.encode("utf-8"), "text/html; charset=utf-8")
+        logger.info(
+            f"Page cache loaded {len(assets) + 1} files in {time.perf_counter() - started:.3f}s "
+            f"(encodings: {', '.join(self._page.variants)})"
+        )
+
+    @property
+    def loaded(self) -> bool:
+        return self._page is not None
+
+    def page(self) -> CachedAsset:
+        if self._page is None:
+            with self._lock:
+                if self._page is None:
+                    self._load()
+        return self._page
+
+    def asset(self, path: str) -> Optional[CachedAsset]:
+        """The asset served at /static/<path>, if path is a content-hashed name"""
+        self.page()
+        return self._assets.get(path)
+
+
+class HashedStaticFiles(StaticFiles):
+    """StaticFiles that answers the page cache's content-hashed names from memory"""
+
+    def __init__(self, *args, page_cache: "PageCache", **kwargs):
+        super().__init__(*args, **kwargs)
+        self.page_cache = page_cache
+
+    async def get_response(self, path: str, scope) -> Response:
+        if not self.page_cache.loaded:
+            await run_in_threadpool(self.page_cache.page)
+        asset = self.page_cache.asset(path.replace("\\", "/"))
+        if asset is not None and scope["method"] in ("GET", "HEAD"):
+            return asset.response(Headers(scope=scope), ASSET_CACHE_CONTROL)
+        return await super().get_response(path, scope)
+
+
+_page_cache: Optional[PageCache] = None
+_page_cache_lock = threading.Lock()
+
+
+def get_page_cache() -> PageCache:
+    global _page_cache
+    if _page_cache is None:
+        with _page_cache_lock:
+            if _page_cache is None:
+                _page_cache = PageCache(
+                    BASE_DIR / "templates" / "sst_core.html", BASE_DIR / "static"
+                )
+    return _page_cache
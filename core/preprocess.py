@@ -0,0 +1,196 @@
+import math
+
+import numpy as np
+import speech_recognition as sr
+
+from config.settings import (
+    INGEST_TARGET_RATE,
+    PREPROCESS_MAX_GAIN,
+    PREPROCESS_NOISE_PERCENTILE,
+    PREPROCESS_NORMALIZE,
+    PREPROCESS_TARGET_PEAK,
+    PREPROCESS_TARGET_RMS,
+    SILENCE_MAX_RMS,
+    SILENCE_MIN_SPEECH_SECONDS,
+)
+from core.segmenter import FRAME_SECONDS
+
+FULL_SCALE = 32768.0
+
+
+def pcm_to_samples(pcm: bytes, sample_width: int = 2, channels: int = 1) -> np.ndarray:
+    """Little-endian signed PCM (8-bit unsigned) as float32 in [-1, 1], shape (frames, channels)"""
+    if sample_width == 1:
+        samples = (np.frombuffer(pcm, dtype=np.uint8).astype(np.float32) - 128) / 128
+    elif sample_width == 3:
+        raw = (
+            np.frombuffer(pcm[: len(pcm) - len(pcm) % 3], dtype=np.uint8)
+            .reshape(-1, 3)
+            .astype(np.int32)
+        )
+        ints = raw[:, 0] | (raw[:, 1] << 8) | (raw[:, 2] << 16)
+        samples = (
+            np.where(ints >= 1 << 23, ints - (1 << 24), ints) / float(1 << 23)
+        ).astype(np.float32)
+    else:
+        dtype = {2: "<i2", 4: "<i4"}[sample_width]
+        samples = np.frombuffer(
+            pcm[: len(pcm) - len(pcm) % sample_width], dtype=dtype
+        ).astype(np.float32)
+        samples /= float(1 << (8 * sample_width - 1))
+    usable = samples.size - samples.size % channels
+    return samples[:usable].reshape(-1, channels)
+
+
+def samples_to_audio_data(samples: np.ndarray, sample_rate: int) -> sr.AudioData:
+    pcm = np.clip(np.rint(samples * FULL_SCALE), -32768, 32767).astype("<i2").tobytes()
+    return sr.AudioData(pcm, sample_rate, 2)
+
+
+def downmix(samples: np.ndarray) -> np.ndarray:
+    """Average (frames, channels) into a mono vector"""
+    channels = samples.shape[1]
+    if channels == 1:
+        return samples[:, 0]
+    # A matrix-vector product is several times faster than mean(axis=1) on short rows
+    return samples @ np.full(channels, 1.0 / channels, dtype=np.float32)
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """
+    Downsample a mono vector by linear interpolation after a moving-average low-pass
+    as wide as the rate ratio, which keeps most aliasing out of the speech band.
+    Like the decoders, audio is never upsampled.
+    """
+    if target_rate >= source_rate or samples.size == 0:
+        return samples
+    ratio = source_rate / target_rate
+    if source_rate % target_rate == 0:
+        # Integer ratios, e.g. 48 kHz to 16 kHz: average each group of samples in one pass
+        factor = source_rate // target_rate
+        usable = samples.size - samples.size % factor
+        return samples[:usable].reshape(-1, factor) @ np.full(
+            factor, 1.0 / factor, dtype=np.float32
+        )
+    width = int(math.ceil(ratio))
+    if 1 < width <= samples.size:
+        samples = np.convolve(
+            samples, np.full(width, 1.0 / width, dtype=np.float32), mode="same"
+        )
+    positions = np.arange(int(samples.size / ratio)) * ratio
+    index = positions.astype(np.int64)
+    fraction = (positions - index).astype(np.float32)
+    following = np.minimum(index + 1, samples.size - 1)
+    return samples[index] * (1 - fraction) + samples[following] * fraction
+
+
+def frame_rms(samples: np.ndarray, sample_rate: int) -> np.ndarray:
+    """RMS of consecutive FRAME_SECONDS frames, the buffers the segmenter compares with its threshold"""
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    usable = samples.size - samples.size % frame
+    if usable:
+        frames = samples[:usable].reshape(-1, frame)
+    else:
+        # Shorter than one frame; measure what there is
+        frames = (
+            samples.reshape(1, -1)
+            if samples.size
+            else np.zeros((1, 1), dtype=np.float32)
+        )
+    return np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+
+
+class PreprocessedAudio:
+    """Audio ready for the backends and what preprocessing measured on the way"""
+
+    def __init__(
+        self,
+        audio_data: sr.AudioData,
+        noise_floor: float,
+        gain: float,
+        dc_offset: float,
+        speech_seconds: float,
+    ):
+        self.audio_data = audio_data
+        # Frame RMS of the background, in 16-bit sample units like audioop.rms
+        self.noise_floor = noise_floor
+        self.gain = gain
+        self.dc_offset = dc_offset
+        # How long the audio is louder than SILENCE_MAX_RMS, measured before any gain
+        self.speech_seconds = speech_seconds
+
+    @property
+    def is_silent(self) -> bool:
+        return self.speech_seconds < SILENCE_MIN_SPEECH_SECONDS
+
+
+class AudioPreprocessor:
+    """
+    Vectorised preparation of decoded audio before recognition.
+    Downmixes, resamples, removes DC offset, measures the noise floor over the
+    whole clip and normalises speech loudness, in a few passes over one array
+    instead of per-buffer loops. No audio is consumed for calibration.
+    """
+
+    def __init__(
+        self,
+        target_rate: int = INGEST_TARGET_RATE,
+        normalize: bool = PREPROCESS_NORMALIZE,
+        target_rms: float = PREPROCESS_TARGET_RMS,
+        target_peak: float = PREPROCESS_TARGET_PEAK,
+        max_gain: float = PREPROCESS_MAX_GAIN,
+        noise_percentile: float = PREPROCESS_NOISE_PERCENTILE,
+    ):
+        self.target_rate = target_rate
+        self.normalize = normalize
+        self.target_rms = target_rms
+        self.target_peak = target_peak
+        self.max_gain = max_gain
+        self.noise_percentile = noise_percentile
+
+    def process(self, audio_data: sr.AudioData) -> PreprocessedAudio:
+        return self.process_pcm(
+            audio_data.frame_data, audio_data.sample_rate, audio_data.sample_width
+        )
+
+    def process_pcm(
+        self, pcm: bytes, sample_rate: int, sample_width: int = 2, channels: int = 1
+    ) -> PreprocessedAudio:
+        """Prepare interleaved PCM of any width and channel count"""
+        samples = downmix(pcm_to_samples(pcm, sample_width, channels))
+        samples = resample(samples, sample_rate, self.target_rate)
+        sample_rate = min(sample_rate, self.target_rate)
+
+        dc_offset = float(samples.mean()) if samples.size else 0.0
+        samples = samples - np.float32(dc_offset)
+
+        energies = frame_rms(samples, sample_rate)
+        speech_seconds = (
+            int(np.count_nonzero(energies > SILENCE_MAX_RMS)) * FRAME_SECONDS
+        )
+        noise_floor = float(np.percentile(energies, self.noise_percentile))
+        gain = self._gain(samples, energies, noise_floor) if self.normalize else 1.0
+        if gain != 1.0:
+            samples *= np.float32(gain)
+
+        return PreprocessedAudio(
+            samples_to_audio_data(samples, sample_rate),
+            noise_floor * gain * FULL_SCALE,
+            gain,
+            dc_offset,
+            speech_seconds,
+        )
+
+    def _gain(
+        self, samples: np.ndarray, energies: np.ndarray, noise_floor: float
+    ) -> float:
+        peak = float(np.max(np.abs(samples))) if samples.size else 0.0
+        if peak == 0.0:
+            return 1.0
+        # Loudness of the speech alone, so long pauses do not inflate the gain
+        active = energies[energies > 2 * noise_floor]
+        if not active.size:
+            active = energies
+        speech_rms = float(np.sqrt(np.mean(np.square(active))))
+        gain = self.target_rms / speech_rms if speech_rms > 0 else self.max_gain
+        return min(gain, self.max_gain, self.target_peak / peak)
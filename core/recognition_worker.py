@@ -0,0 +1,98 @@
+import contextlib
+import io
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Tuple
+
+from config.settings import SPHINX_PRELOAD
+from core.shared_audio import SharedAudio, SharedAudioHandle
+
+# What recognition_job yields: the callable to run on the pool and its arguments
+Job = Tuple[Any, ...]
+
+
+def init_worker() -> None:
+    """
+    Initializer of recognition worker processes: build the recognizer, with its
+    backends, and the Sphinx models when configured, before the first job arrives.
+    """
+    from core.startup import get_speech_recognizer
+
+    get_speech_recognizer()
+    if SPHINX_PRELOAD:
+        from core.sphinx_decoder import preload_sphinx
+
+        preload_sphinx()
+
+
+def transcribe_shared(
+    handle: SharedAudioHandle, language: Optional[str], calibrate: bool = True
+) -> dict:
+    """Transcribe audio another process put in shared memory; runs in a worker process"""
+    import speech_recognition as sr
+
+    from core.startup import get_speech_recognizer
+
+    speech_recognizer = get_speech_recognizer()
+    with handle.open() as view:
+        if handle.sample_rate is None:
+            # An encoded file; the decoder needs a file object
+            return speech_recognizer.transcribe_audio(io.BytesIO(view), language)
+        audio_data = sr.AudioData(view, handle.sample_rate, handle.sample_width)
+        return speech_recognizer.transcribe_audio_data(audio_data, language, calibrate)
+
+
+def transcribe_path(path: str, language: Optional[str]) -> dict:
+    """Transcribe a file on disk; runs in a worker process"""
+    from core.startup import get_speech_recognizer
+
+    return get_speech_recognizer().transcribe_audio(Path(path), language)
+
+
+@contextlib.contextmanager
+def recognition_job(
+    pool,
+    speech_recognizer,
+    audio,
+    language: Optional[str],
+    calibrate: bool = True,
+    progress: Optional[Callable[[float], None]] = None,
+) -> Iterator[Job]:
+    """
+    The job that transcribes audio on pool, as (func, *args) for pool.run or pool.submit.
+    audio is decoded sr.AudioData, a path on disk, an upload store key or a file object.
+    Thread pools get the caller's recognizer and objects as they are. Worker processes
+    get audio held in memory through a shared memory segment, passed by handle rather
+    than pickled, which is unlinked when the job's context exits; progress callbacks
+    cannot cross into them.
+    """
+    if not pool.is_process_pool:
+        if isinstance(audio, (str, Path, io.IOBase)):
+            yield (speech_recognizer.transcribe_audio, audio, language, progress)
+        else:
+            yield (
+                speech_recognizer.transcribe_audio_data,
+                audio,
+                language,
+                calibrate,
+                progress,
+            )
+        return
+
+    if isinstance(audio, Path):
+        yield (transcribe_path, str(audio), language)
+        return
+
+    if isinstance(audio, str):
+        from core.upload_store import upload_store
+
+        shared = SharedAudio(upload_store.get(audio))
+    elif isinstance(audio, io.BytesIO):
+        shared = SharedAudio(audio.getbuffer())
+    elif isinstance(audio, io.IOBase):
+        shared = SharedAudio(audio.read())
+    else:
+        shared = SharedAudio(audio.frame_data, audio.sample_rate, audio.sample_width)
+    try:
+        yield (transcribe_shared, shared.handle, language, calibrate)
+    finally:
+        shared.release()
@@ -0,0 +1,88 @@
+from typing import Any, Dict
+
+import speech_recognition as sr
+
+from config.settings import GOOGLE_LANGUAGE_TIMEOUT
+
+
+class RecognizerConfig:
+    """
+    Read-only recognition settings shared by every request.
+    Per-request calibration returns a new instance instead of changing this one, so
+    concurrent requests never see each other's energy threshold. Attribute names match
+    sr.Recognizer, so either can be handed to EnergySegmenter.from_recognizer.
+    """
+
+    FIELDS = (
+        "energy_threshold",
+        "dynamic_energy_threshold",
+        "dynamic_energy_adjustment_damping",
+        "dynamic_energy_ratio",
+        "pause_threshold",
+        "phrase_threshold",
+        "non_speaking_duration",
+        "operation_timeout",
+    )
+
+    def __init__(
+        self,
+        energy_threshold: float = 300,
+        dynamic_energy_threshold: bool = True,
+        dynamic_energy_adjustment_damping: float = 0.15,
+        dynamic_energy_ratio: float = 1.5,
+        pause_threshold: float = 0.8,
+        phrase_threshold: float = 0.3,
+        non_speaking_duration: float = 0.5,
+        # For sr.Recognizer's own network calls; Google requests go through core.google_client
+        operation_timeout: float = GOOGLE_LANGUAGE_TIMEOUT,
+    ):
+        values = locals()
+        for field in self.FIELDS:
+            object.__setattr__(self, field, values[field])
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(
+            f"RecognizerConfig is read-only; use replace(...) to change {name}"
+        )
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("RecognizerConfig is read-only")
+
+    def __reduce__(self):
+        # Rebuilt from its values, since __setattr__ blocks the default unpickling
+        return (self.__class__, tuple(getattr(self, field) for field in self.FIELDS))
+
+    def __eq__(self, other: Any) -> bool:
+        if not isinstance(other, RecognizerConfig):
+            return NotImplemented
+        return self.as_dict() == other.as_dict()
+
+    def __hash__(self) -> int:
+        return hash(tuple(getattr(self, field) for field in self.FIELDS))
+
+    def __repr__(self) -> str:
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.FIELDS)
+        return f"RecognizerConfig({values})"
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def replace(self, **changes: Any) -> "RecognizerConfig":
+        values = self.as_dict()
+        values.update(changes)
+        return RecognizerConfig(**values)
+
+    def calibrated(self, noise_floor: float) -> "RecognizerConfig":
+        """
+        Copy with the energy threshold set from a clip's measured noise floor, the level
+        sr.Recognizer.adjust_for_ambient_noise converges to on that background.
+        Depends only on the clip, never on earlier requests.
+        """
+        return self.replace(energy_threshold=noise_floor * self.dynamic_energy_ratio)
+
+    def make_recognizer(self) -> sr.Recognizer:
+        """sr.Recognizer with these settings"""
+        recognizer = sr.Recognizer()
+        for field in self.FIELDS:
+            setattr(recognizer, field, getattr(self, field))
+        return recognizer
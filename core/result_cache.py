@@ -0,0 +1,195 @@
+import collections
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from config.settings import (
+    RESULT_CACHE_MAX_BYTES,
+    RESULT_CACHE_MAX_ENTRIES,
+    RESULT_CACHE_SQLITE_PATH,
+    RESULT_CACHE_TTL,
+)
+from core.metrics import CACHE_LOOKUPS
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+class ResultCache:
+    """
+    Transcription results keyed by audio content and recognition configuration.
+    The first tier is an in-process LRU bounded by entry count, serialized size and
+    TTL. An optional SQLite file acts as a second tier that survives restarts and is
+    shared between worker processes on the same host. get and set block on that file;
+    async callers use get_async and set_async, which only touch it on a worker thread.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        max_bytes: int = RESULT_CACHE_MAX_BYTES,
+        ttl: int = RESULT_CACHE_TTL,
+        sqlite_path: Optional[str] = RESULT_CACHE_SQLITE_PATH,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.sqlite_path = sqlite_path
+
+        # key -> (expires_at, serialized result)
+        self._entries: "collections.OrderedDict[str, tuple]" = collections.OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        # Serializes the shared connection; never held together with _lock
+        self._db_lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        if sqlite_path:
+            try:
+                self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS results "
+                    "(key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.commit()
+                logger.info(f"Result cache persisted to {sqlite_path}")
+            except sqlite3.Error as e:
+                logger.warning(
+                    f"Could not open result cache database, using memory only: {str(e)}"
+                )
+                self._db = None
+
+    @staticmethod
+    def make_key(
+        content_digest: str, language: Optional[str], backend_chain: Iterable[str]
+    ) -> str:
+        """Cache key covering everything that can change the transcription"""
+        parts = [content_digest, language or "auto", ",".join(backend_chain)]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self._get_memory(key)
+        if result is None and self._db is not None:
+            result = self._get_disk(key)
+        if result is None:
+            self._miss()
+        return result
+
+    async def get_async(self, key: str) -> Optional[Dict[str, Any]]:
+        """get for the event loop: the LRU inline, the SQLite tier on a worker thread"""
+        result = self._get_memory(key)
+        if result is None and self._db is not None:
+            result = await run_in_threadpool(self._get_disk, key)
+        if result is None:
+            self._miss()
+        return result
+
+    def set(self, key: str, result: Dict[str, Any]) -> None:
+        value, expires_at = self._set_memory(key, result)
+        if self._db is not None:
+            self._set_disk(key, value, expires_at)
+
+    async def set_async(self, key: str, result: Dict[str, Any]) -> None:
+        """set for the event loop: the LRU inline, the SQLite tier on a worker thread"""
+        value, expires_at = self._set_memory(key, result)
+        if self._db is not None:
+            await run_in_threadpool(self._set_disk, key, value, expires_at)
+
+    def _get_memory(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        CACHE_LOOKUPS.inc("hit")
+        return json.loads(value)
+
+    def _get_disk(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            with self._db_lock:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM results WHERE key = ?", (key,)
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not read cached result: {str(e)}")
+            return None
+        if row is None or row[1] <= time.time():
+            return None
+        with self._lock:
+            self.hits += 1
+            self.disk_hits += 1
+            self._store(key, row[0], row[1])
+        CACHE_LOOKUPS.inc("hit")
+        return json.loads(row[0])
+
+    def _miss(self) -> None:
+        with self._lock:
+            self.misses += 1
+        CACHE_LOOKUPS.inc("miss")
+
+    def _set_memory(self, key: str, result: Dict[str, Any]) -> tuple:
+        value = json.dumps(result)
+        expires_at = time.time() + self.ttl
+        with self._lock:
+            self._store(key, value, expires_at)
+        return value, expires_at
+
+    def _set_disk(self, key: str, value: str, expires_at: float) -> None:
+        try:
+            with self._db_lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, value, expires_at) VALUES (?, ?, ?)",
+                    (key, value, expires_at),
+                )
+                self._db.execute(
+                    "DELETE FROM results WHERE expires_at <= ?", (time.time(),)
+                )
+                self._db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Could not persist cached result: {str(e)}")
+
+    def _store(self, key: str, value: str, expires_at: float) -> None:
+        if len(value) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (expires_at, value)
+        self._size += len(value)
+        # Evict least recently used entries until both limits hold again
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        _, value = self._entries.pop(key)
+        self._size -= len(value)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None,
+            }
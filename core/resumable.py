@@ -0,0 +1,289 @@
+import asyncio
+import hashlib
+import logging
+import threading
+import time
+import uuid
+import zlib
+from typing import Any, Dict, Optional
+
+from config.settings import (
+    RESUMABLE_MAX_HELD_BYTES,
+    RESUMABLE_MAX_SESSIONS,
+    RESUMABLE_SESSION_TTL,
+)
+from core.admission import admit_header, check_decoded, reject
+from core.formats import HEADER_PROBE_BYTES, AudioInfo, supported_formats
+from core.metrics import UPLOAD_CHUNKS
+from core.upload_store import UploadStoreFullError, upload_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Upload-Checksum is "<algorithm> <hex digest>" of the chunk
+CHECKSUM_ALGORITHMS = ("crc32", "sha256")
+
+
+class UploadSessionError(Exception):
+    """A request a resumable upload cannot accept, with the HTTP status to answer and the current offset"""
+
+    def __init__(
+        self, detail: str, status_code: int = 400, offset: Optional[int] = None
+    ):
+        super().__init__(detail)
+        self.detail = detail
+        self.status_code = status_code
+        self.offset = offset
+
+
+class TooManySessionsError(Exception):
+    """Raised when RESUMABLE_MAX_SESSIONS uploads are already open"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Too many open uploads, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def verify_checksum(data: bytes, checksum: str) -> None:
+    algorithm, _, expected = checksum.strip().partition(" ")
+    algorithm = algorithm.lower()
+    if algorithm == "crc32":
+        actual = f"{zlib.crc32(data):08x}"
+    elif algorithm == "sha256":
+        actual = hashlib.sha256(data).hexdigest()
+    else:
+        raise UploadSessionError(
+            f"Unsupported checksum algorithm {algorithm or 'none'}; use one of {', '.join(CHECKSUM_ALGORITHMS)}"
+        )
+    if actual != expected.strip().lower():
+        UPLOAD_CHUNKS.inc("checksum")
+        raise UploadSessionError("Chunk checksum mismatch; resend the chunk", 422)
+
+
+class UploadSession:
+    """
+    One file arriving in chunks over any number of requests.
+    Chunks must arrive in order, each at the offset the session has reached, so a
+    client that lost its connection asks for the offset and resends from there.
+    The format is probed and admitted as soon as the header has arrived. WAV is
+    decoded as its chunks come in and only the PCM is kept; other formats are
+    held as received until finalize. Memory is accounted in the upload store.
+    """
+
+    def __init__(self, filename: str, size: int, language: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.size = size
+        self.language = language
+        self.offset = 0
+        self.info: Optional[AudioInfo] = None
+        self.touched = time.monotonic()
+        # Serialises chunks and finalize; a second request waits its turn
+        self.lock = asyncio.Lock()
+        self._digest = hashlib.sha256()
+        self._data = bytearray()
+        self._decoder = None
+        self._reserved = 0
+        self._key: Optional[str] = None
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.size
+
+    @property
+    def digest(self) -> str:
+        return self._digest.hexdigest()
+
+    @property
+    def held(self) -> int:
+        """Bytes of the upload store's budget the session holds"""
+        return self._reserved + (len(self._data) if self._key is not None else 0)
+
+    def growth(self, size: int) -> int:
+        """Bytes a chunk of size bytes is reserved for while it is added"""
+        # Decoded PCM is 16-bit mono at no more than the source rate: at most twice the source bytes
+        return size if self.info is not None and self._decoder is None else 2 * size
+
+    async def append(self, offset: int, data: bytes) -> None:
+        """Add the chunk that starts at offset; must hold self.lock"""
+        if offset != self.offset:
+            UPLOAD_CHUNKS.inc("offset")
+            raise UploadSessionError(
+                f"Upload-Offset {offset} does not match the {self.offset} bytes received",
+                409,
+                self.offset,
+            )
+        if offset + len(data) > self.size:
+            UPLOAD_CHUNKS.inc("too_large")
+            raise UploadSessionError(
+                f"Chunk runs past the declared size of {self.size} bytes",
+                413,
+                self.offset,
+            )
+
+        growth = self.growth(len(data))
+        await upload_store.reserve(growth)
+        self._reserved += growth
+
+        self._digest.update(data)
+        self.offset += len(data)
+        self.touched = time.monotonic()
+        if self._decoder is not None:
+            self._decoder.feed(data)
+        else:
+            self._data.extend(data)
+            if self.info is None and (
+                len(self._data) >= HEADER_PROBE_BYTES or self.complete
+            ):
+                self._admit()
+        self._settle()
+        UPLOAD_CHUNKS.inc("accepted")
+
+    def _admit(self) -> None:
+        """Probe and check the header; WAV switches to decoding as the rest arrives"""
+        self.info = admit_header(bytes(self._data[:HEADER_PROBE_BYTES]))
+        if self.info.audio_format not in supported_formats():
+            raise reject(
+                "format",
+                f"Unsupported file format. Supported formats: {', '.join(supported_formats())}",
+            )
+        if self.info.audio_format == "wav":
+            # Loaded along with the recognizer; imported here to keep importing the routes light
+            from core.audio_ingest import WavStreamDecoder
+
+            self._decoder = WavStreamDecoder()
+            self._decoder.feed(self._data)
+            self._data = bytearray()
+
+    def _settle(self) -> None:
+        """Give back the part of the reservation the chunk did not need"""
+        held = (
+            self._decoder.buffer.capacity
+            if self._decoder is not None
+            else len(self._data)
+        )
+        if held < self._reserved:
+            upload_store.unreserve(self._reserved - held)
+            self._reserved = held
+
+    def audio(self) -> Any:
+        """
+        The complete upload for recognition_job: decoded sr.AudioData for WAV, else
+        an upload store key. The session keeps ownership until release().
+        """
+        if self._decoder is not None:
+            audio_data = self._decoder.finish()
+            if self.info.duration is None:
+                check_decoded(audio_data)
+            return audio_data
+        if self._key is None:
+            # The reservation becomes the stored bytes
+            self._key = upload_store.put_memory(self._data, self._reserved)
+            self._reserved = 0
+        return self._key
+
+    def expires_in(self) -> int:
+        return max(0, int(self.touched + RESUMABLE_SESSION_TTL - time.monotonic()))
+
+    def describe(self) -> Dict:
+        return {
+            "id": self.id,
+            "filename": self.filename,
+            "offset": self.offset,
+            "size": self.size,
+            "expires_in": self.expires_in(),
+        }
+
+    def release(self) -> None:
+        if self._reserved:
+            upload_store.unreserve(self._reserved)
+            self._reserved = 0
+        if self._key is not None:
+            upload_store.release(self._key)
+            self._key = None
+        self._decoder = None
+        self._data = bytearray()
+
+
+class ResumableUploads:
+    """
+    Open upload sessions of this process; idle ones expire after RESUMABLE_SESSION_TTL.
+    Together they hold at most max_held_bytes of the upload store, so uploads that are
+    never finished cannot take the memory ordinary requests need.
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = RESUMABLE_MAX_SESSIONS,
+        ttl: int = RESUMABLE_SESSION_TTL,
+        max_held_bytes: int = RESUMABLE_MAX_HELD_BYTES,
+    ):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_held_bytes = max_held_bytes
+        self._sessions: Dict[str, UploadSession] = {}
+        self._lock = threading.Lock()
+        self.expired = 0
+
+    def create(
+        self, filename: str, size: int, language: Optional[str]
+    ) -> UploadSession:
+        with self._lock:
+            self._expire()
+            if len(self._sessions) >= self.max_sessions:
+                raise TooManySessionsError(min(self.ttl, 60))
+            session = UploadSession(filename, size, language)
+            self._sessions[session.id] = session
+        logger.info(f"Opened resumable upload {session.id} for {size} bytes")
+        return session
+
+    def get(self, upload_id: str) -> Optional[UploadSession]:
+        with self._lock:
+            self._expire()
+            return self._sessions.get(upload_id)
+
+    def check_room(self, session: UploadSession, size: int) -> None:
+        """
+        Raise UploadStoreFullError when a chunk of size bytes would take the open
+        sessions past max_held_bytes. Concurrent chunks of different sessions can
+        overshoot by a chunk each; the upload store's own budget still holds.
+        """
+        growth = session.growth(size)
+        with self._lock:
+            self._expire()
+            held = sum(s.held for s in self._sessions.values())
+        if held + growth > self.max_held_bytes:
+            UPLOAD_CHUNKS.inc("deferred")
+            raise UploadStoreFullError(int(upload_store.wait_seconds) or 1)
+
+    def discard(self, upload_id: str) -> None:
+        with self._lock:
+            session = self._sessions.pop(upload_id, None)
+        if session is not None:
+            session.release()
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for upload_id in [
+            i
+            for i, s in self._sessions.items()
+            if now - s.touched > self.ttl and not s.lock.locked()
+        ]:
+            logger.info(f"Resumable upload {upload_id} expired after {self.ttl}s idle")
+            self._sessions.pop(upload_id).release()
+            self.expired += 1
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "received_bytes": sum(s.offset for s in self._sessions.values()),
+                "held_bytes": sum(s.held for s in self._sessions.values()),
+                "max_held_bytes": self.max_held_bytes,
+                "max_sessions": self.max_sessions,
+                "expired": self.expired,
+            }
+
+
+# One registry per worker process; chunks of an upload must reach the process that holds it
+resumable_uploads = ResumableUploads()
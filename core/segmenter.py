@@ -0,0 +1,264 @@
+import audioop
+import collections
+import logging
+import math
+from typing import List, Optional, Union
+
+import speech_recognition as sr
+
+from config.settings import SEGMENT_MAX_SECONDS
+from core.recognizer_config import RecognizerConfig
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Energy is measured over buffers of this length, like sr.Recognizer.listen does
+FRAME_SECONDS = 0.03
+
+
+class AudioSegment:
+    """A closed stretch of speech with its position in the stream"""
+
+    def __init__(
+        self,
+        index: int,
+        start: float,
+        frame_data: bytes,
+        sample_rate: int,
+        sample_width: int,
+    ):
+        self.index = index
+        self.start = start
+        self.frame_data = frame_data
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    @property
+    def duration(self) -> float:
+        return len(self.frame_data) / (self.sample_rate * self.sample_width)
+
+    @property
+    def end(self) -> float:
+        return self.start + self.duration
+
+    def to_audio_data(self) -> sr.AudioData:
+        return sr.AudioData(self.frame_data, self.sample_rate, self.sample_width)
+
+
+class EnergySegmenter:
+    """
+    Incremental speech segmenter over mono PCM.
+    Uses the same energy / pause rules as sr.Recognizer.listen: a phrase starts when
+    buffer energy rises above energy_threshold and closes after pause_threshold
+    seconds below it. Segments are also cut at max_segment_seconds so that no single
+    one grows past what the backends accept.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        sample_width: int = 2,
+        energy_threshold: float = 300,
+        dynamic_energy_threshold: bool = True,
+        dynamic_energy_adjustment_damping: float = 0.15,
+        dynamic_energy_ratio: float = 1.5,
+        pause_threshold: float = 0.8,
+        phrase_threshold: float = 0.3,
+        non_speaking_duration: float = 0.5,
+        max_segment_seconds: float = SEGMENT_MAX_SECONDS,
+    ):
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.energy_threshold = energy_threshold
+        self.dynamic_energy_threshold = dynamic_energy_threshold
+        self.dynamic_energy_adjustment_damping = dynamic_energy_adjustment_damping
+        self.dynamic_energy_ratio = dynamic_energy_ratio
+        self.pause_threshold = pause_threshold
+        self.phrase_threshold = phrase_threshold
+        self.max_segment_seconds = max_segment_seconds
+
+        self.frame_bytes = max(1, int(sample_rate * FRAME_SECONDS)) * sample_width
+        self.seconds_per_frame = self.frame_bytes / (sample_rate * sample_width)
+        self.pause_frames = int(math.ceil(pause_threshold / self.seconds_per_frame))
+        self.phrase_frames = int(math.ceil(phrase_threshold / self.seconds_per_frame))
+        self.max_frames = int(max_segment_seconds / self.seconds_per_frame)
+
+        # Audio kept from before a phrase starts so its onset is not clipped
+        self._preroll = collections.deque(
+            maxlen=max(
+                1, int(math.ceil(non_speaking_duration / self.seconds_per_frame))
+            )
+        )
+        self._pending = b""
+        self._frames: List[bytes] = []
+        self._speech_frames = 0
+        self._silent_frames = 0
+        self._segment_start = 0.0
+        self._position = 0.0
+        self._next_index = 0
+
+    @classmethod
+    def from_recognizer(
+        cls,
+        recognizer: Union[sr.Recognizer, RecognizerConfig],
+        sample_rate: int,
+        sample_width: int = 2,
+        **kwargs,
+    ):
+        """
+        Build a segmenter that mirrors a recognizer's energy and pause settings.
+        The segmenter adapts its own copy of the threshold, never the recognizer's.
+        """
+        return cls(
+            sample_rate,
+            sample_width=sample_width,
+            energy_threshold=recognizer.energy_threshold,
+            dynamic_energy_threshold=recognizer.dynamic_energy_threshold,
+            dynamic_energy_adjustment_damping=recognizer.dynamic_energy_adjustment_damping,
+            dynamic_energy_ratio=recognizer.dynamic_energy_ratio,
+            pause_threshold=recognizer.pause_threshold,
+            phrase_threshold=recognizer.phrase_threshold,
+            non_speaking_duration=recognizer.non_speaking_duration,
+            **kwargs,
+        )
+
+    @property
+    def in_speech(self) -> bool:
+        return bool(self._frames)
+
+    @property
+    def open_index(self) -> int:
+        """Index the phrase currently being collected will get once it closes"""
+        return self._next_index
+
+    @property
+    def open_duration(self) -> float:
+        """Length in seconds of the phrase currently being collected"""
+        return len(self._frames) * self.seconds_per_frame
+
+    def open_audio(self) -> Optional[sr.AudioData]:
+        """Snapshot of the phrase collected so far, used for partial results"""
+        if not self._frames:
+            return None
+        return sr.AudioData(b"".join(self._frames), self.sample_rate, self.sample_width)
+
+    def feed(self, pcm: bytes) -> List[AudioSegment]:
+        """Consume PCM bytes and return any segments that closed"""
+        closed = []
+        # Only the sub-frame remainder of the previous call is copied; pcm may be a memoryview
+        data = self._pending + bytes(pcm) if self._pending else pcm
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = bytes(data[usable:])
+
+        for offset in range(0, usable, self.frame_bytes):
+            frame = data[offset : offset + self.frame_bytes]
+            segment = self._process_frame(frame)
+            if segment is not None:
+                closed.append(segment)
+        return closed
+
+    def flush(self) -> Optional[AudioSegment]:
+        """Close whatever phrase is open at end of stream"""
+        if self._pending and self._frames:
+            self._frames.append(self._pending)
+        self._pending = b""
+        return self._close() if self._frames else None
+
+    def _process_frame(self, frame: bytes) -> Optional[AudioSegment]:
+        energy = audioop.rms(frame, self.sample_width)
+        is_speech = energy > self.energy_threshold
+        frame_start = self._position
+        self._position += self.seconds_per_frame
+
+        if not self._frames:
+            if not is_speech:
+                self._adjust_threshold(energy)
+                self._preroll.append(frame)
+                return None
+            # Phrase onset: keep the pre-roll so the first syllable is not cut off
+            self._segment_start = (
+                frame_start - len(self._preroll) * self.seconds_per_frame
+            )
+            self._frames.extend(self._preroll)
+            self._preroll.clear()
+            self._speech_frames = 0
+            self._silent_frames = 0
+
+        self._frames.append(frame)
+        if is_speech:
+            self._speech_frames += 1
+            self._silent_frames = 0
+        else:
+            self._silent_frames += 1
+
+        if (
+            self._silent_frames >= self.pause_frames
+            or len(self._frames) >= self.max_frames
+        ):
+            return self._close()
+        return None
+
+    def _close(self) -> Optional[AudioSegment]:
+        frames, speech_frames = self._frames, self._speech_frames
+        self._frames = []
+        self._speech_frames = 0
+        self._silent_frames = 0
+        if speech_frames < self.phrase_frames:
+            # Too little speech to be a phrase, e.g. a click or a cough
+            return None
+        segment = AudioSegment(
+            self._next_index,
+            max(0.0, self._segment_start),
+            b"".join(frames),
+            self.sample_rate,
+            self.sample_width,
+        )
+        self._next_index += 1
+        return segment
+
+    def _adjust_threshold(self, energy: float) -> None:
+        # Same exponential tracking of the noise floor as sr.Recognizer.listen
+        if not self.dynamic_energy_threshold:
+            return
+        damping = self.dynamic_energy_adjustment_damping**self.seconds_per_frame
+        target_energy = energy * self.dynamic_energy_ratio
+        self.energy_threshold = self.energy_threshold * damping + target_energy * (
+            1 - damping
+        )
+
+
+def split_audio_data(
+    audio_data: sr.AudioData,
+    recognizer: Union[sr.Recognizer, RecognizerConfig],
+    max_segment_seconds: float = SEGMENT_MAX_SECONDS,
+) -> List[AudioSegment]:
+    """
+    Cut decoded audio into phrases at silences, none longer than max_segment_seconds.
+    Falls back to fixed windows when no speech rises above the energy threshold,
+    so quiet recordings are still recognised rather than dropped.
+    """
+    segmenter = EnergySegmenter.from_recognizer(
+        recognizer,
+        audio_data.sample_rate,
+        audio_data.sample_width,
+        max_segment_seconds=max_segment_seconds,
+    )
+    segments = segmenter.feed(audio_data.frame_data)
+    last = segmenter.flush()
+    if last is not None:
+        segments.append(last)
+    if segments:
+        return segments
+
+    logger.info("No speech detected by energy segmentation, using fixed windows")
+    window = int(max_segment_seconds * audio_data.sample_rate) * audio_data.sample_width
+    return [
+        AudioSegment(
+            index,
+            offset / (audio_data.sample_rate * audio_data.sample_width),
+            audio_data.frame_data[offset : offset + window],
+            audio_data.sample_rate,
+            audio_data.sample_width,
+        )
+        for index, offset in enumerate(range(0, len(audio_data.frame_data), window))
+    ]
@@ -0,0 +1,114 @@
+import contextlib
+import logging
+import os
+import re
+import uuid
+from multiprocessing import shared_memory
+from typing import Iterator, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Segments are named after the process that owns them, so orphans of a crashed process can be found
+SEGMENT_PREFIX = "myra_"
+SEGMENT_NAME = re.compile(rf"^{SEGMENT_PREFIX}(\d+)_[0-9a-f]+$")
+SHM_DIR = "/dev/shm"
+
+
+class SharedAudioHandle:
+    """
+    Picklable reference to a SharedAudio segment, sent to recognition worker processes
+    in place of the audio itself. sample_rate is set for decoded PCM and None for
+    the bytes of an encoded file.
+    """
+
+    __slots__ = ("name", "length", "sample_rate", "sample_width")
+
+    def __init__(
+        self,
+        name: str,
+        length: int,
+        sample_rate: Optional[int] = None,
+        sample_width: int = 2,
+    ):
+        self.name = name
+        self.length = length
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+
+    @contextlib.contextmanager
+    def open(self) -> Iterator[memoryview]:
+        """Map the segment and yield its contents without copying them"""
+        segment = shared_memory.SharedMemory(name=self.name)
+        view = segment.buf[: self.length]
+        try:
+            yield view
+        finally:
+            try:
+                view.release()
+                segment.close()
+            except BufferError:
+                # Still referenced, e.g. by a traceback; the mapping goes when that does
+                logger.debug(
+                    f"Shared audio {self.name} still in use, leaving it mapped"
+                )
+
+
+class SharedAudio:
+    """
+    One upload's audio copied once into a shared memory segment.
+    The creating process owns the segment and unlinks it with release(), whatever
+    became of the worker that read it. Segments a killed process could not release
+    are removed by sweep_orphaned_segments.
+    """
+
+    def __init__(self, data, sample_rate: Optional[int] = None, sample_width: int = 2):
+        data = memoryview(data).cast("B")
+        name = f"{SEGMENT_PREFIX}{os.getpid()}_{uuid.uuid4().hex[:12]}"
+        # Zero-sized segments are not allowed
+        self._segment = shared_memory.SharedMemory(
+            name=name, create=True, size=max(1, data.nbytes)
+        )
+        self._segment.buf[: data.nbytes] = data
+        self.handle = SharedAudioHandle(name, data.nbytes, sample_rate, sample_width)
+
+    def release(self) -> None:
+        if self._segment is None:
+            return
+        try:
+            self._segment.close()
+            self._segment.unlink()
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Error releasing shared audio {self.handle.name}: {str(e)}")
+        self._segment = None
+
+
+def _process_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def sweep_orphaned_segments(shm_dir: str = SHM_DIR) -> int:
+    """Unlink segments left behind by processes that no longer exist; returns how many"""
+    if not os.path.isdir(shm_dir):
+        return 0
+    removed = 0
+    for entry in os.listdir(shm_dir):
+        match = SEGMENT_NAME.match(entry)
+        if match is None or _process_alive(int(match.group(1))):
+            continue
+        try:
+            os.unlink(os.path.join(shm_dir, entry))
+            removed += 1
+        except OSError as e:
+            logger.warning(f"Could not remove orphaned shared audio {entry}: {str(e)}")
+    if removed:
+        logger.info(f"Removed {removed} orphaned shared audio segments")
+    return removed
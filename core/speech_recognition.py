@@ -1,116 +1,453 @@
 import speech_recognition as sr
 from pathlib import Path
-from typing import Union, Dict
+from typing import Callable, Union, Dict, BinaryIO, List, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 import logging
-from config.settings import SUPPORTED_LANGUAGES, DEFAULT_LANGUAGE
+import time
+from config.settings import (
+    SUPPORTED_LANGUAGES,
+    DEFAULT_LANGUAGE,
+    GOOGLE_LANGUAGE_FANOUT,
+    GOOGLE_FANOUT_CONCURRENCY,
+    GOOGLE_LANGUAGE_TIMEOUT,
+    GOOGLE_EARLY_EXIT_CONFIDENCE,
+    RECOGNITION_WORKERS,
+    LANGUAGE_ID_ENABLED,
+    LANGUAGE_ID_TOP_K,
+    LANGUAGE_ID_ACCEPT_CONFIDENCE,
+    SEGMENT_MAX_SECONDS,
+    SEGMENT_CONCURRENCY,
+)
+from core.backends import BackendRegistry
+from core.decoders import decoder_registry
+from core.google_client import GoogleAudio, get_google_client
+from core.language_id import LanguageIdentifier
+from core.metrics import (
+    ADMISSION_REJECTIONS,
+    BYTES_PROCESSED,
+    LANGUAGE_SECONDS,
+    bind,
+    record,
+    span,
+)
+from core.preprocess import AudioPreprocessor
+from core.recognizer_config import RecognizerConfig
+from core.segmenter import split_audio_data
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Shared by all transcriptions; each one keeps at most GOOGLE_FANOUT_CONCURRENCY requests in it
+_language_executor = ThreadPoolExecutor(
+    max_workers=GOOGLE_FANOUT_CONCURRENCY * RECOGNITION_WORKERS,
+    thread_name_prefix="google-language",
+)
+# Phrases of long uploads are recognised here, separately from the request pool to avoid deadlocks
+_segment_executor = ThreadPoolExecutor(
+    max_workers=SEGMENT_CONCURRENCY * RECOGNITION_WORKERS,
+    thread_name_prefix="segment",
+)
+
+
 class SpeechRecognizer:
-    def __init__(self):
-        self.recognizer = sr.Recognizer()
-        # Adjust recognition parameters for better accuracy
-        self.recognizer.energy_threshold = 300
-        self.recognizer.dynamic_energy_threshold = True
-        self.recognizer.pause_threshold = 0.8
-
-    def transcribe_audio(self, audio_file_path: Union[str, Path]) -> Dict[str, str]:
+    def __init__(self, config: Optional[RecognizerConfig] = None):
+        # Read-only settings; per-request calibration works on copies of it
+        self.config = config or RecognizerConfig()
+        self.preprocessor = AudioPreprocessor()
+        self.language_identifier = LanguageIdentifier() if LANGUAGE_ID_ENABLED else None
+        # Services in order of preference, with latency stats, hedging and circuit breakers
+        self.backends = BackendRegistry.from_settings(self)
+
+    @property
+    def backend_chain(self) -> List[str]:
+        """Services tried by transcribe_audio, in order; part of the result cache key"""
+        return self.backends.service_names
+
+    def transcribe_audio(
+        self,
+        audio_file_path: Union[str, Path, BinaryIO],
+        language: Optional[str] = None,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, str]:
         """
         Transcribe an audio file to text in any language with confidence score.
-        Handles both file paths and in-memory files.
+        Handles file paths, in-memory files and already opened file-like objects.
+        A language hint skips language identification and is the only language tried.
+        progress is called with the finished fraction as the phrases of long audio
+        complete; an exception it raises stops the remaining phrases and propagates.
         """
         try:
-            if isinstance(audio_file_path, str) and audio_file_path.startswith("memory_file_"):
+            if isinstance(audio_file_path, str) and audio_file_path.startswith(
+                "memory_file_"
+            ):
                 # Handle in-memory file
                 from core.file_handler import FileHandler
-                audio_file = FileHandler.get_memory_file(audio_file_path)
-                audio_file.seek(0)
-                source = sr.AudioFile(audio_file)
+
+                source = FileHandler.get_memory_file(audio_file_path)
             else:
-                # Handle file path
-                source = sr.AudioFile(str(audio_file_path))
+                # File path or file-like object, e.g. memory file contents shipped to a worker process
+                source = audio_file_path
 
-            with source as audio_source:
-                logger.info(f"Processing audio file: {audio_file_path}")
-                try:
-                    # Adjust for ambient noise before processing
-                    self.recognizer.adjust_for_ambient_noise(audio_source, duration=0.5)
-                    audio_data = self.recognizer.record(audio_source)
-                except Exception as e:
-                    logger.error(f"Error reading audio file: {str(e)}")
-                    raise ValueError(f"Failed to process audio file: {str(e)}")
+            logger.info(f"Processing audio file: {audio_file_path}")
+            # Probed from the content, decoded in-process and resampled to the target rate
+            with span("decode"):
+                audio_data = decoder_registry.decode(source)
+
+        except Exception as e:
+            logger.error(f"Error processing {audio_file_path}: {str(e)}", exc_info=True)
+            raise
 
-                # Try multiple recognition services in order of reliability
-                services = [
-                    (self.try_google_recognition, "Google Speech Recognition"),
-                    (self.try_sphinx_recognition, "Sphinx (Offline)"),
-                ]
+        # Adjust for ambient noise before processing; recognition errors are the caller's to report
+        return self.transcribe_audio_data(
+            audio_data, language, calibrate=True, progress=progress
+        )
 
-                last_error = None
-                for recognition_func, service_name in services:
+    def transcribe_audio_data(
+        self,
+        audio_data: sr.AudioData,
+        language: Optional[str] = None,
+        calibrate: bool = False,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, str]:
+        """
+        Run the backend chain on already decoded audio.
+        A language hint skips language identification and is the only language tried.
+        Audio longer than SEGMENT_MAX_SECONDS is split at silences and its phrases are
+        recognised concurrently; the result lists every phrase with its timestamps.
+        The audio is preprocessed first: DC offset removed, loudness normalised and the
+        noise floor measured over the whole clip. calibrate sets the energy threshold from
+        that floor, like transcribe_audio does for files; the threshold only steers
+        segmentation and lives on a copy of the config private to this call.
+        Audio with no frames above the silence level is answered with an empty,
+        no_speech result without running language identification or any backend.
+        """
+        BYTES_PROCESSED.inc("decoded", amount=len(audio_data.frame_data))
+        # Measures the noise floor the energy threshold is calibrated from
+        with span("preprocess"):
+            prepared = self.preprocessor.process(audio_data)
+        if prepared.is_silent:
+            logger.info(
+                f"No speech detected ({prepared.speech_seconds:.2f}s above the silence level)"
+            )
+            ADMISSION_REJECTIONS.inc("silence")
+            return {
+                "text": "",
+                "confidence": 0.0,
+                "language": language,
+                "service": None,
+                "segments": [],
+                "no_speech": True,
+            }
+        audio_data = prepared.audio_data
+        with span("language_id"):
+            languages, fallback_languages = self._language_candidates(
+                audio_data, language
+            )
+        duration = len(audio_data.frame_data) / (
+            audio_data.sample_rate * audio_data.sample_width
+        )
+        if duration > SEGMENT_MAX_SECONDS:
+            config = (
+                self.config.calibrated(prepared.noise_floor)
+                if calibrate
+                else self.config
+            )
+            result = self._transcribe_segments(
+                audio_data, config, languages, fallback_languages, progress
+            )
+        else:
+            with span("recognition"):
+                result = self._run_services(audio_data, languages, fallback_languages)
+            result["segments"] = [
+                {
+                    "index": 0,
+                    "start": 0.0,
+                    "end": round(duration, 2),
+                    "text": result["text"],
+                    "confidence": result["confidence"],
+                    "language": result["language"],
+                }
+            ]
+        return result
+
+    def _language_candidates(self, audio_data: sr.AudioData, language: Optional[str]):
+        """Languages to try first and languages to fall back to; None tries every language"""
+        if language:
+            return [language], []
+        if self.language_identifier is None:
+            return None, []
+        languages, fallback_languages = self.language_identifier.candidates(
+            audio_data, LANGUAGE_ID_TOP_K
+        )
+        if languages is not None:
+            logger.info(f"Language identification candidates: {languages}")
+        return languages, fallback_languages
+
+    def _transcribe_segments(
+        self,
+        audio_data: sr.AudioData,
+        config: RecognizerConfig,
+        languages,
+        fallback_languages,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, any]:
+        """Recognise the phrases of a long recording concurrently and stitch them in order"""
+        with span("segmentation"):
+            segments = split_audio_data(audio_data, config)
+        logger.info(
+            f"Split audio into {len(segments)} segments for concurrent recognition"
+        )
+        futures = [
+            _segment_executor.submit(
+                bind(self._run_services),
+                segment.to_audio_data(),
+                languages,
+                fallback_languages,
+            )
+            for segment in segments
+        ]
+
+        recognized = []
+        last_error = None
+        try:
+            with span("recognition"):
+                for done, (segment, future) in enumerate(zip(segments, futures), 1):
                     try:
-                        logger.info(f"Attempting transcription with {service_name}")
-                        result = recognition_func(audio_data)
-                        if result:
-                            logger.info(f"Successfully transcribed using {service_name}")
-                            return {
-                                "text": result["text"],
-                                "confidence": result.get("confidence", 0.0),
-                                "service": service_name
-                            }
-                    except sr.UnknownValueError:
-                        logger.warning(f"{service_name} could not understand the audio")
-                        last_error = "Speech was not understood"
-                        continue
-                    except sr.RequestError as e:
-                        logger.error(f"{service_name} service failed: {str(e)}")
-                        last_error = f"Service error: {str(e)}"
-                        continue
-                    except Exception as e:
-                        logger.error(f"Unexpected error with {service_name}: {str(e)}")
+                        result = future.result()
+                    except ValueError as e:
+                        logger.warning(
+                            f"Segment {segment.index} ({segment.start:.1f}s) was not recognized: {str(e)}"
+                        )
                         last_error = str(e)
-                        continue
+                    else:
+                        recognized.append((segment, result))
+                    if progress is not None:
+                        progress(done / len(segments))
+        except BaseException:
+            # Phrases not yet started are dropped; running ones finish in the background
+            for future in futures:
+                future.cancel()
+            raise
 
-                error_msg = last_error or "Could not recognize speech using any available service"
-                logger.error(f"All transcription services failed: {error_msg}")
-                raise ValueError(error_msg)
+        if not recognized:
+            raise ValueError(
+                last_error or "Could not recognize speech using any available service"
+            )
 
-        except Exception as e:
-            logger.error(f"Error processing {audio_file_path}: {str(e)}", exc_info=True)
-            raise
+        # Weight by duration so a long phrase counts more than a short interjection
+        total_duration = sum(segment.duration for segment, _ in recognized)
+        confidence = (
+            sum(
+                result["confidence"] * segment.duration
+                for segment, result in recognized
+            )
+            / total_duration
+        )
+        languages_seen = [
+            result["language"] for _, result in recognized if result.get("language")
+        ]
+        services_seen = [result["service"] for _, result in recognized]
+        return {
+            "text": " ".join(result["text"] for _, result in recognized),
+            "confidence": round(confidence, 4),
+            "language": (
+                max(set(languages_seen), key=languages_seen.count)
+                if languages_seen
+                else None
+            ),
+            "service": max(set(services_seen), key=services_seen.count),
+            "segments": [
+                {
+                    "index": segment.index,
+                    "start": round(segment.start, 2),
+                    "end": round(segment.end, 2),
+                    "text": result["text"],
+                    "confidence": result["confidence"],
+                    "language": result.get("language"),
+                }
+                for segment, result in recognized
+            ],
+        }
+
+    def _run_services(
+        self, audio_data: sr.AudioData, languages, fallback_languages
+    ) -> Dict[str, any]:
+        """Run the backend chain until one of the services returns a transcript"""
+        return self.backends.run(audio_data, languages, fallback_languages)
 
-    def try_google_recognition(self, audio_data) -> Dict[str, any]:
-        """Try Google Speech Recognition with multiple languages"""
-        for lang in [DEFAULT_LANGUAGE] + [l for l in SUPPORTED_LANGUAGES if l != DEFAULT_LANGUAGE]:
+    def try_google_recognition(
+        self,
+        audio_data,
+        languages: Optional[List[str]] = None,
+        fallback_languages: Optional[List[str]] = None,
+    ) -> Dict[str, any]:
+        """
+        Try Google Speech Recognition with multiple languages.
+        fallback_languages are also tried when languages produced no transcript at least
+        LANGUAGE_ID_ACCEPT_CONFIDENCE confident, so a wrong guess cannot hide the right language.
+        """
+        if languages is None:
+            languages = [DEFAULT_LANGUAGE] + [
+                l for l in SUPPORTED_LANGUAGES if l != DEFAULT_LANGUAGE
+            ]
+        # Every language gets the same request body, so the FLAC encoding is done once
+        with span("flac_encode"):
+            audio = GoogleAudio(audio_data)
+        result = self._try_google_languages(audio, languages)
+        if fallback_languages and (
+            result is None or result["confidence"] < LANGUAGE_ID_ACCEPT_CONFIDENCE
+        ):
+            logger.info(
+                "No confident transcript for the identified languages, trying the remaining ones"
+            )
             try:
-                logger.debug(f"Attempting Google recognition with language: {lang}")
-                text = self.recognizer.recognize_google(audio_data, language=lang, show_all=True)
-                if text and isinstance(text, dict) and text.get('alternative'):
-                    best_result = text['alternative'][0]
-                    return {
-                        "text": best_result['transcript'],
-                        "confidence": best_result.get('confidence', 0.0),
-                        "language": lang
-                    }
+                fallback = self._try_google_languages(audio, fallback_languages)
+            except sr.RequestError:
+                if result is None:
+                    raise
+                # The less confident transcript is still better than none
+                fallback = None
+            if fallback is not None and (
+                result is None or fallback["confidence"] > result["confidence"]
+            ):
+                result = fallback
+        return result
+
+    def _try_google_languages(
+        self, audio: GoogleAudio, languages: List[str]
+    ) -> Optional[Dict[str, any]]:
+        if GOOGLE_LANGUAGE_FANOUT and len(languages) > 1:
+            return self._google_fanout(audio, languages)
+
+        for lang in languages:
+            try:
+                result = self._recognize_google_language(audio, lang)
+                if result:
+                    return result
             except sr.UnknownValueError:
-                logger.debug(f"Google recognition failed for language {lang}: Speech not understood")
+                logger.debug(
+                    f"Google recognition failed for language {lang}: Speech not understood"
+                )
                 continue
             except sr.RequestError as e:
+                # The service itself is failing, so further languages would fail too
                 logger.error(f"Google recognition service error: {str(e)}")
-                break
+                raise
         return None
 
-    def try_sphinx_recognition(self, audio_data) -> Dict[str, any]:
-        """Fallback to offline Sphinx recognition"""
+    def _recognize_google_language(
+        self, audio: GoogleAudio, lang: str
+    ) -> Optional[Dict[str, any]]:
+        """Single Google round trip for one language, over the shared connection pool"""
+        logger.debug(f"Attempting Google recognition with language: {lang}")
+        started = time.monotonic()
         try:
-            logger.debug("Attempting Sphinx recognition")
-            text = self.recognizer.recognize_sphinx(audio_data)
+            text = get_google_client().recognize(audio, lang)
+        finally:
+            seconds = time.monotonic() - started
+            LANGUAGE_SECONDS.observe(seconds, lang)
+            record(f"google:{lang}", seconds)
+        if text and isinstance(text, dict) and text.get("alternative"):
+            best_result = text["alternative"][0]
             return {
-                "text": text,
-                "confidence": 0.6,  # Default confidence for Sphinx
-                "language": "en-US"
+                "text": best_result["transcript"],
+                "confidence": best_result.get("confidence", 0.0),
+                "language": lang,
             }
-        except Exception as e:
-            logger.debug(f"Sphinx recognition failed: {str(e)}")
-            return None
\ No newline at end of file
+        return None
+
+    def _google_fanout(
+        self, audio: GoogleAudio, languages: List[str]
+    ) -> Optional[Dict[str, any]]:
+        """
+        Query several languages concurrently and keep the most confident result.
+        Returns as soon as a result reaches GOOGLE_EARLY_EXIT_CONFIDENCE; ties go to
+        the earlier language in the candidate list. Each language gets
+        GOOGLE_LANGUAGE_TIMEOUT from its submission and is abandoned after that; once
+        one has timed out, the languages left are still tried, one at a time.
+        """
+        remaining = list(languages)
+        # future -> language, and future -> monotonic time its language is given up at
+        running = {}
+        deadlines = {}
+        best = None
+        best_rank = None
+        service_error = None
+        timed_out = []
+
+        def launch():
+            # A language timing out means the service is struggling; ease off its load
+            concurrency = 1 if timed_out else GOOGLE_FANOUT_CONCURRENCY
+            while remaining and len(running) < concurrency and service_error is None:
+                lang = remaining.pop(0)
+                future = _language_executor.submit(
+                    bind(self._recognize_google_language), audio, lang
+                )
+                running[future] = lang
+                deadlines[future] = time.monotonic() + GOOGLE_LANGUAGE_TIMEOUT
+
+        launch()
+        while running:
+            timeout = max(0.0, min(deadlines.values()) - time.monotonic())
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            now = time.monotonic()
+            expired = [
+                future
+                for future in running
+                if future not in done and deadlines[future] <= now
+            ]
+            for future in expired:
+                # Its thread finishes the request in the background; the result is ignored
+                future.cancel()
+                timed_out.append(running.pop(future))
+                del deadlines[future]
+            if expired:
+                logger.warning(
+                    f"Google recognition timed out for languages: {timed_out[-len(expired):]}"
+                )
+
+            for future in done:
+                lang = running.pop(future)
+                del deadlines[future]
+                try:
+                    result = future.result()
+                except sr.UnknownValueError:
+                    logger.debug(
+                        f"Google recognition failed for language {lang}: Speech not understood"
+                    )
+                    continue
+                except sr.RequestError as e:
+                    # The service itself is failing, so further languages would fail too
+                    logger.error(f"Google recognition service error: {str(e)}")
+                    service_error = e
+                    continue
+                except Exception as e:
+                    logger.warning(
+                        f"Google recognition error for language {lang}: {str(e)}"
+                    )
+                    continue
+
+                if not result:
+                    continue
+                rank = languages.index(lang)
+                if best is None or (result["confidence"], -rank) > (
+                    best["confidence"],
+                    -best_rank,
+                ):
+                    best, best_rank = result, rank
+
+            if best is not None and best["confidence"] >= GOOGLE_EARLY_EXIT_CONFIDENCE:
+                logger.debug(
+                    f"Early exit on {best['language']} with confidence {best['confidence']}"
+                )
+                break
+            launch()
+
+        # Whatever is still queued is no longer needed
+        for future in running:
+            future.cancel()
+        if best is None and service_error is None and timed_out:
+            service_error = sr.RequestError("recognition request timed out")
+        if best is None and service_error is not None:
+            raise service_error
+        return best
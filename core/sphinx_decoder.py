@@ -0,0 +1,256 @@
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+import speech_recognition as sr
+
+from config.settings import (
+    DEFAULT_LANGUAGE,
+    SPHINX_MAX_IDLE_DECODERS,
+    SPHINX_MODEL_PATHS,
+    SPHINX_MODELS_DIR,
+    SPHINX_PRELOAD_LANGUAGES,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# The bundled models, like sr.Recognizer.recognize_sphinx, expect 16 kHz 16-bit mono
+SPHINX_SAMPLE_RATE = 16000
+# Models shipped with speech_recognition, one <language>/ folder each
+BUNDLED_MODELS_DIR = os.path.join(os.path.dirname(sr.__file__), "pocketsphinx-data")
+
+
+class SphinxModel:
+    """File paths of one language's acoustic model, language model and dictionary"""
+
+    def __init__(
+        self, language: str, acoustic_model: str, language_model: str, dictionary: str
+    ):
+        self.language = language
+        self.acoustic_model = acoustic_model
+        self.language_model = language_model
+        self.dictionary = dictionary
+
+    @classmethod
+    def from_directory(cls, language: str, directory: str) -> "SphinxModel":
+        """Model laid out like speech_recognition's pocketsphinx-data/<language>/"""
+        return cls(
+            language,
+            os.path.join(directory, "acoustic-model"),
+            os.path.join(directory, "language-model.lm.bin"),
+            os.path.join(directory, "pronounciation-dictionary.dict"),
+        )
+
+    def missing_files(self) -> List[str]:
+        missing = [] if os.path.isdir(self.acoustic_model) else [self.acoustic_model]
+        missing += [
+            path
+            for path in (self.language_model, self.dictionary)
+            if not os.path.isfile(path)
+        ]
+        return missing
+
+
+class SphinxModelRegistry:
+    """Sphinx models by language; later registrations replace earlier ones"""
+
+    def __init__(self):
+        self._models: Dict[str, SphinxModel] = {}
+
+    @classmethod
+    def from_settings(cls) -> "SphinxModelRegistry":
+        registry = cls()
+        registry.discover(BUNDLED_MODELS_DIR)
+        if SPHINX_MODELS_DIR:
+            registry.discover(SPHINX_MODELS_DIR)
+        for entry in filter(
+            None, (part.strip() for part in SPHINX_MODEL_PATHS.split(";"))
+        ):
+            try:
+                language, paths = entry.split("=", 1)
+                acoustic_model, language_model, dictionary = (
+                    p.strip() for p in paths.split(",")
+                )
+            except ValueError:
+                logger.warning(f"Ignoring malformed SPHINX_MODEL_PATHS entry: {entry}")
+                continue
+            registry.register(
+                SphinxModel(
+                    language.strip(), acoustic_model, language_model, dictionary
+                )
+            )
+        return registry
+
+    def register(self, model: SphinxModel) -> None:
+        self._models[model.language] = model
+
+    def discover(self, directory: str) -> None:
+        """Register every complete model folder found in directory"""
+        if not os.path.isdir(directory):
+            logger.warning(f"Sphinx models directory not found: {directory}")
+            return
+        for language in sorted(os.listdir(directory)):
+            model = SphinxModel.from_directory(
+                language, os.path.join(directory, language)
+            )
+            if not model.missing_files():
+                self.register(model)
+
+    def get(self, language: str) -> Optional[SphinxModel]:
+        return self._models.get(language)
+
+    def languages(self) -> List[str]:
+        return list(self._models)
+
+    def resolve(
+        self, languages: Optional[Iterable[str]] = None
+    ) -> Optional[SphinxModel]:
+        """First requested language with a model, else the default language's model"""
+        for language in list(languages or []) + [DEFAULT_LANGUAGE]:
+            if language in self._models:
+                return self._models[language]
+        return None
+
+
+class SphinxDecoderPool:
+    """
+    Loaded pocketsphinx decoders, kept warm between recognitions.
+    A decoder is not thread-safe, so each call checks one out for exclusive use and
+    returns it afterwards; concurrent calls get separate instances, created on demand.
+    The pool is per process, so every worker process holds its own decoders.
+    """
+
+    def __init__(
+        self, registry: SphinxModelRegistry, max_idle: int = SPHINX_MAX_IDLE_DECODERS
+    ):
+        self.registry = registry
+        self.max_idle = max_idle
+        self._idle: Dict[str, List[Any]] = {}
+        self._lock = threading.Lock()
+        self.loads = 0
+        self.load_seconds = 0.0
+        self.reuses = 0
+
+    def recognize(
+        self, audio_data: sr.AudioData, languages: Optional[Iterable[str]] = None
+    ) -> Dict[str, str]:
+        """
+        Transcribe with the model for the first supported language.
+        Raises sr.RequestError without a usable model and sr.UnknownValueError
+        without a hypothesis, like sr.Recognizer.recognize_sphinx.
+        """
+        model = self.registry.resolve(languages)
+        if model is None:
+            raise sr.RequestError(
+                "no PocketSphinx model available for the requested languages"
+            )
+        raw_data = audio_data.get_raw_data(
+            convert_rate=SPHINX_SAMPLE_RATE, convert_width=2
+        )
+
+        decoder, cmn = self._acquire(model)
+        if cmn is not None:
+            # Start every utterance from the model's own normalisation, not the last caller's
+            decoder.set_cmn(cmn)
+        decoder.start_utt()
+        decoder.process_raw(raw_data, False, True)
+        decoder.end_utt()
+        hypothesis = decoder.hyp()
+        # Only handed back after a clean utterance; a decoder that raised is dropped
+        self._release(model.language, decoder, cmn)
+
+        if hypothesis is None:
+            raise sr.UnknownValueError()
+        return {"text": hypothesis.hypstr, "language": model.language}
+
+    def warmup(self, languages: Iterable[str], count: int = 1) -> None:
+        """Load count decoders per language ahead of the first request"""
+        for language in languages:
+            model = self.registry.get(language)
+            if model is None:
+                logger.warning(
+                    f"No Sphinx model registered for {language}, not preloading it"
+                )
+                continue
+            decoders = [self._acquire(model) for _ in range(count)]
+            for decoder, cmn in decoders:
+                self._release(language, decoder, cmn)
+        logger.info(f"Preloaded Sphinx decoders: {self.stats()['idle']}")
+
+    def _acquire(self, model: SphinxModel):
+        with self._lock:
+            idle = self._idle.get(model.language)
+            if idle:
+                self.reuses += 1
+                return idle.pop()
+        return self._load(model)
+
+    def _release(self, language: str, decoder: Any, cmn: Optional[str]) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(language, [])
+            if len(idle) < self.max_idle:
+                idle.append((decoder, cmn))
+
+    def _load(self, model: SphinxModel):
+        try:
+            from pocketsphinx import pocketsphinx
+        except ImportError:
+            raise sr.RequestError(
+                "missing PocketSphinx module: ensure that PocketSphinx is set up correctly."
+            )
+        missing = model.missing_files()
+        if missing:
+            raise sr.RequestError(
+                f"missing PocketSphinx model files: {', '.join(missing)}"
+            )
+
+        started = time.monotonic()
+        config = pocketsphinx.Config()
+        config.set_string("-hmm", model.acoustic_model)
+        config.set_string("-lm", model.language_model)
+        config.set_string("-dict", model.dictionary)
+        config.set_string("-logfn", os.devnull)
+        decoder = pocketsphinx.Decoder(config)
+        # Older pocketsphinx builds cannot save and restore the normalisation state
+        cmn = decoder.get_cmn(False) if hasattr(decoder, "get_cmn") else None
+        elapsed = time.monotonic() - started
+
+        with self._lock:
+            self.loads += 1
+            self.load_seconds += elapsed
+        logger.info(f"Loaded Sphinx decoder for {model.language} in {elapsed:.2f}s")
+        return decoder, cmn
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "languages": self.registry.languages(),
+                "idle": {language: len(idle) for language, idle in self._idle.items()},
+                "loads": self.loads,
+                "load_seconds": round(self.load_seconds, 3),
+                "reuses": self.reuses,
+            }
+
+
+# One pool per process; worker processes build their own on first use
+_sphinx_pool: Optional[SphinxDecoderPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_sphinx_pool() -> SphinxDecoderPool:
+    global _sphinx_pool
+    with _pool_lock:
+        if _sphinx_pool is None:
+            _sphinx_pool = SphinxDecoderPool(SphinxModelRegistry.from_settings())
+        return _sphinx_pool
+
+
+def preload_sphinx(count: int = 1) -> None:
+    """Warm the configured languages; also the initializer of recognition worker processes"""
+    try:
+        get_sphinx_pool().warmup(SPHINX_PRELOAD_LANGUAGES, count)
+    except sr.RequestError as e:
+        logger.warning(f"Could not preload Sphinx decoders: {str(e)}")
@@ -0,0 +1,122 @@
+import logging
+import os
+from pathlib import Path
+from typing import BinaryIO, Optional, Tuple
+
+from config.settings import (
+    AUDIO_DIR,
+    UPLOAD_SPOOL,
+    UPLOAD_SPOOL_BUFFER,
+    UPLOAD_SPOOL_DIR,
+)
+from core.upload_store import upload_store
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+SPOOL_MODES = ("auto", "disk", "tmpfs", "memfd")
+# Copy buffers are whole multiples of this, so every write but the last covers whole pages and blocks
+BUFFER_ALIGNMENT = 64 * 1024
+
+
+def memory_spool(mode: str = UPLOAD_SPOOL) -> Optional[str]:
+    """The memory-backed spool mode selects on this machine: memfd, tmpfs or None"""
+    if mode not in SPOOL_MODES:
+        logger.warning(f"Unknown UPLOAD_SPOOL {mode!r}, spooling to disk")
+        return None
+    if mode in ("auto", "memfd") and hasattr(os, "memfd_create"):
+        return "memfd"
+    if mode in ("auto", "tmpfs") and UPLOAD_SPOOL_DIR.is_dir():
+        return "tmpfs"
+    if mode != "disk":
+        logger.warning(f"UPLOAD_SPOOL={mode} is not available here, spooling to disk")
+    return None
+
+
+MEMORY_SPOOL = memory_spool()
+
+
+async def reserve_spool(size: int, mode: str = UPLOAD_SPOOL) -> Tuple[str, int]:
+    """
+    Where an upload of size bytes is spooled, and the memory reserved for it.
+    memfd and tmpfs count against the upload store budget: an explicit mode waits
+    for room like in-memory uploads do, auto falls back to the disk when there is none.
+    Uploads of unknown size always go to the disk.
+    """
+    if MEMORY_SPOOL is None or not size:
+        return "disk", 0
+    if mode == "auto":
+        return (MEMORY_SPOOL, size) if upload_store.try_reserve(size) else ("disk", 0)
+    await upload_store.reserve(size)
+    return MEMORY_SPOOL, size
+
+
+def _write_all(fd: int, view: memoryview) -> None:
+    while view:
+        written = os.write(fd, view)
+        view = view[written:]
+
+
+def copy_to_fd(
+    source: BinaryIO, fd: int, buffer_size: int = UPLOAD_SPOOL_BUFFER
+) -> int:
+    """Copy a file object into fd through one reused, aligned buffer; returns the bytes copied"""
+    buffer_size = max(1, -(-buffer_size // BUFFER_ALIGNMENT)) * BUFFER_ALIGNMENT
+    buffer = bytearray(buffer_size)
+    view = memoryview(buffer)
+    # SpooledTemporaryFile only has readinto from Python 3.11
+    readinto = getattr(source, "readinto", None)
+    total = 0
+    while True:
+        if readinto is not None:
+            count = readinto(view)
+        else:
+            chunk = source.read(buffer_size)
+            count = len(chunk)
+            view[:count] = chunk
+        if not count:
+            return total
+        _write_all(fd, view[:count])
+        total += count
+
+
+def spool_upload(
+    source: BinaryIO, filename: Optional[str], kind: str, size: int = 0
+) -> Tuple[Path, Optional[int], int]:
+    """
+    Copy an upload into a new file of the given spool kind. Blocking; call it off the
+    event loop. Returns the path readers open, the descriptor to close in place of
+    removing the file (memfd only), and the bytes written.
+    """
+    name = upload_store.unique_filename(filename)
+    if kind == "memfd":
+        fd = os.memfd_create(name, os.MFD_CLOEXEC)
+        # Readers, recognition worker processes included, reopen it with their own offset
+        path = Path(f"/proc/{os.getpid()}/fd/{fd}")
+    else:
+        directory = UPLOAD_SPOOL_DIR if kind == "tmpfs" else AUDIO_DIR
+        directory.mkdir(exist_ok=True)
+        path = directory / name
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    try:
+        if size:
+            try:
+                # One extent up front instead of growing the file write by write
+                os.posix_fallocate(fd, 0, size)
+            except OSError:
+                pass
+        written = copy_to_fd(source, fd)
+        if written < size:
+            os.ftruncate(fd, written)
+    except BaseException:
+        os.close(fd)
+        if kind != "memfd":
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        raise
+    if kind == "memfd":
+        return path, fd, written
+    os.close(fd)
+    return path, None, written
@@ -0,0 +1,84 @@
+import logging
+import threading
+import time
+from typing import TYPE_CHECKING, Optional
+
+from starlette.concurrency import run_in_threadpool
+
+from config.settings import WARMUP_MODE
+
+if TYPE_CHECKING:
+    from core.speech_recognition import SpeechRecognizer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+WARMUP_MODES = ("eager", "background", "lazy")
+
+_speech_recognizer: Optional["SpeechRecognizer"] = None
+_lock = threading.Lock()
+
+
+def get_speech_recognizer() -> "SpeechRecognizer":
+    """
+    The SpeechRecognizer shared by all routes, built on first use.
+    Building it imports speech_recognition, NumPy, PyAV and the decoders, which is
+    most of the app's import time, so importing the routes does not do it.
+    """
+    global _speech_recognizer
+    if _speech_recognizer is None:
+        with _lock:
+            if _speech_recognizer is None:
+                started = time.perf_counter()
+                from core.speech_recognition import SpeechRecognizer
+
+                _speech_recognizer = SpeechRecognizer()
+                logger.info(
+                    f"Recognition stack loaded in {time.perf_counter() - started:.2f}s"
+                )
+    return _speech_recognizer
+
+
+async def load_speech_recognizer() -> "SpeechRecognizer":
+    """get_speech_recognizer for request handlers; the first load runs off the event loop"""
+    if _speech_recognizer is not None:
+        return _speech_recognizer
+    return await run_in_threadpool(get_speech_recognizer)
+
+
+def warm_up() -> None:
+    """Load everything the first page view and transcription would, so they are not slower than the rest"""
+    from core.audio_ingest import ingest_wav_upload  # noqa: F401
+    from core.formats import supported_formats
+    from core.page_cache import get_page_cache
+    from core.worker_pool import get_recognition_pool
+
+    get_page_cache().page()
+    get_speech_recognizer()
+    supported_formats()
+    # Worker processes load their own recognizer; start them now rather than on the first jobs
+    get_recognition_pool().start()
+
+
+def _warm_up_logged() -> None:
+    try:
+        warm_up()
+    except Exception as e:
+        # The first request will load, and report, whatever failed here
+        logger.warning(f"Background warmup failed: {str(e)}")
+
+
+async def schedule_warmup(mode: str = WARMUP_MODE) -> None:
+    """
+    Load the recognition stack as WARMUP_MODE says: "eager" before the app serves,
+    "background" on a thread while it already serves, "lazy" on the first
+    transcription only.
+    """
+    if mode == "eager":
+        await run_in_threadpool(warm_up)
+    elif mode == "background":
+        threading.Thread(target=_warm_up_logged, name="warmup", daemon=True).start()
+    elif mode != "lazy":
+        logger.warning(
+            f"Unknown WARMUP_MODE {mode!r}, expected one of {', '.join(WARMUP_MODES)}"
+        )
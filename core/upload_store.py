@@ -0,0 +1,246 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from config.settings import (
+    UPLOAD_STORE_MAX_AGE,
+    UPLOAD_STORE_MAX_BYTES,
+    UPLOAD_STORE_WAIT_SECONDS,
+)
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+# Prefix of in-memory references; SpeechRecognizer and FileHandler dispatch on it
+MEMORY_KEY_PREFIX = "memory_file_"
+
+
+class UploadStoreFullError(Exception):
+    """Raised when an upload cannot fit in the memory budget within the wait time"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Upload store is full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class SpooledPath(type(Path())):
+    """
+    Path of a spooled upload, carrying the key its store entry is held under.
+    A memfd's /proc path names a descriptor number the kernel hands out again once
+    the file is closed, so the path alone cannot tell two uploads apart.
+    """
+
+    key: Optional[str] = None
+
+
+def reference_key(reference: Any) -> str:
+    """Store key of a reference from put_memory() or put_path()"""
+    return getattr(reference, "key", None) or str(reference)
+
+
+class _Entry:
+    def __init__(
+        self,
+        data: Optional[bytes],
+        path: Optional[Path],
+        fd: Optional[int] = None,
+        size: int = 0,
+    ):
+        self.data = data
+        self.path = path
+        # Anonymous memory files are closed rather than removed
+        self.fd = fd
+        # Bytes counted against the memory budget; spooled files only count when memory-backed
+        self.size = len(data) if data is not None else size
+        self.refs = 1
+        self.created = time.monotonic()
+
+
+class UploadStore:
+    """
+    Reference-counted store for uploads, in memory or spooled to disk.
+    Every upload gets a unique key, so concurrent uploads with the same filename
+    never collide. The request that stores an upload holds the first reference and
+    anyone sharing it acquires another; the bytes (or file) are dropped when the
+    last reference is released. In-memory bytes are bounded by max_bytes: new
+    uploads wait for room and are rejected if none frees up in time.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = UPLOAD_STORE_MAX_BYTES,
+        wait_seconds: float = UPLOAD_STORE_WAIT_SECONDS,
+        max_age: int = UPLOAD_STORE_MAX_AGE,
+    ):
+        self.max_bytes = max_bytes
+        self.wait_seconds = wait_seconds
+        self.max_age = max_age
+        self._entries: Dict[str, _Entry] = {}
+        self._resident = 0
+        self._reserved = 0
+        self._lock = threading.Lock()
+        self.rejected = 0
+        self.evicted = 0
+
+    @staticmethod
+    def new_memory_key() -> str:
+        return f"{MEMORY_KEY_PREFIX}{uuid.uuid4().hex}"
+
+    @staticmethod
+    def unique_filename(filename: Optional[str]) -> str:
+        """Disk name that cannot collide with another upload of the same file"""
+        name = Path(filename or "upload").name
+        return f"{uuid.uuid4().hex}_{name}"
+
+    async def reserve(self, size: int) -> None:
+        """
+        Wait until size bytes fit in the budget and hold them for the caller.
+        Must be followed by put_memory() or unreserve() with the same size.
+        """
+        if size > self.max_bytes:
+            with self._lock:
+                self.rejected += 1
+            raise UploadStoreFullError(int(self.wait_seconds) or 1)
+
+        deadline = time.monotonic() + self.wait_seconds
+        while True:
+            with self._lock:
+                evicted = (
+                    self._evict_expired()
+                    if self._resident + self._reserved + size > self.max_bytes
+                    else []
+                )
+                fits = self._resident + self._reserved + size <= self.max_bytes
+                if fits:
+                    self._reserved += size
+                timed_out = not fits and time.monotonic() >= deadline
+                if timed_out:
+                    self.rejected += 1
+            for entry in evicted:
+                self._dispose(entry)
+            if fits:
+                return
+            if timed_out:
+                raise UploadStoreFullError(int(self.wait_seconds) or 1)
+            await asyncio.sleep(0.05)
+
+    def try_reserve(self, size: int) -> bool:
+        """Hold size bytes if they fit in the budget right now, without waiting"""
+        with self._lock:
+            if self._resident + self._reserved + size > self.max_bytes:
+                return False
+            self._reserved += size
+            return True
+
+    def unreserve(self, size: int) -> None:
+        with self._lock:
+            self._reserved = max(0, self._reserved - size)
+
+    def put_memory(self, data: bytes, reserved: int = 0) -> str:
+        """Store bytes under a new key, converting an earlier reservation into resident bytes"""
+        key = self.new_memory_key()
+        with self._lock:
+            self._reserved = max(0, self._reserved - reserved)
+            self._entries[key] = _Entry(data, None)
+            self._resident += len(data)
+        return key
+
+    def put_path(
+        self, path: Path, fd: Optional[int] = None, size: int = 0, reserved: int = 0
+    ) -> SpooledPath:
+        """
+        Track a spooled file so it is deleted with its last reference.
+        Files in memory (tmpfs or memfd, then fd is the open descriptor) pass their
+        size, which converts an earlier reservation into resident bytes.
+        Returns the path to open, keyed under a new id rather than the path itself.
+        """
+        reference = SpooledPath(path)
+        reference.key = f"spooled_file_{uuid.uuid4().hex}"
+        with self._lock:
+            self._reserved = max(0, self._reserved - reserved)
+            self._entries[reference.key] = _Entry(None, path, fd, size)
+            self._resident += size
+        return reference
+
+    def get(self, key: str) -> bytes:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry.data is None:
+                raise FileNotFoundError(f"Memory file with key {key} not found")
+            return entry.data
+
+    def acquire(self, reference: Any) -> None:
+        """Take an extra reference, e.g. when several requests share one upload"""
+        with self._lock:
+            entry = self._entries.get(reference_key(reference))
+            if entry is None:
+                raise FileNotFoundError(f"Upload {reference} not found")
+            entry.refs += 1
+
+    def release(self, reference: Any) -> None:
+        """Drop a reference and free the upload once nobody uses it"""
+        key = reference_key(reference)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.refs -= 1
+            if entry.refs > 0:
+                return
+            entry = self._drop(key)
+        # Outside the lock: removing a large file can take a while on a slow disk
+        self._dispose(entry)
+
+    def _drop(self, key: str) -> _Entry:
+        entry = self._entries.pop(key)
+        self._resident -= entry.size
+        return entry
+
+    @staticmethod
+    def _dispose(entry: _Entry) -> None:
+        """Close or remove the spooled file of a dropped entry"""
+        try:
+            if entry.fd is not None:
+                os.close(entry.fd)
+            elif entry.path is not None:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.error(f"Error removing spooled upload {entry.path}: {str(e)}")
+
+    def _evict_expired(self) -> List[_Entry]:
+        # Only reached under memory pressure; anything this old was leaked by its owner
+        now = time.monotonic()
+        evicted = []
+        for key in [
+            k for k, e in self._entries.items() if now - e.created > self.max_age
+        ]:
+            logger.warning(f"Evicting leaked upload {key}")
+            evicted.append(self._drop(key))
+            self.evicted += 1
+        return evicted
+
+    def __contains__(self, reference: Any) -> bool:
+        with self._lock:
+            return reference_key(reference) in self._entries
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "resident_bytes": self._resident,
+                "reserved_bytes": self._reserved,
+                "max_bytes": self.max_bytes,
+                "rejected": self.rejected,
+                "evicted": self.evicted,
+            }
+
+
+# One store per worker process, shared by every route that accepts uploads
+upload_store = UploadStore()
@@ -0,0 +1,224 @@
+import asyncio
+import logging
+import math
+import multiprocessing
+import threading
+import time
+from concurrent.futures import (
+    Executor,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Any, Callable, Dict, Optional
+
+from config.settings import (
+    RECOGNITION_EXECUTOR,
+    RECOGNITION_QUEUE_SIZE,
+    RECOGNITION_RETRY_AFTER,
+    RECOGNITION_START_METHOD,
+    RECOGNITION_WORKERS,
+)
+from core.metrics import bind
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+
+def _ready() -> bool:
+    return True
+
+
+class PoolSaturatedError(Exception):
+    """Raised when the recognition pool has no free worker and its queue is full"""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Recognition pool is saturated, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class RecognitionPool:
+    """
+    Bounded executor for blocking recognition work.
+    At most max_workers jobs run at once and at most max_queue more may wait;
+    anything beyond that is rejected immediately instead of piling up.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = RECOGNITION_WORKERS,
+        max_queue: int = RECOGNITION_QUEUE_SIZE,
+        executor_type: str = RECOGNITION_EXECUTOR,
+        retry_after: int = RECOGNITION_RETRY_AFTER,
+        initializer: Optional[Callable[[], None]] = None,
+        start_method: str = RECOGNITION_START_METHOD,
+    ):
+        if executor_type not in ("thread", "process"):
+            raise ValueError(f"Unknown executor type: {executor_type}")
+        self.max_workers = max(1, max_workers)
+        self.max_queue = max(0, max_queue)
+        self.executor_type = executor_type
+        self.retry_after = retry_after
+        # Run once in every worker process, e.g. to load models before the first job
+        self.initializer = initializer
+        if start_method not in multiprocessing.get_all_start_methods():
+            start_method = "spawn"
+        self.start_method = start_method
+
+        self._executor: Optional[Executor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._busy_seconds = 0.0
+
+    @property
+    def is_process_pool(self) -> bool:
+        return self.executor_type == "process"
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so importing the routes does not spawn workers
+        if self._executor is not None and getattr(self._executor, "_broken", False):
+            # A worker process died; the executor refuses all further work, so replace it
+            logger.warning(
+                f"Recognition worker process died ({self._executor._broken}), restarting the pool"
+            )
+            self._executor.shutdown(wait=False)
+            self._executor = None
+        if self._executor is None:
+            if self.is_process_pool:
+                # Imported here so thread pools never touch shared memory
+                from multiprocessing import resource_tracker
+
+                from core.shared_audio import sweep_orphaned_segments
+
+                sweep_orphaned_segments()
+                # Started before the workers so they share it, and segments a crashed server
+                # leaves behind are unlinked by it
+                resource_tracker.ensure_running()
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(self.start_method),
+                    initializer=self.initializer,
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="recognition"
+                )
+            logger.info(
+                f"Started {self.executor_type} recognition pool with "
+                f"{self.max_workers} workers and queue size {self.max_queue}"
+            )
+        return self._executor
+
+    def _estimate_retry_after(self) -> int:
+        """Estimate how long until a slot frees up from the average job duration"""
+        if not self._completed:
+            return self.retry_after
+        average = self._busy_seconds / self._completed
+        backlog = self._pending - self.max_workers + 1
+        return max(1, math.ceil(average * backlog / self.max_workers))
+
+    def _run_tracked(self, func: Callable, *args, **kwargs) -> Any:
+        """Wrapper executed on a worker thread so in-flight work can be counted"""
+        with self._lock:
+            self._in_flight += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+    def _on_done(self, started: float, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+            self._busy_seconds += time.monotonic() - started
+            if future.cancelled() or future.exception() is not None:
+                self._failed += 1
+            else:
+                self._completed += 1
+
+    def submit(self, func: Callable, *args, **kwargs) -> Future:
+        """
+        Submit a job, raising PoolSaturatedError if no worker or queue slot is free.
+        For process pools func and its arguments must be picklable.
+        """
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self._rejected += 1
+                raise PoolSaturatedError(self._estimate_retry_after())
+            self._pending += 1
+
+        started = time.monotonic()
+        try:
+            if self.is_process_pool:
+                future = self._get_executor().submit(func, *args, **kwargs)
+            else:
+                # Threads carry the request's context along, so its timing spans still count
+                future = self._get_executor().submit(
+                    self._run_tracked, bind(func), *args, **kwargs
+                )
+        except Exception:
+            with self._lock:
+                self._pending -= 1
+            raise
+        future.add_done_callback(lambda f: self._on_done(started, f))
+        return future
+
+    def start(self) -> None:
+        """Start every worker process now, running the initializer, instead of on the first jobs"""
+        if not self.is_process_pool:
+            return
+        executor = self._get_executor()
+        wait([executor.submit(_ready) for _ in range(self.max_workers)])
+
+    async def run(self, func: Callable, *args, **kwargs) -> Any:
+        """Run a blocking job on the pool without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(func, *args, **kwargs))
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of queue depth and in-flight work"""
+        with self._lock:
+            if self.is_process_pool:
+                # Child processes cannot report back, assume every worker is busy first
+                in_flight = min(self._pending, self.max_workers)
+            else:
+                in_flight = self._in_flight
+            return {
+                "executor": self.executor_type,
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "in_flight": in_flight,
+                "queue_depth": self._pending - in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait)
+            self._executor = None
+
+
+# Shared pool for all recognition routes in this worker process
+_recognition_pool: Optional[RecognitionPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_recognition_pool() -> RecognitionPool:
+    global _recognition_pool
+    with _pool_lock:
+        if _recognition_pool is None:
+            initializer = None
+            if RECOGNITION_EXECUTOR == "process":
+                # Imported here so the pool module stays free of recognition dependencies;
+                # worker processes build their recognizer, and Sphinx models, before their first job
+                from core.recognition_worker import init_worker
+
+                initializer = init_worker
+            _recognition_pool = RecognitionPool(initializer=initializer)
+        return _recognition_pool
@@ -0,0 +1,219 @@
+import asyncio
+import json
+import logging
+import time
+from typing import AsyncIterator, List, Optional
+
+from fastapi import APIRouter, File, Form, HTTPException, UploadFile
+from fastapi.responses import StreamingResponse
+
+from config.settings import BATCH_CONCURRENCY, BATCH_POOL_WAIT, SUPPORTED_LANGUAGES
+from core.admission import admit_header
+from core.batch import BatchTooLargeError, UploadBatch
+from core.formats import HEADER_PROBE_BYTES, supported_formats
+from core.metrics import BYTES_PROCESSED
+from core.recognition_worker import recognition_job
+from core.result_cache import ResultCache
+from core.upload_store import UploadStoreFullError, upload_store
+from core.worker_pool import PoolSaturatedError, get_recognition_pool
+from core.startup import load_speech_recognizer
+from routes.speech import result_cache, transcription_content
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+recognition_pool = get_recognition_pool()
+
+
+@router.post("/transcribe/batch")
+async def transcribe_batch(
+    files: List[UploadFile] = File(...), language: Optional[str] = Form(None)
+):
+    """
+    Transcribe many files in one request.
+    Accepts any number of "files" fields, each an audio file or a zip/tar archive of them.
+    Results are streamed as NDJSON, one line per file as soon as it is done, followed
+    by a summary line; files with identical content are transcribed only once.
+    """
+    if language and language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language. Choose one of: {', '.join(SUPPORTED_LANGUAGES)}",
+        )
+
+    BYTES_PROCESSED.inc("upload", amount=sum(upload.size or 0 for upload in files))
+    # Loads the recognition stack off the event loop if this is the instance's first request
+    await load_speech_recognizer()
+    batch = UploadBatch()
+    try:
+        for upload in files:
+            await batch.add_upload(upload)
+    except BatchTooLargeError as e:
+        batch.release()
+        raise HTTPException(status_code=413, detail=str(e))
+    except UploadStoreFullError as e:
+        batch.release()
+        logger.warning(f"Rejecting batch request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy transcribing other files. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except ValueError as e:
+        batch.release()
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        for upload in files:
+            await upload.close()
+
+    if not batch.entries:
+        raise HTTPException(status_code=400, detail="The batch contains no files")
+    logger.info(f"Batch of {len(batch.entries)} files, {len(batch.payloads)} distinct")
+    return BatchResponse(batch, language)
+
+
+class BatchResponse(StreamingResponse):
+    """
+    NDJSON results of a batch. The batch is released however the response ends:
+    a client gone before the stream starts never runs the generator's cleanup, and
+    a disconnect mid-stream skips background tasks.
+    """
+
+    def __init__(self, batch: UploadBatch, language: Optional[str]):
+        super().__init__(
+            _stream_results(batch, language), media_type="application/x-ndjson"
+        )
+        self.batch = batch
+
+    async def __call__(self, scope, receive, send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            # Runs the generator's cleanup now rather than whenever it is collected
+            await self.body_iterator.aclose()
+            self.batch.release()
+
+
+async def _stream_results(
+    batch: UploadBatch, language: Optional[str]
+) -> AsyncIterator[str]:
+    started = time.monotonic()
+    summary = {
+        "files": len(batch.entries),
+        "distinct": len(batch.payloads),
+        "succeeded": 0,
+        "failed": 0,
+        "cached": 0,
+    }
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+    tasks = [
+        asyncio.ensure_future(_transcribe_payload(batch, digest, language, semaphore))
+        for digest in list(batch.payloads)
+    ]
+    try:
+        for entry in batch.entries:
+            if not entry.supported:
+                summary["failed"] += 1
+                yield _line(
+                    {
+                        "index": entry.index,
+                        "filename": entry.filename,
+                        "success": False,
+                        "error": f"Unsupported file format. Supported formats: {', '.join(supported_formats())}",
+                    }
+                )
+
+        for finished in asyncio.as_completed(tasks):
+            digest, content, cached = await finished
+            for entry in batch.entries_for(digest):
+                summary["succeeded" if content.get("success") else "failed"] += 1
+                summary["cached"] += int(cached)
+                yield _line(
+                    {
+                        "index": entry.index,
+                        "filename": entry.filename,
+                        **content,
+                        "cached": cached,
+                        "deduplicated": entry.duplicate,
+                    }
+                )
+
+        summary["seconds"] = round(time.monotonic() - started, 3)
+        yield _line({"summary": summary})
+    finally:
+        # The client may disconnect mid-batch; stop the files that have not started
+        for task in tasks:
+            task.cancel()
+        batch.release()
+
+
+async def _transcribe_payload(
+    batch: UploadBatch,
+    digest: str,
+    language: Optional[str],
+    semaphore: asyncio.Semaphore,
+):
+    """Transcribe one distinct payload; returns (digest, line content, served from cache)"""
+    cache_key = None
+    try:
+        # Corrupt or out-of-range files fail on their headers, before queueing for the pool
+        admit_header(upload_store.get(batch.payloads[digest])[:HEADER_PROBE_BYTES])
+        if result_cache is not None:
+            speech_recognizer = await load_speech_recognizer()
+            cache_key = ResultCache.make_key(
+                digest, language, speech_recognizer.backend_chain
+            )
+            cached = await result_cache.get_async(cache_key)
+            if cached is not None:
+                return digest, cached, True
+
+        async with semaphore:
+            result = await _run_on_pool(batch.payloads[digest], language)
+        content = transcription_content(result)
+        if content is None:
+            return (
+                digest,
+                {"success": False, "error": "Could not transcribe the audio file"},
+                False,
+            )
+        if cache_key is not None:
+            await result_cache.set_async(cache_key, content)
+        return digest, content, False
+    except PoolSaturatedError as e:
+        logger.warning(f"Batch file waited too long for the recognition pool: {str(e)}")
+        return (
+            digest,
+            {
+                "success": False,
+                "error": "Server is busy transcribing other files. Please retry shortly.",
+            },
+            False,
+        )
+    except Exception as e:
+        logger.error(f"Error transcribing batch file: {str(e)}")
+        return digest, {"success": False, "error": str(e)}, False
+    finally:
+        batch.release_payload(digest)
+
+
+async def _run_on_pool(memory_key: str, language: Optional[str]) -> dict:
+    # Worker processes cannot see this process's memory store; they get the bytes through shared memory
+    speech_recognizer = await load_speech_recognizer()
+    with recognition_job(
+        recognition_pool, speech_recognizer, memory_key, language
+    ) as job:
+        deadline = time.monotonic() + BATCH_POOL_WAIT
+        while True:
+            try:
+                return await recognition_pool.run(*job)
+            except PoolSaturatedError as e:
+                # Single-file requests hold the free slots; wait a while for one before failing the file
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise
+                await asyncio.sleep(min(e.retry_after, 1, remaining))
+
+
+def _line(record: dict) -> str:
+    return json.dumps(record) + "\n"
@@ -0,0 +1,189 @@
+import hashlib
+import io
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+from fastapi import APIRouter, Form, HTTPException, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.concurrency import run_in_threadpool
+
+from config.settings import JOB_MAX_BYTES, SUPPORTED_LANGUAGES
+from core.admission import AdmissionError, admit_header
+from core.file_handler import FileHandler
+from core.formats import HEADER_PROBE_BYTES, supported_formats
+from core.job_queue import PRIORITY_LANES, JobQueueFullError, JobWorkers, get_job_queue
+from core.metrics import BYTES_PROCESSED
+from core.recognition_worker import recognition_job
+from core.result_cache import ResultCache
+from core.worker_pool import PoolSaturatedError, get_recognition_pool
+from core.startup import get_speech_recognizer
+from core.upload_store import UploadStoreFullError, upload_store
+from routes.speech import result_cache, transcription_content
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+recognition_pool = get_recognition_pool()
+
+
+def _run_job(job: Dict[str, Any], report: Callable[..., None]) -> Dict[str, Any]:
+    """Transcribe a queued job on the recognition pool; runs on a job worker thread"""
+    speech_recognizer = get_speech_recognizer()
+    cache_key = None
+    if result_cache is not None:
+        cache_key = ResultCache.make_key(
+            job["digest"], job["language"], speech_recognizer.backend_chain
+        )
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+    # Progress callbacks cannot cross into worker processes; those jobs jump from 0 to done
+    audio = io.BytesIO(job["audio"])
+    with recognition_job(
+        recognition_pool, speech_recognizer, audio, job["language"], progress=report
+    ) as task:
+        while True:
+            try:
+                future = recognition_pool.submit(*task)
+                break
+            except PoolSaturatedError as e:
+                # Interactive requests hold the pool; wait for a slot, still honouring cancellation
+                report()
+                time.sleep(min(e.retry_after, 1))
+        result = future.result()
+
+    content = transcription_content(result)
+    if content is None:
+        raise ValueError("Could not transcribe the audio file")
+    if cache_key is not None:
+        result_cache.set(cache_key, content)
+    return content
+
+
+_job_workers: Optional[JobWorkers] = None
+_job_workers_lock = threading.Lock()
+
+
+def get_job_workers() -> JobWorkers:
+    """This process's job workers; the queue database is opened on first use rather than at import"""
+    global _job_workers
+    with _job_workers_lock:
+        if _job_workers is None:
+            _job_workers = JobWorkers(get_job_queue(), _run_job)
+        return _job_workers
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(
+    file: UploadFile,
+    language: Optional[str] = Form(None),
+    priority: str = Form("normal"),
+):
+    """
+    Queue an audio file for transcription and return at once with the job id.
+    Poll GET /jobs/{id} for status, progress and the result; priority is one of
+    the lanes high, normal or low.
+    """
+    header = await file.read(HEADER_PROBE_BYTES)
+    await file.seek(0)
+    if not FileHandler.validate_audio_format(file.filename, header):
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format. Supported formats: {', '.join(supported_formats())}",
+        )
+    try:
+        # Jobs exist for long recordings, so only corrupt headers and sample rates are refused
+        admit_header(header, max_seconds=None)
+    except AdmissionError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if language and language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language. Choose one of: {', '.join(SUPPORTED_LANGUAGES)}",
+        )
+    if priority not in PRIORITY_LANES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported priority. Choose one of: {', '.join(PRIORITY_LANES)}",
+        )
+
+    too_large = HTTPException(
+        status_code=413, detail=f"File exceeds the maximum of {JOB_MAX_BYTES} bytes"
+    )
+    if (file.size or 0) > JOB_MAX_BYTES:
+        raise too_large
+
+    # The audio is held in memory until it is in the database, so it counts against the
+    # upload store's budget; reserved before reading when the size is known
+    reserved = 0
+    try:
+        if file.size:
+            await upload_store.reserve(file.size)
+            reserved = file.size
+        audio = await file.read(JOB_MAX_BYTES + 1)
+        if len(audio) > JOB_MAX_BYTES:
+            raise too_large
+        if not reserved:
+            await upload_store.reserve(len(audio))
+            reserved = len(audio)
+        BYTES_PROCESSED.inc("upload", amount=len(audio))
+
+        # Hashing and writing the audio into the database are blocking
+        digest = await run_in_threadpool(lambda: hashlib.sha256(audio).hexdigest())
+        job = await run_in_threadpool(
+            get_job_queue().submit, audio, digest, language, priority, file.filename
+        )
+    except UploadStoreFullError as e:
+        logger.warning(f"Rejecting job: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy receiving other files. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except JobQueueFullError as e:
+        logger.warning(f"Rejecting job: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Too many queued jobs. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    finally:
+        upload_store.unreserve(reserved)
+    # Normally started with the app; covers deployments that skip the lifespan hooks
+    get_job_workers().start()
+    logger.info(f"Queued job {job['id']} in the {priority} lane")
+    return JSONResponse(
+        status_code=202, content=job, headers={"Location": f"/jobs/{job['id']}"}
+    )
+
+
+@router.get("/jobs")
+async def job_queue_stats():
+    """Job counts by status and queued jobs by lane"""
+    # Queue calls wait for the database lock, which job workers hold while writing audio
+    stats = await run_in_threadpool(get_job_queue().stats)
+    return {**stats, "workers_running": get_job_workers().running}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Status, progress and, once done, the result of a job"""
+    job = await run_in_threadpool(get_job_queue().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@router.delete("/jobs/{job_id}")
+async def cancel_job(job_id: str):
+    """Cancel a queued job, or stop a running one after its current phrase"""
+    job = await run_in_threadpool(get_job_queue().cancel, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    if job["status"] in ("done", "failed"):
+        raise HTTPException(status_code=409, detail=f"Job already {job['status']}")
+    return job
@@ -1,84 +1,281 @@
-from fastapi import APIRouter, UploadFile, HTTPException
+from fastapi import APIRouter, UploadFile, HTTPException, Form
 from fastapi.responses import JSONResponse
-import os
+from starlette.concurrency import run_in_threadpool
 import logging
-from typing import Union
-from pathlib import Path
-
-# Add debugging for imports
-print("speech.py: Starting imports...")
-try:
-    from core.speech_recognition import SpeechRecognizer
-    print("speech.py: Successfully imported SpeechRecognizer")
-except Exception as e:
-    print(f"speech.py: Failed to import SpeechRecognizer: {e}")
-    SpeechRecognizer = None
-
-try:
-    from core.file_handler import FileHandler
-    print("speech.py: Successfully imported FileHandler")
-except Exception as e:
-    print(f"speech.py: Failed to import FileHandler: {e}")
-    FileHandler = None
-
-try:
-    from config.settings import USE_MEMORY_STORAGE
-    print("speech.py: Successfully imported USE_MEMORY_STORAGE")
-except Exception as e:
-    print(f"speech.py: Failed to import USE_MEMORY_STORAGE: {e}")
-    USE_MEMORY_STORAGE = False
+from typing import Optional
+
+# Only light modules here; the recognition stack is loaded by core.startup on first use
+from core.admission import (
+    AdmissionError,
+    admit_header,
+    check_audio_info,
+    check_decoded,
+    corrupt,
+)
+from core.file_handler import FileHandler
+from core.formats import HEADER_PROBE_BYTES, RECORDING_MIME_TYPES, supported_formats
+from core.metrics import BYTES_PROCESSED, Timings, current_timings, span
+from core.recognition_worker import recognition_job
+from core.result_cache import ResultCache
+from core.startup import load_speech_recognizer
+from core.upload_store import UploadStoreFullError, upload_store
+from core.worker_pool import PoolSaturatedError, get_recognition_pool
+from config.settings import (
+    INGEST_TARGET_RATE,
+    RECORDING_BITRATE,
+    RESULT_CACHE_ENABLED,
+    RESUMABLE_CHUNK_SIZE,
+    RESUMABLE_THRESHOLD,
+    SUPPORTED_FORMATS,
+    SUPPORTED_LANGUAGES,
+    USE_MEMORY_STORAGE,
+)
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-speech_recognizer = SpeechRecognizer()
-file_handler = FileHandler()
+recognition_pool = get_recognition_pool()
+result_cache = ResultCache() if RESULT_CACHE_ENABLED else None
+
+
+def transcription_content(result: Optional[dict]) -> Optional[dict]:
+    """Response body for a recognition result, or None when nothing was recognised"""
+    if result and result.get("no_speech"):
+        # Silence is an answer, not a failure
+        return {
+            "text": "",
+            "confidence": 0.0,
+            "language": result.get("language"),
+            "service": None,
+            "segments": [],
+            "no_speech": True,
+            "success": True,
+        }
+    if not result or not result.get("text"):
+        return None
+    return {
+        "text": result["text"],
+        "confidence": result.get("confidence", 0),
+        "language": result.get("language"),
+        "service": result.get("service", "Unknown"),
+        "segments": result.get("segments", []),
+        "success": True,
+    }
+
 
 @router.post("/transcribe")
-async def transcribe_file(file: UploadFile):
+async def transcribe_file(
+    file: UploadFile, language: Optional[str] = Form(None), debug: bool = Form(False)
+):
     """
     Endpoint to transcribe an uploaded audio file
     Works with both file system and memory storage for Vercel compatibility
+    An optional language form field (e.g. "hi-IN") skips language identification
+    With debug=true the response includes how long each stage took
     """
     file_reference = None
+    decoded = None
+    # Spans on the worker threads find the timings through the request's context
+    timings = Timings() if debug else None
+    timings_token = current_timings.set(timings)
     try:
-        if not file_handler.validate_audio_format(file.filename):
+        # Only slow on the first request of a lazily started instance
+        speech_recognizer = await load_speech_recognizer()
+        BYTES_PROCESSED.inc("upload", amount=file.size or 0)
+        # The format is probed from the content rather than trusted from the filename
+        with span("upload_read"):
+            header = await file.read(HEADER_PROBE_BYTES)
+            await file.seek(0)
+        if not FileHandler.validate_audio_format(file.filename, header):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file format. Supported formats: {', '.join(supported_formats())}",
+            )
+        # Corrupt headers and out-of-range sample rates or durations are turned away
+        # before anything is stored or decoded
+        info = admit_header(header)
+
+        if language and language not in SUPPORTED_LANGUAGES:
             raise HTTPException(
                 status_code=400,
-                detail="Unsupported file format. Please upload WAV, AIFF, MP3 or FLAC files only."
+                detail=f"Unsupported language. Choose one of: {', '.join(SUPPORTED_LANGUAGES)}",
             )
-        
-        # Save the uploaded file (to memory or disk based on environment)
-        file_reference = await file_handler.save_upload_file(file)
-        logger.info(f"File {'stored in memory' if USE_MEMORY_STORAGE else 'saved to disk'}")
-        
-        # Transcribe the audio file with enhanced features
-        result = speech_recognizer.transcribe_audio(file_reference)
-        logger.info("Transcription completed successfully")
-        
-        if result and result.get("text"):
-            return JSONResponse(content={
-                "text": result["text"],
-                "confidence": result.get("confidence", 0),
-                "service": result.get("service", "Unknown"),
-                "success": True
-            })
+
+        # WAV is decoded while it is read, without keeping a copy of the file
+        if info.audio_format == "wav":
+            # Loaded along with the recognizer; imported here to keep importing the routes light
+            from core.audio_ingest import ingest_wav_upload
+
+            # Reading and decoding are one pass here, timed together
+            with span("ingest"):
+                decoded = await ingest_wav_upload(file)
+            logger.info("WAV upload decoded while streaming")
+            if info.duration is None:
+                # Streamed WAV without sizes in its header; the decoded length is known now
+                check_decoded(decoded.audio_data)
         else:
-            raise HTTPException(status_code=400, detail="Could not transcribe the audio file")
-            
+            # Save the uploaded file (to memory or disk based on environment)
+            with span("save"):
+                file_reference = await FileHandler.save_upload_file(file)
+            logger.info(
+                f"File {'stored in memory' if USE_MEMORY_STORAGE else 'saved to disk'}"
+            )
+            if info.duration is None:
+                await admit_stored(file_reference, info.audio_format)
+
+        if decoded is not None:
+            return await recognize_upload(
+                speech_recognizer, decoded.audio_data, decoded.digest, language, timings
+            )
+        return await recognize_upload(
+            speech_recognizer, file_reference, None, language, timings
+        )
+
     except HTTPException as he:
         # Re-raise HTTP exceptions as they are already properly formatted
         raise he
+    except AdmissionError as e:
+        logger.info(f"Rejecting upload ({e.reason}): {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except (PoolSaturatedError, UploadStoreFullError) as e:
+        logger.warning(f"Rejecting transcription request: {str(e)}")
+        raise HTTPException(
+            status_code=503,
+            detail="Server is busy transcribing other files. Please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     except Exception as e:
         logger.error(f"Error processing audio file: {str(e)}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
     finally:
-        # Clean up the file (either from memory or disk)
-        if file_reference:
-            try:
-                FileHandler.cleanup_file(file_reference)
-                logger.info(f"Temporary {'memory' if isinstance(file_reference, str) else 'disk'} file cleaned up")
-            except Exception as e:
-                logger.error(f"Error cleaning up file: {str(e)}")
\ No newline at end of file
+        with span("cleanup"):
+            if decoded is not None:
+                decoded.release()
+            # Clean up the file (either from memory or disk)
+            if file_reference:
+                try:
+                    await FileHandler.release_file(file_reference)
+                    logger.info(
+                        f"Temporary {'memory' if isinstance(file_reference, str) else 'disk'} file cleaned up"
+                    )
+                except Exception as e:
+                    logger.error(f"Error cleaning up file: {str(e)}")
+        current_timings.reset(timings_token)
+
+
+async def admit_stored(file_reference, audio_format: Optional[str]) -> None:
+    """Admission checks of a stored compressed upload, from its container headers and still without decoding"""
+    with span("probe"):
+        try:
+            info = await run_in_threadpool(
+                FileHandler.probe_container, file_reference, audio_format
+            )
+        except ValueError as e:
+            raise corrupt(e)
+    check_audio_info(info)
+
+
+async def recognize_upload(
+    speech_recognizer,
+    audio,
+    digest: Optional[str],
+    language: Optional[str],
+    timings: Optional[Timings],
+) -> JSONResponse:
+    """
+    The /transcribe response for an admitted upload: decoded audio or a stored file
+    reference, as recognition_job takes them. digest identifies the content for the
+    result cache and is computed from the stored file when not given.
+    """
+    # Identical uploads with the same language and backends reuse the earlier result
+    cache_key = None
+    if result_cache is not None:
+        with span("cache_lookup"):
+            if digest is None:
+                digest = await run_in_threadpool(FileHandler.content_digest, audio)
+            cache_key = ResultCache.make_key(
+                digest, language, speech_recognizer.backend_chain
+            )
+            cached = await result_cache.get_async(cache_key)
+        if cached is not None:
+            logger.info("Returning cached transcription")
+            return JSONResponse(
+                content=_with_timings({**cached, "cached": True}, timings)
+            )
+
+    # Transcribe on the worker pool so the event loop keeps serving other requests;
+    # worker processes get the audio through shared memory
+    with recognition_job(recognition_pool, speech_recognizer, audio, language) as job:
+        result = await recognition_pool.run(*job)
+    logger.info("Transcription completed successfully")
+
+    content = transcription_content(result)
+    if content is None:
+        raise HTTPException(
+            status_code=400, detail="Could not transcribe the audio file"
+        )
+    if cache_key is not None:
+        await result_cache.set_async(cache_key, content)
+    return JSONResponse(content=_with_timings({**content, "cached": False}, timings))
+
+
+def _with_timings(content: dict, timings: Optional[Timings]) -> dict:
+    """Response body with the stage breakdown when the request asked for it"""
+    if timings is not None:
+        content["timings"] = timings.as_dict()
+    return content
+
+
+@router.get("/transcribe/formats")
+async def upload_formats():
+    """
+    What clients should upload. Audio is recognised as 16-bit mono at INGEST_TARGET_RATE,
+    so anything more is downsampled on arrival; the UI records in the first of
+    recording_mime_types its browser supports, or else sends WAV already at this rate.
+    """
+    formats = await run_in_threadpool(supported_formats)
+    return {
+        "formats": list(formats),
+        "extensions": list(SUPPORTED_FORMATS),
+        "sample_rate": INGEST_TARGET_RATE,
+        "channels": 1,
+        "recording_mime_types": [
+            mime
+            for audio_format, mime in RECORDING_MIME_TYPES
+            if audio_format in formats
+        ],
+        "recording_bitrate": RECORDING_BITRATE,
+        # Larger files go through /uploads in chunks, so a dropped connection only costs one chunk
+        "resumable": {
+            "endpoint": "/uploads",
+            "threshold": RESUMABLE_THRESHOLD,
+            "chunk_size": RESUMABLE_CHUNK_SIZE,
+        },
+    }
+
+
+@router.get("/transcribe/pool")
+async def transcription_pool_stats():
+    """Queue depth and in-flight counters of the recognition worker pool"""
+    return recognition_pool.stats()
+
+
+@router.get("/transcribe/backends")
+async def recognition_backend_stats():
+    """Latency percentiles, error rates and circuit state of the recognition backends"""
+    return (await load_speech_recognizer()).backends.stats()
+
+
+@router.get("/transcribe/uploads")
+async def upload_store_stats():
+    """Resident size and pressure counters of the upload store"""
+    return upload_store.stats()
+
+
+@router.get("/transcribe/cache")
+async def transcription_cache_stats():
+    """Hit/miss counters of the transcription result cache"""
+    if result_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **result_cache.stats()}
@@ -0,0 +1,210 @@
+import asyncio
+import json
+import logging
+from typing import TYPE_CHECKING, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from config.settings import (
+    STREAM_DEFAULT_SAMPLE_RATE,
+    STREAM_PARTIAL_INTERVAL,
+    SUPPORTED_LANGUAGES,
+)
+from core.recognition_worker import recognition_job
+from core.startup import load_speech_recognizer
+from core.worker_pool import PoolSaturatedError, get_recognition_pool
+
+if TYPE_CHECKING:
+    from core.segmenter import AudioSegment
+    from core.speech_recognition import SpeechRecognizer
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+recognition_pool = get_recognition_pool()
+
+
+class TranscriptionStream:
+    """
+    Per-connection state for /ws/transcribe.
+    Closed segments are recognised as soon as they close, concurrently with the
+    audio still arriving, and results are sent back tagged with their segment index.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        speech_recognizer: "SpeechRecognizer",
+        sample_rate: int,
+        language: Optional[str],
+    ):
+        # Loaded along with the recognizer; imported here to keep importing the routes light
+        from core.segmenter import EnergySegmenter
+
+        self.websocket = websocket
+        self.speech_recognizer = speech_recognizer
+        self.language = language
+        self.segmenter = EnergySegmenter.from_recognizer(
+            speech_recognizer.config, sample_rate
+        )
+        self.tasks = set()
+        self._send_lock = asyncio.Lock()
+        self._partial_task: Optional[asyncio.Task] = None
+        self._partial_at = 0.0
+
+    async def send(self, message: dict) -> None:
+        # Recognition tasks finish in any order, so serialise writes to the socket
+        async with self._send_lock:
+            await self.websocket.send_json(message)
+
+    def feed(self, pcm: bytes) -> None:
+        for segment in self.segmenter.feed(pcm):
+            self._start(self._recognize_final(segment))
+            self._partial_at = 0.0
+        self._maybe_partial()
+
+    async def finish(self) -> None:
+        segment = self.segmenter.flush()
+        if segment is not None:
+            self._start(self._recognize_final(segment))
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.send({"type": "done"})
+
+    def cancel(self) -> None:
+        for task in self.tasks:
+            task.cancel()
+
+    def _start(self, coroutine) -> asyncio.Task:
+        task = asyncio.ensure_future(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    def _maybe_partial(self) -> None:
+        """Recognise the phrase still being spoken every STREAM_PARTIAL_INTERVAL seconds"""
+        duration = self.segmenter.open_duration
+        if duration - self._partial_at < STREAM_PARTIAL_INTERVAL:
+            return
+        if self._partial_task is not None and not self._partial_task.done():
+            return
+        self._partial_at = duration
+        self._partial_task = self._start(
+            self._recognize_partial(
+                self.segmenter.open_index, self.segmenter.open_audio()
+            )
+        )
+
+    async def _recognize_partial(self, index: int, audio_data) -> None:
+        try:
+            with recognition_job(
+                recognition_pool,
+                self.speech_recognizer,
+                audio_data,
+                self.language,
+                calibrate=False,
+            ) as job:
+                result = await recognition_pool.run(*job)
+        except PoolSaturatedError:
+            # Partials are best effort; the final result for this segment will still come
+            return
+        except Exception as e:
+            logger.debug(f"Partial recognition failed for segment {index}: {str(e)}")
+            return
+        await self.send({"type": "partial", "segment": index, "text": result["text"]})
+
+    async def _recognize_final(self, segment: "AudioSegment") -> None:
+        message = {
+            "segment": segment.index,
+            "start": round(segment.start, 2),
+            "end": round(segment.end, 2),
+        }
+        try:
+            with recognition_job(
+                recognition_pool,
+                self.speech_recognizer,
+                segment.to_audio_data(),
+                self.language,
+                calibrate=False,
+            ) as job:
+                result = await recognition_pool.run(*job)
+        except PoolSaturatedError as e:
+            await self.send(
+                {
+                    **message,
+                    "type": "error",
+                    "detail": "Server is busy",
+                    "retry_after": e.retry_after,
+                }
+            )
+            return
+        except Exception as e:
+            await self.send({**message, "type": "error", "detail": str(e)})
+            return
+
+        # Later segments of the same stream are almost always in the same language
+        if self.language is None and result.get("language"):
+            self.language = result["language"]
+        await self.send(
+            {
+                **message,
+                "type": "final",
+                "text": result["text"],
+                "confidence": result.get("confidence", 0.0),
+                "language": result.get("language"),
+                "service": result.get("service"),
+            }
+        )
+
+
+@router.websocket("/ws/transcribe")
+async def transcribe_stream(websocket: WebSocket):
+    """
+    Streaming transcription.
+    Query parameters: sample_rate (of the PCM sent, default 16000) and optional language.
+    The client sends binary messages of 16-bit little-endian mono PCM and a text
+    message {"event": "stop"} when done. The server replies with JSON messages of
+    type "partial", "final", "error" and finally "done".
+    """
+    await websocket.accept()
+    params = websocket.query_params
+    language = params.get("language") or None
+    try:
+        sample_rate = int(params.get("sample_rate", STREAM_DEFAULT_SAMPLE_RATE))
+    except ValueError:
+        sample_rate = 0
+    if not 8000 <= sample_rate <= 192000 or (
+        language and language not in SUPPORTED_LANGUAGES
+    ):
+        await websocket.send_json(
+            {"type": "error", "detail": "Invalid sample_rate or language"}
+        )
+        await websocket.close(code=1003)
+        return
+
+    stream = TranscriptionStream(
+        websocket, await load_speech_recognizer(), sample_rate, language
+    )
+    try:
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                raise WebSocketDisconnect(message.get("code", 1000))
+            if message.get("bytes") is not None:
+                stream.feed(message["bytes"])
+            elif message.get("text") is not None:
+                try:
+                    event = json.loads(message["text"]).get("event")
+                except (ValueError, AttributeError):
+                    event = None
+                if event == "stop":
+                    break
+        await stream.finish()
+        await websocket.close()
+    except WebSocketDisconnect:
+        logger.info("Streaming client disconnected")
+        stream.cancel()
+    except Exception as e:
+        logger.error(f"Streaming transcription failed: {str(e)}", exc_info=True)
+        stream.cancel()
@@ -0,0 +1,219 @@
+import logging
+from typing import Optional
+
+from fastapi import APIRouter, Form, Header, HTTPException, Request
+from fastapi.responses import JSONResponse, Response
+from starlette.requests import ClientDisconnect
+
+from config.settings import (
+    RESUMABLE_CHUNK_SIZE,
+    RESUMABLE_MAX_BYTES,
+    RESUMABLE_MAX_CHUNK_BYTES,
+    SUPPORTED_LANGUAGES,
+)
+from core.admission import AdmissionError
+from core.metrics import BYTES_PROCESSED, UPLOAD_CHUNKS, Timings, current_timings
+from core.resumable import (
+    TooManySessionsError,
+    UploadSession,
+    UploadSessionError,
+    resumable_uploads,
+    verify_checksum,
+)
+from core.startup import load_speech_recognizer
+from core.upload_store import UploadStoreFullError
+from core.worker_pool import PoolSaturatedError
+from routes.speech import admit_stored, recognize_upload
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+def _session(upload_id: str) -> UploadSession:
+    session = resumable_uploads.get(upload_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Upload not found or expired")
+    return session
+
+
+def _busy(e) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="Server is busy. Please retry shortly.",
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
+
+@router.post("/uploads", status_code=201)
+async def create_upload(
+    size: int = Form(...),
+    filename: str = Form("upload"),
+    language: Optional[str] = Form(None),
+):
+    """
+    Start a resumable upload of size bytes. Send the file with PATCH /uploads/{id}
+    in chunks, then POST /uploads/{id}/finalize to transcribe it. After a dropped
+    connection, GET /uploads/{id} gives the offset to resume from.
+    """
+    if size <= 0:
+        raise HTTPException(status_code=400, detail="size must be positive")
+    if size > RESUMABLE_MAX_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File exceeds the maximum of {RESUMABLE_MAX_BYTES} bytes",
+        )
+    if language and language not in SUPPORTED_LANGUAGES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported language. Choose one of: {', '.join(SUPPORTED_LANGUAGES)}",
+        )
+    try:
+        session = resumable_uploads.create(filename, size, language)
+    except TooManySessionsError as e:
+        logger.warning(f"Rejecting upload: {str(e)}")
+        raise _busy(e)
+    return JSONResponse(
+        status_code=201,
+        content={
+            **session.describe(),
+            "chunk_size": min(RESUMABLE_CHUNK_SIZE, RESUMABLE_MAX_CHUNK_BYTES),
+        },
+        headers={"Location": f"/uploads/{session.id}"},
+    )
+
+
+@router.get("/uploads")
+async def resumable_upload_stats():
+    """Open resumable uploads and the bytes they hold"""
+    return resumable_uploads.stats()
+
+
+@router.get("/uploads/{upload_id}")
+async def upload_status(upload_id: str):
+    """How much of the upload has arrived; resume by sending the chunk at offset"""
+    session = _session(upload_id)
+    return JSONResponse(
+        content=session.describe(), headers={"Upload-Offset": str(session.offset)}
+    )
+
+
+@router.patch("/uploads/{upload_id}")
+async def append_chunk(
+    upload_id: str,
+    request: Request,
+    upload_offset: int = Header(...),
+    upload_checksum: str = Header(...),
+):
+    """
+    Append the request body at Upload-Offset. Upload-Checksum is "crc32 <hex>" or
+    "sha256 <hex>" of the body; a chunk that does not match it, or that starts
+    anywhere but the current offset, is refused whole and can be sent again.
+    """
+    session = _session(upload_id)
+    if int(request.headers.get("content-length") or 0) > RESUMABLE_MAX_CHUNK_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Chunks are limited to {RESUMABLE_MAX_CHUNK_BYTES} bytes",
+        )
+
+    data = bytearray()
+    try:
+        async for part in request.stream():
+            data.extend(part)
+            if len(data) > RESUMABLE_MAX_CHUNK_BYTES:
+                raise HTTPException(
+                    status_code=413,
+                    detail=f"Chunks are limited to {RESUMABLE_MAX_CHUNK_BYTES} bytes",
+                )
+    except ClientDisconnect:
+        # Nothing was applied; the client resumes from the offset it gets back
+        BYTES_PROCESSED.inc("upload", amount=len(data))
+        UPLOAD_CHUNKS.inc("disconnected")
+        logger.info(
+            f"Upload {upload_id} lost its connection after {len(data)} bytes of a chunk"
+        )
+        return Response(status_code=400)
+    BYTES_PROCESSED.inc("upload", amount=len(data))
+
+    try:
+        verify_checksum(data, upload_checksum)
+        async with session.lock:
+            resumable_uploads.check_room(session, len(data))
+            await session.append(upload_offset, data)
+    except UploadSessionError as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.detail,
+            headers={"Upload-Offset": str(session.offset)},
+        )
+    except UploadStoreFullError as e:
+        logger.warning(f"Deferring chunk of upload {upload_id}: {str(e)}")
+        raise _busy(e)
+    except AdmissionError as e:
+        resumable_uploads.discard(upload_id)
+        logger.info(f"Rejecting upload {upload_id} ({e.reason}): {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except ValueError as e:
+        # Corrupt audio past the header; nothing more of it is worth receiving
+        resumable_uploads.discard(upload_id)
+        raise HTTPException(status_code=400, detail=str(e))
+    return JSONResponse(
+        content={"offset": session.offset, "size": session.size},
+        headers={"Upload-Offset": str(session.offset)},
+    )
+
+
+@router.post("/uploads/{upload_id}/finalize")
+async def finalize_upload(upload_id: str, debug: bool = Form(False)):
+    """
+    Transcribe a completely received upload; the response is that of /transcribe.
+    The upload is kept for another attempt when the server answers 503.
+    """
+    session = _session(upload_id)
+    timings = Timings() if debug else None
+    timings_token = current_timings.set(timings)
+    keep = False
+    try:
+        async with session.lock:
+            if not session.complete:
+                keep = True
+                raise HTTPException(
+                    status_code=409,
+                    detail=f"Upload incomplete: {session.offset} of {session.size} bytes received",
+                    headers={"Upload-Offset": str(session.offset)},
+                )
+            speech_recognizer = await load_speech_recognizer()
+            audio = session.audio()
+            if isinstance(audio, str) and session.info.duration is None:
+                await admit_stored(audio, session.info.audio_format)
+            return await recognize_upload(
+                speech_recognizer, audio, session.digest, session.language, timings
+            )
+    except HTTPException:
+        raise
+    except AdmissionError as e:
+        logger.info(f"Rejecting upload {upload_id} ({e.reason}): {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    except (PoolSaturatedError, UploadStoreFullError) as e:
+        keep = True
+        logger.warning(f"Deferring finalize of upload {upload_id}: {str(e)}")
+        raise _busy(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error transcribing upload {upload_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if not keep:
+            resumable_uploads.discard(upload_id)
+        current_timings.reset(timings_token)
+
+
+@router.delete("/uploads/{upload_id}", status_code=204)
+async def cancel_upload(upload_id: str):
+    """Abandon an upload and free what it holds"""
+    _session(upload_id)
+    resumable_uploads.discard(upload_id)
+    return Response(status_code=204)
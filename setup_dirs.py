@@ -2,6 +2,7 @@
 A simple script to ensure required directories exist for deployment.
 This helps prevent errors when deploying to Vercel or similar platforms.
 """
+
 import os
 from pathlib import Path
 
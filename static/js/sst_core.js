@@ -0,0 +1,778 @@
+// Elements
+const recordOption = document.getElementById('record-option');
+const uploadOption = document.getElementById('upload-option');
+const audioFileInput = document.getElementById('audio-file');
+const recordBtn = document.getElementById('record-btn');
+const statusText = document.getElementById('status-text');
+const statusIndicator = document.querySelector('.status-indicator');
+const convertBtn = document.getElementById('convert-btn');
+const clearBtn = document.getElementById('clear-btn');
+const copyBtn = document.getElementById('copy-btn');
+const downloadBtn = document.getElementById('download-btn');
+const resultsEmpty = document.getElementById('results-empty');
+const transcriptionResult = document.getElementById('transcription-result');
+const transcriptionText = document.getElementById('transcription-text');
+const resultTimestamp = document.getElementById('result-timestamp');
+const wordCount = document.getElementById('word-count');
+const loadingOverlay = document.getElementById('loading-overlay');
+const errorAlert = document.querySelector('.error-alert');
+const errorMessage = document.getElementById('error-message');
+const visualizerBars = document.querySelectorAll('.visualizer-bar');
+const audioControls = document.getElementById('audio-controls');
+const audioPlayer = document.getElementById('audio-player');
+const playPauseBtn = document.getElementById('play-pause-btn');
+const progressSlider = document.getElementById('progress-slider');
+const progressBarFill = document.getElementById('progress-bar-fill');
+const currentTime = document.getElementById('current-time');
+const totalTime = document.getElementById('total-time');
+const recordingDuration = document.getElementById('recording-duration');
+const audioSpectrum = document.getElementById('audio-spectrum');
+const spectrumBars = audioSpectrum.querySelectorAll('.spectrum-bar');
+const rewindBtn = document.getElementById('rewind-btn');
+const forwardBtn = document.getElementById('forward-btn');
+const downloadAudioBtn = document.getElementById('download-audio-btn');
+const convertBtnMobile = document.getElementById('convert-btn-mobile');
+const clearBtnMobile = document.getElementById('clear-btn-mobile');
+
+// API endpoint
+const API_ENDPOINT = '/transcribe';
+const FORMATS_ENDPOINT = '/transcribe/formats';
+const STREAM_ENDPOINT = `${window.location.protocol === 'https:' ? 'wss' : 'ws'}://${window.location.host}/ws/transcribe`;
+
+// Global variables
+let isRecording = false;
+let audioBlob;
+let visualizerAnimation;
+let spectrumAnimation;
+let audioContext;
+let audioStream;
+let audioRecorder;
+let liveSocket;
+let liveContext;
+let liveProcessor;
+let liveSegments = {};
+
+// Skip forward/backward by 5 seconds
+const SKIP_TIME = 5;
+
+// What the server recognises and decodes, from FORMATS_ENDPOINT; these defaults apply until it answers
+let uploadFormat = { sample_rate: 16000, channels: 1, recording_mime_types: [], recording_bitrate: 32000 };
+const UPLOAD_EXTENSIONS = { 'audio/webm': 'webm', 'audio/ogg': 'ogg', 'audio/mp4': 'm4a', 'audio/wav': 'wav' };
+
+fetch(FORMATS_ENDPOINT)
+    .then(response => (response.ok ? response.json() : null))
+    .then(format => {
+        if (format) uploadFormat = format;
+    })
+    .catch(err => console.warn('Using default upload format:', err));
+
+// Utility functions
+function formatTime(seconds) {
+    if (!seconds || isNaN(seconds)) return '00:00';
+    const mins = Math.floor(seconds / 60);
+    const secs = Math.floor(seconds % 60);
+    return `${mins.toString().padStart(2, '0')}:${secs.toString().padStart(2, '0')}`;
+}
+
+function extensionFor(blob) {
+    return UPLOAD_EXTENSIONS[blob.type.split(';')[0]] || 'wav';
+}
+
+// The first compressed format both this browser and the server support, if any
+function pickRecordingMimeType() {
+    if (!window.MediaRecorder || !MediaRecorder.isTypeSupported) return null;
+    return uploadFormat.recording_mime_types.find(type => MediaRecorder.isTypeSupported(type)) || null;
+}
+
+// 16-bit mono PCM WAV, the layout the server ingests without decoding
+function encodeWav(samples, sampleRate) {
+    const view = new DataView(new ArrayBuffer(44 + samples.length * 2));
+    const writeString = (offset, text) => {
+        for (let i = 0; i < text.length; i++) view.setUint8(offset + i, text.charCodeAt(i));
+    };
+    writeString(0, 'RIFF');
+    view.setUint32(4, 36 + samples.length * 2, true);
+    writeString(8, 'WAVE');
+    writeString(12, 'fmt ');
+    view.setUint32(16, 16, true);
+    view.setUint16(20, 1, true);
+    view.setUint16(22, 1, true);
+    view.setUint32(24, sampleRate, true);
+    view.setUint32(28, sampleRate * 2, true);
+    view.setUint16(32, 2, true);
+    view.setUint16(34, 16, true);
+    writeString(36, 'data');
+    view.setUint32(40, samples.length * 2, true);
+    for (let i = 0; i < samples.length; i++) {
+        const sample = Math.max(-1, Math.min(1, samples[i]));
+        view.setInt16(44 + i * 2, sample < 0 ? sample * 0x8000 : sample * 0x7FFF, true);
+    }
+    return new Blob([view], { type: 'audio/wav' });
+}
+
+// Downmix and resample to the server's rate with the browser's own (filtered) resampler
+async function toUploadWav(audioBuffer) {
+    const rate = Math.min(uploadFormat.sample_rate, audioBuffer.sampleRate);
+    const offline = new OfflineAudioContext(1, Math.max(1, Math.ceil(audioBuffer.duration * rate)), rate);
+    const source = offline.createBufferSource();
+    source.buffer = audioBuffer;
+    source.connect(offline.destination);
+    source.start();
+    const rendered = await offline.startRendering();
+    return encodeWav(rendered.getChannelData(0), rate);
+}
+
+// Record in a compressed format when one is negotiated, else as WAV at the server's rate
+function createAudioRecorder(stream) {
+    const mimeType = pickRecordingMimeType();
+    return mimeType ? createCompressedRecorder(stream, mimeType) : createWavRecorder(stream);
+}
+
+function createCompressedRecorder(stream, mimeType) {
+    const recorder = new MediaRecorder(stream, { mimeType, audioBitsPerSecond: uploadFormat.recording_bitrate });
+    const chunks = [];
+    let recording = null;
+    let onExport = null;
+    recorder.ondataavailable = (e) => {
+        if (e.data.size) chunks.push(e.data);
+    };
+    recorder.onstop = () => {
+        recording = new Blob(chunks, { type: recorder.mimeType || mimeType });
+        if (onExport) onExport(recording);
+    };
+    return {
+        record: () => recorder.start(),
+        stop: () => {
+            if (recorder.state !== 'inactive') recorder.stop();
+        },
+        exportAudio: (callback) => {
+            if (recording) callback(recording);
+            else onExport = callback;
+        }
+    };
+}
+
+function createWavRecorder(stream) {
+    const context = new (window.AudioContext || window.webkitAudioContext)();
+    // Recorder.js records at the context's rate, often 48 kHz, whatever it is configured with
+    const recorder = new Recorder(context.createMediaStreamSource(stream), { numChannels: 1 });
+    return {
+        record: () => recorder.record(),
+        stop: () => recorder.stop(),
+        exportAudio: (callback) => recorder.getBuffer(async (buffers) => {
+            const recorded = context.createBuffer(1, Math.max(1, buffers[0].length), context.sampleRate);
+            recorded.getChannelData(0).set(buffers[0]);
+            context.close();
+            callback(await toUploadWav(recorded));
+        })
+    };
+}
+
+// Uncompressed files above the server's rate or channel count are downsampled before upload
+async function shrinkUpload(file) {
+    if (!/\.wav$/i.test(file.name) && !/wav/i.test(file.type)) return file;
+    try {
+        const context = new (window.AudioContext || window.webkitAudioContext)();
+        const decoded = await context.decodeAudioData(await file.arrayBuffer());
+        context.close();
+        const wav = await toUploadWav(decoded);
+        return wav.size < file.size ? new File([wav], file.name, { type: 'audio/wav' }) : file;
+    } catch (err) {
+        console.warn('Uploading the file as is:', err);
+        return file;
+    }
+}
+
+// Large files go up in checksummed chunks; after a dropped connection only the unfinished chunk is sent again
+const UPLOAD_RETRIES = 8;
+// Statuses after which the upload resumes from the server's offset rather than failing
+const RESUMABLE_STATUSES = [409, 422, 503];
+const CRC32_TABLE = Array.from({ length: 256 }, (_, n) => {
+    let c = n;
+    for (let k = 0; k < 8; k++) c = c & 1 ? 0xedb88320 ^ (c >>> 1) : c >>> 1;
+    return c >>> 0;
+});
+
+function crc32(bytes) {
+    let crc = 0xffffffff;
+    for (let i = 0; i < bytes.length; i++) crc = CRC32_TABLE[(crc ^ bytes[i]) & 0xff] ^ (crc >>> 8);
+    return ((crc ^ 0xffffffff) >>> 0).toString(16).padStart(8, '0');
+}
+
+async function uploadOffset(endpoint) {
+    const response = await fetch(endpoint).catch(() => null);
+    if (!response) return null;
+    if (response.status === 404) throw new Error('The upload expired. Please try again.');
+    return response.ok ? (await response.json()).offset : null;
+}
+
+// Resolves to the finalize response, or to the response that ended the upload
+async function uploadResumable(file) {
+    const { endpoint, chunk_size: chunkSize } = uploadFormat.resumable;
+    // Remembered across page loads, so pressing Convert again resumes the same upload
+    const storageKey = `myra-upload:${file.name}:${file.size}:${file.lastModified || 0}`;
+    let upload = null;
+    const savedId = localStorage.getItem(storageKey);
+    if (savedId) {
+        const response = await fetch(`${endpoint}/${savedId}`).catch(() => null);
+        if (response && response.ok) upload = await response.json();
+    }
+    if (!upload) {
+        const form = new FormData();
+        form.append('size', file.size);
+        form.append('filename', file.name);
+        const response = await fetch(endpoint, { method: 'POST', body: form });
+        if (!response.ok) return response;
+        upload = await response.json();
+        localStorage.setItem(storageKey, upload.id);
+    }
+
+    const uploadUrl = `${endpoint}/${upload.id}`;
+    let offset = upload.offset;
+    let failures = 0;
+    while (offset < file.size) {
+        statusText.textContent = `Uploading ${Math.floor((100 * offset) / file.size)}%`;
+        const chunk = new Uint8Array(await file.slice(offset, offset + (upload.chunk_size || chunkSize)).arrayBuffer());
+        const response = await fetch(uploadUrl, {
+            method: 'PATCH',
+            headers: { 'Upload-Offset': String(offset), 'Upload-Checksum': `crc32 ${crc32(chunk)}` },
+            body: chunk
+        }).catch(() => null);
+        if (response && response.ok) {
+            offset = (await response.json()).offset;
+            failures = 0;
+            continue;
+        }
+        if (response && !RESUMABLE_STATUSES.includes(response.status)) {
+            localStorage.removeItem(storageKey);
+            return response;
+        }
+        if (++failures > UPLOAD_RETRIES) {
+            throw new Error('Upload interrupted. Press Convert again to resume it.');
+        }
+        const retryAfter = Number(response && response.headers.get('Retry-After')) || 0;
+        await new Promise(resolve => setTimeout(resolve, Math.max(retryAfter * 1000, 500 * 2 ** Math.min(failures, 5))));
+        const resumeAt = await uploadOffset(uploadUrl);
+        if (resumeAt !== null) offset = resumeAt;
+    }
+
+    statusText.textContent = 'Transcribing...';
+    const response = await fetch(`${uploadUrl}/finalize`, { method: 'POST' });
+    if (response.status !== 503) localStorage.removeItem(storageKey);
+    return response;
+}
+
+// Stream microphone PCM to the server so text appears while the user is still speaking
+function startLiveTranscription(stream) {
+    try {
+        liveContext = new (window.AudioContext || window.webkitAudioContext)();
+        const source = liveContext.createMediaStreamSource(stream);
+        liveProcessor = liveContext.createScriptProcessor(4096, 1, 1);
+        liveSegments = {};
+
+        liveSocket = new WebSocket(`${STREAM_ENDPOINT}?sample_rate=${liveContext.sampleRate}`);
+        liveSocket.binaryType = 'arraybuffer';
+        liveSocket.onmessage = (event) => renderLiveMessage(JSON.parse(event.data));
+        liveSocket.onerror = (err) => console.warn('Live transcription unavailable:', err);
+
+        liveProcessor.onaudioprocess = (e) => {
+            if (!liveSocket || liveSocket.readyState !== WebSocket.OPEN) return;
+            const input = e.inputBuffer.getChannelData(0);
+            const pcm = new Int16Array(input.length);
+            for (let i = 0; i < input.length; i++) {
+                const sample = Math.max(-1, Math.min(1, input[i]));
+                pcm[i] = sample < 0 ? sample * 0x8000 : sample * 0x7FFF;
+            }
+            liveSocket.send(pcm.buffer);
+        };
+        source.connect(liveProcessor);
+        liveProcessor.connect(liveContext.destination);
+    } catch (err) {
+        console.warn('Live transcription unavailable:', err);
+    }
+}
+
+function stopLiveTranscription() {
+    if (liveProcessor) {
+        liveProcessor.disconnect();
+        liveProcessor = null;
+    }
+    if (liveContext) {
+        liveContext.close();
+        liveContext = null;
+    }
+    // The server flushes the last phrase and replies with "done" before closing
+    if (liveSocket && liveSocket.readyState === WebSocket.OPEN) {
+        liveSocket.send(JSON.stringify({ event: 'stop' }));
+    }
+}
+
+// Segments can finish out of order, so keep them by index and re-render in order
+function renderLiveMessage(message) {
+    if (message.type === 'partial') {
+        if (liveSegments[message.segment] && liveSegments[message.segment].final) return;
+        liveSegments[message.segment] = { text: message.text, final: false };
+    } else if (message.type === 'final') {
+        liveSegments[message.segment] = { text: message.text, final: true };
+    } else {
+        if (message.type === 'done' && liveSocket) liveSocket.close();
+        return;
+    }
+
+    const text = Object.keys(liveSegments)
+        .sort((a, b) => a - b)
+        .map(key => liveSegments[key].text)
+        .join(' ');
+    resultsEmpty.style.display = 'none';
+    transcriptionResult.style.display = 'block';
+    transcriptionText.textContent = text;
+    resultTimestamp.textContent = new Date().toLocaleString();
+    wordCount.textContent = text.split(/\s+/).filter(Boolean).length;
+}
+
+// Initialize audio visualization
+function initAudioVisualization() {
+    // Set random heights for spectrum bars for initial state
+    spectrumBars.forEach(bar => {
+        const height = Math.floor(Math.random() * 50) + 10;
+        bar.style.height = `${height}%`;
+    });
+}
+
+// Create animated spectrum effect
+function animateSpectrum(isPlaying) {
+    if (!isPlaying) return null;
+
+    return setInterval(() => {
+        spectrumBars.forEach(bar => {
+            if (Math.random() > 0.5) {
+                const height = Math.floor(Math.random() * 70) + 20;
+                bar.style.height = `${height}%`;
+            }
+        });
+    }, 200);
+}
+
+// Visualizer animation for recording
+function animateVisualizer(isRecording) {
+    if (isRecording) {
+        const visualizerAnimation = setInterval(() => {
+            visualizerBars.forEach(bar => {
+                const randomHeight = Math.floor(Math.random() * 40) + 5;
+                bar.style.height = `${randomHeight}px`;
+            });
+        }, 100);
+
+        return visualizerAnimation;
+    }
+}
+
+// Audio player event listeners
+audioPlayer.addEventListener('play', () => {
+    playPauseBtn.innerHTML = '<i class="fas fa-pause"></i>';
+    spectrumAnimation = animateSpectrum(true);
+});
+
+audioPlayer.addEventListener('pause', () => {
+    playPauseBtn.innerHTML = '<i class="fas fa-play"></i>';
+    clearInterval(spectrumAnimation);
+});
+
+audioPlayer.addEventListener('loadedmetadata', () => {
+    totalTime.textContent = formatTime(audioPlayer.duration);
+    recordingDuration.textContent = formatTime(audioPlayer.duration);
+    currentTime.textContent = '00:00';
+    progressSlider.value = 0;
+    progressBarFill.style.width = '0%';
+
+    // Initialize spectrum visualization
+    initAudioVisualization();
+});
+
+audioPlayer.addEventListener('timeupdate', () => {
+    if (audioPlayer.duration) {
+        const percent = (audioPlayer.currentTime / audioPlayer.duration) * 100;
+        progressSlider.value = percent;
+        progressBarFill.style.width = `${percent}%`;
+        currentTime.textContent = formatTime(audioPlayer.currentTime);
+    }
+});
+
+audioPlayer.addEventListener('ended', () => {
+    playPauseBtn.innerHTML = '<i class="fas fa-play"></i>';
+    progressSlider.value = 0;
+    progressBarFill.style.width = '0%';
+    currentTime.textContent = '00:00';
+    clearInterval(spectrumAnimation);
+});
+
+// Control buttons event listeners
+progressSlider.addEventListener('input', () => {
+    const seekTime = audioPlayer.duration * (progressSlider.value / 100);
+    progressBarFill.style.width = `${progressSlider.value}%`;
+    audioPlayer.currentTime = seekTime;
+    currentTime.textContent = formatTime(seekTime);
+});
+
+playPauseBtn.addEventListener('click', () => {
+    if (audioPlayer.paused) {
+        audioPlayer.play();
+    } else {
+        audioPlayer.pause();
+    }
+});
+
+rewindBtn.addEventListener('click', () => {
+    audioPlayer.currentTime = Math.max(0, audioPlayer.currentTime - SKIP_TIME);
+});
+
+forwardBtn.addEventListener('click', () => {
+    audioPlayer.currentTime = Math.min(audioPlayer.duration, audioPlayer.currentTime + SKIP_TIME);
+});
+
+// Toggle input options
+recordOption.addEventListener('click', () => {
+    recordOption.classList.add('active');
+    uploadOption.classList.remove('active');
+});
+
+uploadOption.addEventListener('click', () => {
+    uploadOption.classList.add('active');
+    recordOption.classList.remove('active');
+    audioFileInput.click();
+});
+
+// Handle recording
+recordBtn.addEventListener('click', async () => {
+    if (!isRecording) {
+        try {
+            const stream = await navigator.mediaDevices.getUserMedia({ audio: true });
+            audioStream = stream;
+
+            // Create an audio recorder in the negotiated upload format
+            audioRecorder = createAudioRecorder(stream);
+
+            // Start recording
+            audioRecorder.record();
+            startLiveTranscription(stream);
+            isRecording = true;
+
+            // Update UI for recording state
+            recordBtn.innerHTML = '<i class="fas fa-stop"></i>';
+            recordBtn.classList.add('recording');
+            statusText.textContent = 'Recording...';
+            statusIndicator.classList.add('recording');
+
+            // Start visualizer animation
+            visualizerAnimation = animateVisualizer(true);
+
+        } catch (err) {
+            console.error('Error accessing microphone:', err);
+            errorMessage.textContent = 'Could not access microphone. Please check permissions.';
+            errorAlert.style.display = 'flex';
+            setTimeout(() => {
+                errorAlert.style.display = 'none';
+            }, 3000);
+        }
+    } else {
+        // Stop recording
+        audioRecorder.stop();
+        stopLiveTranscription();
+
+        // Compressed recording, or WAV downsampled to the server's rate
+        audioRecorder.exportAudio(blob => {
+            audioBlob = blob;
+
+            // Update UI after recording stops
+            recordBtn.innerHTML = '<i class="fas fa-microphone"></i>';
+            statusText.textContent = 'Recording saved';
+            statusIndicator.classList.remove('recording');
+            recordBtn.classList.remove('recording');
+
+            // Show audio controls and set audio source
+            audioControls.style.display = 'flex';
+            audioPlayer.src = URL.createObjectURL(audioBlob);
+        });
+
+        // Stop all tracks on the stream to release the microphone
+        if (audioStream) {
+            audioStream.getTracks().forEach(track => track.stop());
+        }
+
+        // Reset state
+        isRecording = false;
+        clearInterval(visualizerAnimation);
+
+        // Reset visualizer
+        visualizerBars.forEach(bar => {
+            bar.style.height = '5px';
+        });
+    }
+});
+
+// Handle file upload
+audioFileInput.addEventListener('change', (e) => {
+    if (e.target.files.length > 0) {
+        const fileName = e.target.files[0].name;
+        statusText.textContent = `File selected: ${fileName}`;
+    }
+});
+
+// Convert button - Send to backend API
+const handleConvert = async () => {
+    // Check if we have audio to process
+    if (!audioBlob && !audioFileInput.files[0]) {
+        errorMessage.textContent = 'Please record or upload audio first.';
+        errorAlert.style.display = 'flex';
+        setTimeout(() => {
+            errorAlert.style.display = 'none';
+        }, 3000);
+        return;
+    }
+
+    loadingOverlay.style.display = 'flex';
+
+    try {
+        let audioToSend;
+        let fileName;
+
+        if (audioBlob) {
+            // Create a file from blob with the extension of its format
+            fileName = `recording_${new Date().getTime()}.${extensionFor(audioBlob)}`;
+            audioToSend = new File([audioBlob], fileName, { type: audioBlob.type });
+        } else {
+            audioToSend = await shrinkUpload(audioFileInput.files[0]);
+            fileName = audioToSend.name;
+        }
+
+        console.log(`Sending file: ${fileName} (${audioToSend.type}), size: ${audioToSend.size} bytes`);
+
+        let response;
+        if (uploadFormat.resumable && audioToSend.size > uploadFormat.resumable.threshold) {
+            response = await uploadResumable(audioToSend);
+        } else {
+            const formData = new FormData();
+            formData.append('file', audioToSend);
+
+            // Send to backend using the correct endpoint
+            response = await fetch(API_ENDPOINT, {
+                method: 'POST',
+                body: formData
+            });
+        }
+
+        if (!response.ok) {
+            const errorData = await response.json().catch(() => null);
+            console.error('Server response:', response.status, errorData);
+            throw new Error(`Server responded with ${response.status}: ${errorData?.detail || 'Unknown error'}`);
+        }
+
+        const result = await response.json();
+
+        // Process response
+        loadingOverlay.style.display = 'none';
+
+        // Update UI with transcription results
+        resultsEmpty.style.display = 'none';
+        transcriptionResult.style.display = 'block';
+
+        // Display transcription text
+        transcriptionText.textContent = result.text || '';
+        // If empty, show a message
+        if (!result.text) {
+            transcriptionText.textContent = 'No text detected in audio.';
+        }
+
+        // Update timestamp and word count
+        resultTimestamp.textContent = new Date().toLocaleString();
+        wordCount.textContent = result.text ? result.text.split(/\s+/).filter(Boolean).length : 0;
+
+    } catch (error) {
+        loadingOverlay.style.display = 'none';
+        console.error('Error processing audio:', error);
+        errorMessage.textContent = error.message || 'Error processing audio. Please try again.';
+        errorAlert.style.display = 'flex';
+        setTimeout(() => {
+            errorAlert.style.display = 'none';
+        }, 4000);
+    }
+};
+
+// Attach the convert function to both buttons
+convertBtn.addEventListener('click', handleConvert);
+convertBtnMobile.addEventListener('click', handleConvert);
+
+// Download audio button
+downloadAudioBtn.addEventListener('click', () => {
+    if (audioBlob) {
+        const url = URL.createObjectURL(audioBlob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = `recording.${extensionFor(audioBlob)}`;
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        URL.revokeObjectURL(url);
+    }
+});
+
+// Clear button
+clearBtn.addEventListener('click', () => {
+    // Reset UI
+    resultsEmpty.style.display = 'flex';
+    transcriptionResult.style.display = 'none';
+    audioBlob = null;
+    statusText.textContent = 'Ready to record';
+    audioControls.style.display = 'none';
+
+    if (audioFileInput.value) {
+        audioFileInput.value = '';
+    }
+});
+
+// Clear button (mobile)
+clearBtnMobile.addEventListener('click', () => {
+    // Reset UI (same as clearBtn)
+    resultsEmpty.style.display = 'flex';
+    transcriptionResult.style.display = 'none';
+    audioBlob = null;
+    statusText.textContent = 'Ready to record';
+    audioControls.style.display = 'none';
+
+    if (audioFileInput.value) {
+        audioFileInput.value = '';
+    }
+});
+
+// Copy button
+copyBtn.addEventListener('click', () => {
+    if (transcriptionText.textContent) {
+        navigator.clipboard.writeText(transcriptionText.textContent)
+            .then(() => {
+                copyBtn.innerHTML = '<i class="fas fa-check"></i>';
+                setTimeout(() => {
+                    copyBtn.innerHTML = '<i class="fas fa-copy"></i>';
+                }, 2000);
+            });
+    }
+});
+
+// Download button
+downloadBtn.addEventListener('click', () => {
+    if (transcriptionText.textContent) {
+        const text = transcriptionText.textContent;
+        const blob = new Blob([text], { type: 'text/plain' });
+        const url = URL.createObjectURL(blob);
+        const a = document.createElement('a');
+        a.href = url;
+        a.download = 'transcription.txt';
+        document.body.appendChild(a);
+        a.click();
+        document.body.removeChild(a);
+        URL.revokeObjectURL(url);
+    }
+});
+
+// Create floating dots for background
+const floatingDotsContainer = document.getElementById('floating-dots');
+
+// Create and add dots to the container
+function createFloatingDots() {
+    const dotCount = 80; // More dots for higher density
+
+    for (let i = 0; i < dotCount; i++) {
+        const dot = document.createElement('div');
+        dot.classList.add('dot');
+
+        // Smaller size between 2px and 4px
+        const size = Math.floor(Math.random() * 3) + 2;
+        dot.style.width = `${size}px`;
+        dot.style.height = `${size}px`;
+
+        // Random position
+        const xPos = Math.floor(Math.random() * 100);
+        const yPos = Math.floor(Math.random() * 100);
+        dot.style.left = `${xPos}%`;
+        dot.style.bottom = `${yPos}%`;
+
+        // White dots with low opacity
+        dot.style.background = 'rgba(255, 255, 255, 0.8)';
+        dot.style.opacity = '0.08';
+
+        // Random animation duration
+        const animationDuration = Math.floor(Math.random() * 20) + 20;
+        dot.style.animationDuration = `${animationDuration}s`;
+
+        // Random animation delay
+        const animationDelay = Math.floor(Math.random() * 15);
+        dot.style.animationDelay = `${animationDelay}s`;
+
+        // Random X movement distance (smaller movements)
+        const xDistance = Math.floor(Math.random() * 100) - 50; // between -50px and 50px
+        dot.style.setProperty('--x-distance', `${xDistance}px`);
+
+        floatingDotsContainer.appendChild(dot);
+    }
+}
+
+// Create data stream lines
+function createDataStreams() {
+    const dataStreamContainer = document.querySelector('.data-stream');
+    const streamCount = 15;
+
+    for (let i = 0; i < streamCount; i++) {
+        const dataLine = document.createElement('div');
+        dataLine.classList.add('data-line');
+
+        // Random position and timing
+        const yPos = Math.floor(Math.random() * 100);
+        const animationDelay = Math.floor(Math.random() * 8);
+        const animationDuration = Math.floor(Math.random() * 5) + 5;
+
+        dataLine.style.top = `${yPos}%`;
+        dataLine.style.animationDelay = `${animationDelay}s`;
+        dataLine.style.animationDuration = `${animationDuration}s`;
+
+        dataStreamContainer.appendChild(dataLine);
+    }
+}
+
+// Call all the background creation functions
+createFloatingDots();
+createDataStreams();
+
+// Add ripple effect and functionality to back button
+document.querySelector('.back-button').addEventListener('click', function(e) {
+    const button = this;
+    const ripple = document.createElement('div');
+    const rect = button.getBoundingClientRect();
+    const size = Math.max(rect.width, rect.height);
+
+    ripple.style.width = ripple.style.height = `${size/4}px`;
+    ripple.style.left = `${e.clientX - rect.left - size/8}px`;
+    ripple.style.top = `${e.clientY - rect.top - size/8}px`;
+    ripple.classList.add('ripple');
+
+    button.appendChild(ripple);
+
+    ripple.addEventListener('animationend', () => {
+        ripple.remove();
+        window.location.href = '/projects';
+    });
+
+    e.preventDefault();
+});
+
+// Mobile version of Clear button
+clearBtnMobile.addEventListener('click', () => {
+    // Reset UI
+    resultsEmpty.style.display = 'flex';
+    transcriptionResult.style.display = 'none';
+    audioBlob = null;
+    statusText.textContent = 'Ready to record';
+    audioControls.style.display = 'none';
+
+    if (audioFileInput.value) {
+        audioFileInput.value = '';
+    }
+});
@@ -0,0 +1,11 @@
+import os
+import sys
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).parent.parent
+if str(ROOT_DIR) not in sys.path:
+    sys.path.insert(0, str(ROOT_DIR))
+
+# Settings are read at import; nothing in the tests may reach the real Google service
+os.environ.setdefault("RECOGNITION_BACKENDS", "stub")
+os.environ.setdefault("GOOGLE_SPEECH_URL", "http://127.0.0.1:9/speech-api/v2/recognize")
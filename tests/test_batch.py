@@ -0,0 +1,102 @@
+import asyncio
+import io
+import json
+import math
+import struct
+import wave
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import ClientDisconnect
+
+import routes.batch as batch_module
+from api.main import app
+from core.batch import UploadBatch
+from core.upload_store import UploadStore
+from core.worker_pool import PoolSaturatedError
+
+
+def wav(frequency: float, seconds: float = 0.5, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(
+            b"".join(
+                struct.pack(
+                    "<h", int(8000 * math.sin(2 * math.pi * frequency * i / rate))
+                )
+                for i in range(int(rate * seconds))
+            )
+        )
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(batch_module, "result_cache", None)
+    return TestClient(app)
+
+
+def stream_batch(client, files):
+    with client.stream("POST", "/transcribe/batch", files=files) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        return [json.loads(line) for line in response.iter_lines() if line]
+
+
+def test_batch_streams_a_line_per_file_then_a_summary(client):
+    audio = wav(220)
+    lines = stream_batch(
+        client,
+        [
+            ("files", ("a.wav", audio)),
+            ("files", ("b.wav", wav(330))),
+            ("files", ("a-copy.wav", audio)),
+            ("files", ("notes.txt", b"not audio")),
+        ],
+    )
+
+    by_name = {line["filename"]: line for line in lines[:-1]}
+    assert sorted(line["index"] for line in lines[:-1]) == [0, 1, 2, 3]
+    assert by_name["a.wav"]["success"] and not by_name["a.wav"]["deduplicated"]
+    assert by_name["a-copy.wav"]["success"] and by_name["a-copy.wav"]["deduplicated"]
+    assert not by_name["notes.txt"]["success"]
+    summary = lines[-1]["summary"]
+    assert summary["files"] == 4 and summary["distinct"] == 2
+    assert summary["succeeded"] == 3 and summary["failed"] == 1
+
+
+def test_file_waiting_too_long_for_the_pool_fails_alone(client, monkeypatch):
+    async def saturated(*args):
+        raise PoolSaturatedError(1)
+
+    monkeypatch.setattr(batch_module, "BATCH_POOL_WAIT", 0.2)
+    monkeypatch.setattr(batch_module.recognition_pool, "run", saturated)
+    lines = stream_batch(client, [("files", ("a.wav", wav(440)))])
+
+    assert not lines[0]["success"]
+    assert "busy" in lines[0]["error"]
+    assert lines[-1]["summary"]["failed"] == 1
+
+
+def test_batch_is_released_when_the_client_leaves_before_the_stream():
+    store = UploadStore(max_bytes=1024 * 1024)
+    batch = UploadBatch(store=store)
+    asyncio.run(batch.add("a.wav", wav(550)))
+    assert store.stats()["entries"] == 1
+
+    async def gone(message):
+        raise OSError("client disconnected")
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    response = batch_module.BatchResponse(batch, None)
+    with pytest.raises(ClientDisconnect):
+        asyncio.run(
+            response({"type": "http", "asgi": {"spec_version": "2.4"}}, receive, gone)
+        )
+
+    assert store.stats()["entries"] == 0
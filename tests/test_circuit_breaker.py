@@ -0,0 +1,49 @@
+import time
+
+from core.backends import CircuitBreaker
+
+
+def tripped(cooldown: float = 0.05) -> CircuitBreaker:
+    breaker = CircuitBreaker(failures=2, cooldown=cooldown)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_open_circuit_refuses_calls_until_the_cooldown():
+    breaker = tripped(cooldown=60)
+    assert breaker.state == "open"
+    assert not breaker.allows()
+    assert not breaker.begin()
+
+
+def test_half_open_circuit_lets_one_trial_through():
+    breaker = tripped()
+    time.sleep(0.06)
+
+    assert breaker.state == "half_open"
+    assert breaker.begin()
+    # Everyone else waits for the trial to report
+    assert not breaker.begin()
+    assert not breaker.allows()
+
+
+def test_successful_trial_closes_the_circuit():
+    breaker = tripped()
+    time.sleep(0.06)
+    breaker.begin()
+    breaker.record_success()
+
+    assert breaker.state == "closed"
+    assert breaker.begin() and breaker.begin()
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = tripped()
+    time.sleep(0.06)
+    breaker.begin()
+    breaker.record_failure()
+
+    assert breaker.state == "open"
+    time.sleep(0.06)
+    assert breaker.begin()
@@ -0,0 +1,13 @@
+import os
+
+from benchmarks.cold_start import HEAVY_MODULES, check, run
+
+# Generous next to the ~0.5 s the import takes, so only a real regression fails it
+IMPORT_BUDGET_SECONDS = float(os.environ.get("COLD_START_BUDGET", "3"))
+
+
+def test_import_stays_within_budget_and_defers_heavy_modules():
+    result = run(runs=1, warmup_mode="lazy")
+
+    assert result["statuses"] == [200]
+    assert check(result, IMPORT_BUDGET_SECONDS, list(HEAVY_MODULES)) == []
@@ -0,0 +1,195 @@
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import speech_recognition as sr
+
+import core.google_client as google_client_module
+import core.speech_recognition as speech_recognition_module
+from core.google_client import GoogleAudio, GoogleSpeechClient
+from core.speech_recognition import SpeechRecognizer
+
+LANGUAGES = [
+    "gu-IN",
+    "hi-IN",
+    "en-US",
+    "fr-FR",
+    "es-ES",
+    "de-DE",
+    "it-IT",
+    "ja-JP",
+    "ko-KR",
+    "zh-CN",
+    "ru-RU",
+]
+# Stall of every new connection, standing in for the TCP and TLS handshakes
+HANDSHAKE = 0.05
+UNDERSTOOD = (
+    b'{"result":[]}\n'
+    b'{"result":[{"alternative":[{"transcript":"hello world","confidence":0.92}],"final":true}],"result_index":0}\n'
+)
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # The headers and body go out in separate writes; without this a reused connection
+    # waits on the client's delayed ACK before every response body
+    disable_nagle_algorithm = True
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+        time.sleep(self.server.handshake)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.bodies.append(body)
+        if self.server.status != 200:
+            content = b""
+            self.send_response(self.server.status)
+        else:
+            time.sleep(self.server.delay)
+            content = UNDERSTOOD if "lang=en-US" in self.path else b'{"result":[]}\n'
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    """Local stand-in for the Web Speech API, counting connections and request bodies"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.connections = 0
+    server.bodies = []
+    server.handshake = HANDSHAKE
+    server.delay = 0.0
+    server.status = 200
+    server.url = f"http://127.0.0.1:{server.server_address[1]}/speech-api/v2/recognize"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def audio_data():
+    return sr.AudioData(b"\x10\x00\xf0\xff" * 8000, 16000, 2)
+
+
+def test_sequential_requests_reuse_one_connection(server, audio_data):
+    client = GoogleSpeechClient(url=server.url, pool_size=4)
+    audio = GoogleAudio(audio_data)
+    result = client.recognize(audio, "en-US")
+    for _ in range(4):
+        with pytest.raises(sr.UnknownValueError):
+            client.recognize(audio, "fr-FR")
+    client.close()
+
+    assert result["alternative"][0]["transcript"] == "hello world"
+    assert server.connections == 1
+    assert all(body.startswith(b"fLaC") for body in server.bodies)
+
+
+def test_pooled_client_saves_handshakes_and_latency(server, audio_data):
+    recognizer = sr.Recognizer()
+    started = time.perf_counter()
+    for lang in LANGUAGES:
+        try:
+            recognizer.recognize_google(
+                audio_data, language=lang, show_all=True, endpoint=server.url
+            )
+        except sr.UnknownValueError:
+            pass
+    per_request = time.perf_counter() - started
+    per_request_connections = server.connections
+
+    server.connections = 0
+    client = GoogleSpeechClient(url=server.url)
+    audio = GoogleAudio(audio_data)
+    started = time.perf_counter()
+    for lang in LANGUAGES:
+        try:
+            client.recognize(audio, lang)
+        except sr.UnknownValueError:
+            pass
+    pooled = time.perf_counter() - started
+    client.close()
+
+    assert per_request_connections == len(LANGUAGES)
+    assert server.connections == 1
+    # Ten handshakes saved
+    assert pooled < per_request - (len(LANGUAGES) - 2) * HANDSHAKE
+
+
+def test_fanout_encodes_once_and_stays_within_the_pool(server, audio_data, monkeypatch):
+    client = GoogleSpeechClient(url=server.url, pool_size=6)
+    monkeypatch.setattr(google_client_module, "_google_client", client)
+    encodings = []
+    get_flac_data = sr.AudioData.get_flac_data
+
+    def counting(self, *args, **kwargs):
+        encodings.append(1)
+        return get_flac_data(self, *args, **kwargs)
+
+    monkeypatch.setattr(sr.AudioData, "get_flac_data", counting)
+    # Every language is sent, rather than stopping at the confident en-US
+    monkeypatch.setattr(speech_recognition_module, "GOOGLE_EARLY_EXIT_CONFIDENCE", 1.1)
+    server.delay = 0.05
+    result = SpeechRecognizer().try_google_recognition(audio_data, LANGUAGES)
+    client.close()
+
+    assert result["language"] == "en-US"
+    assert len(encodings) == 1
+    assert len(server.bodies) == len(LANGUAGES)
+    # Eleven requests, at most GOOGLE_FANOUT_CONCURRENCY of them at once
+    assert server.connections <= 6
+
+
+def test_server_closing_an_idle_connection_is_retried(server, audio_data):
+    client = GoogleSpeechClient(url=server.url)
+    audio = GoogleAudio(audio_data)
+    client.recognize(audio, "en-US")
+    for connection in client.pool._idle:
+        connection.sock.shutdown(socket.SHUT_RDWR)
+
+    assert (
+        client.recognize(audio, "en-US")["alternative"][0]["transcript"]
+        == "hello world"
+    )
+    assert server.connections == 2
+    client.close()
+
+
+def test_http_error_is_a_request_error(server, audio_data):
+    server.status = 500
+    client = GoogleSpeechClient(url=server.url)
+    with pytest.raises(sr.RequestError, match="request failed"):
+        client.recognize(GoogleAudio(audio_data), "en-US")
+    client.close()
+
+
+def test_slow_response_times_out(server, audio_data):
+    server.delay = 1.0
+    client = GoogleSpeechClient(url=server.url, read_timeout=0.2)
+    with pytest.raises(sr.RequestError, match="timed out"):
+        client.recognize(GoogleAudio(audio_data), "en-US")
+    client.close()
+
+
+def test_unreachable_service_is_a_request_error(audio_data):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    client = GoogleSpeechClient(url=f"http://127.0.0.1:{port}/speech-api/v2/recognize")
+    with pytest.raises(sr.RequestError, match="connection failed"):
+        client.recognize(GoogleAudio(audio_data), "en-US")
@@ -0,0 +1,86 @@
+import sqlite3
+import time
+
+from core.job_queue import JobQueue, JobWorkers
+
+
+def make_queue(tmp_path, **kwargs) -> JobQueue:
+    return JobQueue(path=str(tmp_path / "jobs.sqlite3"), **kwargs)
+
+
+def wait_for(predicate, timeout: float = 5.0) -> bool:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.02)
+    return False
+
+
+def test_higher_lane_is_claimed_first(tmp_path):
+    queue = make_queue(tmp_path)
+    low = queue.submit(b"audio", "digest", lane="low")
+    high = queue.submit(b"audio", "digest", lane="high")
+
+    assert queue.get(low["id"])["queue_position"] == 1
+    assert queue.claim()["id"] == high["id"]
+    assert queue.claim()["id"] == low["id"]
+    assert queue.claim() is None
+
+
+def test_lapsed_lease_is_claimed_by_another_worker(tmp_path):
+    first = make_queue(tmp_path, lease_seconds=0.05)
+    second = make_queue(tmp_path, lease_seconds=60)
+    job = first.submit(b"audio", "digest")
+    assert first.claim()["id"] == job["id"]
+    assert second.claim() is None
+
+    time.sleep(0.1)
+    assert second.claim()["id"] == job["id"]
+    # The first owner lost the job; its late outcome is ignored
+    first.finish(job["id"], "failed", error="too late")
+    second.finish(job["id"], "done", result={"text": "hello"})
+
+    finished = second.get(job["id"])
+    assert finished["status"] == "done" and finished["attempts"] == 2
+
+
+def test_job_out_of_attempts_fails(tmp_path):
+    queue = make_queue(tmp_path, lease_seconds=0.05, max_attempts=1)
+    job = queue.submit(b"audio", "digest")
+    queue.claim()
+    time.sleep(0.1)
+
+    assert queue.claim() is None
+    assert queue.get(job["id"])["status"] == "failed"
+
+
+def test_finished_job_expires_and_is_purged(tmp_path):
+    queue = make_queue(tmp_path, result_ttl=0)
+    job = queue.submit(b"audio", "digest")
+    queue.claim()
+    queue.finish(job["id"], "done", result={"text": "hello"})
+
+    assert queue.get(job["id"]) is None
+    assert queue.purge_expired() == 1
+
+
+def test_worker_survives_database_errors(tmp_path, monkeypatch):
+    queue = make_queue(tmp_path)
+    failures = []
+
+    def locked():
+        failures.append(1)
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(queue, "purge_expired", locked)
+    workers = JobWorkers(
+        queue, lambda job, report: {"text": "hello"}, workers=1, poll_interval=0.02
+    )
+    workers.start()
+    try:
+        assert wait_for(lambda: len(failures) >= 2)
+        job = queue.submit(b"audio", "digest")
+        assert wait_for(lambda: queue.get(job["id"])["status"] == "done")
+    finally:
+        workers.stop()
@@ -0,0 +1,119 @@
+import time
+
+import pytest
+import speech_recognition as sr
+
+import core.speech_recognition as speech_recognition_module
+from core.speech_recognition import SpeechRecognizer
+
+LANGUAGES = [
+    "gu-IN",
+    "hi-IN",
+    "en-US",
+    "fr-FR",
+    "es-ES",
+    "de-DE",
+    "it-IT",
+    "ja-JP",
+    "ko-KR",
+    "zh-CN",
+    "ru-RU",
+]
+ROUND_TRIP = 0.1
+
+
+@pytest.fixture
+def speech_recognizer(monkeypatch):
+    monkeypatch.setattr(speech_recognition_module, "GOOGLE_LANGUAGE_FANOUT", True)
+    monkeypatch.setattr(speech_recognition_module, "GOOGLE_FANOUT_CONCURRENCY", 6)
+    monkeypatch.setattr(speech_recognition_module, "GOOGLE_LANGUAGE_TIMEOUT", 1.0)
+    return SpeechRecognizer()
+
+
+def stub_round_trips(speech_recognizer, monkeypatch, answers, delays=None):
+    """Replace the Google round trip with a fixed delay and {language: confidence} answers"""
+    calls = []
+
+    def recognize(audio, lang):
+        calls.append(lang)
+        time.sleep((delays or {}).get(lang, ROUND_TRIP))
+        if lang not in answers:
+            raise sr.UnknownValueError()
+        return {
+            "text": f"text in {lang}",
+            "confidence": answers[lang],
+            "language": lang,
+        }
+
+    monkeypatch.setattr(speech_recognizer, "_recognize_google_language", recognize)
+    return calls
+
+
+def test_fanout_is_faster_than_serial_round_trips(speech_recognizer, monkeypatch):
+    calls = stub_round_trips(speech_recognizer, monkeypatch, {"ru-RU": 0.7})
+    started = time.monotonic()
+    result = speech_recognizer._google_fanout(None, LANGUAGES)
+    elapsed = time.monotonic() - started
+
+    assert result["language"] == "ru-RU"
+    assert sorted(calls) == sorted(LANGUAGES)
+    # Two rounds of six concurrent requests, not eleven serial ones
+    assert elapsed < len(LANGUAGES) * ROUND_TRIP / 2
+
+
+def test_fanout_keeps_most_confident_and_breaks_ties_by_order(
+    speech_recognizer, monkeypatch
+):
+    stub_round_trips(
+        speech_recognizer, monkeypatch, {"hi-IN": 0.6, "fr-FR": 0.8, "de-DE": 0.8}
+    )
+    assert speech_recognizer._google_fanout(None, LANGUAGES)["language"] == "fr-FR"
+
+
+def test_fanout_exits_early_on_a_confident_result(speech_recognizer, monkeypatch):
+    calls = stub_round_trips(
+        speech_recognizer, monkeypatch, {"gu-IN": 0.95}, delays={"gu-IN": 0.01}
+    )
+    result = speech_recognizer._google_fanout(None, LANGUAGES)
+
+    assert result["language"] == "gu-IN"
+    # The languages after the first six were never sent
+    assert len(calls) == 6
+
+
+def test_slow_language_is_bounded_by_its_own_deadline(speech_recognizer, monkeypatch):
+    monkeypatch.setattr(speech_recognition_module, "GOOGLE_LANGUAGE_TIMEOUT", 0.3)
+    stub_round_trips(
+        speech_recognizer,
+        monkeypatch,
+        {"en-US": 0.7, "hi-IN": 0.99},
+        delays={"hi-IN": 2.0},
+    )
+    started = time.monotonic()
+    result = speech_recognizer._google_fanout(None, LANGUAGES)
+
+    assert result["language"] == "en-US"
+    assert time.monotonic() - started < 1.0
+
+
+def test_service_error_is_raised_without_any_result(speech_recognizer, monkeypatch):
+    def recognize(audio, lang):
+        raise sr.RequestError("recognition connection failed")
+
+    monkeypatch.setattr(speech_recognizer, "_recognize_google_language", recognize)
+    with pytest.raises(sr.RequestError):
+        speech_recognizer._google_fanout(None, LANGUAGES)
+
+
+def test_languages_left_after_a_timeout_are_still_tried(speech_recognizer, monkeypatch):
+    monkeypatch.setattr(speech_recognition_module, "GOOGLE_LANGUAGE_TIMEOUT", 0.3)
+    calls = stub_round_trips(
+        speech_recognizer,
+        monkeypatch,
+        {"ru-RU": 0.7},
+        delays={lang: 2.0 for lang in LANGUAGES[:6]},
+    )
+    result = speech_recognizer._google_fanout(None, LANGUAGES)
+
+    assert result["language"] == "ru-RU"
+    assert sorted(calls) == sorted(LANGUAGES)
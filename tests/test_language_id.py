@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+import speech_recognition as sr
+
+from core.language_id import MIN_PROFILE_SAMPLES, LanguageIdentifier
+from core.speech_recognition import SpeechRecognizer
+
+FRENCH = np.linspace(1.0, 2.0, 10)
+GERMAN = np.linspace(3.0, 5.0, 10)
+
+
+def trained_identifier() -> LanguageIdentifier:
+    """Profiles for French and German only, as a deployment might start with"""
+    identifier = LanguageIdentifier(profiles_path=None)
+    rng = np.random.default_rng(0)
+    for _ in range(MIN_PROFILE_SAMPLES):
+        identifier.train("fr-FR", features=FRENCH + rng.normal(0, 0.05, 10))
+        identifier.train("de-DE", features=GERMAN + rng.normal(0, 0.05, 10))
+    return identifier
+
+
+def test_without_profiles_every_language_is_tried():
+    identifier = LanguageIdentifier(profiles_path=None)
+    assert identifier.candidates(features=FRENCH, k=3) == (None, [])
+
+
+def test_languages_with_profiles_are_picked_and_the_rest_kept_for_fallback():
+    identifier = trained_identifier()
+    languages, fallback = identifier.candidates(features=GERMAN, k=3)
+
+    assert languages == ["de-DE", "fr-FR"]
+    assert sorted(languages + fallback) == sorted(identifier.languages)
+
+
+@pytest.fixture
+def speech_recognizer(monkeypatch):
+    speech_recognizer = SpeechRecognizer()
+    speech_recognizer.language_identifier = trained_identifier()
+    monkeypatch.setattr(
+        speech_recognizer.language_identifier,
+        "extract_features",
+        lambda audio_data: FRENCH,
+    )
+    return speech_recognizer
+
+
+def stub_google(speech_recognizer, monkeypatch, confidence):
+    calls = []
+
+    def recognize(audio, lang):
+        calls.append(lang)
+        if lang != "fr-FR":
+            raise sr.UnknownValueError()
+        return {"text": "bonjour", "confidence": confidence, "language": lang}
+
+    monkeypatch.setattr(speech_recognizer, "_recognize_google_language", recognize)
+    return calls
+
+
+def recognize(speech_recognizer):
+    audio_data = sr.AudioData(b"\0\0" * 16000, 16000, 2)
+    languages, fallback = speech_recognizer._language_candidates(audio_data, None)
+    return speech_recognizer.try_google_recognition(audio_data, languages, fallback)
+
+
+def test_confident_candidate_spares_the_other_languages(speech_recognizer, monkeypatch):
+    calls = stub_google(speech_recognizer, monkeypatch, confidence=0.95)
+
+    assert recognize(speech_recognizer)["language"] == "fr-FR"
+    # Only the languages with a profile were sent, not all eleven
+    assert set(calls) <= {"fr-FR", "de-DE"}
+
+
+def test_unconfident_candidates_fall_back_to_every_language(
+    speech_recognizer, monkeypatch
+):
+    calls = stub_google(speech_recognizer, monkeypatch, confidence=0.5)
+
+    assert recognize(speech_recognizer)["language"] == "fr-FR"
+    assert sorted(set(calls)) == sorted(speech_recognizer.language_identifier.languages)
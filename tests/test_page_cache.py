@@ -0,0 +1,24 @@
+from core.page_cache import CachedAsset
+
+BODY = b"body { color: black; }\n" * 200
+
+
+def test_unchanged_variant_is_not_modified():
+    asset = CachedAsset(BODY, "text/css")
+    headers = {"accept-encoding": "gzip", "if-none-match": asset.etags["gzip"]}
+
+    response = asset.response(headers, "no-cache")
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == asset.etags["gzip"]
+
+
+def test_etag_of_another_encoding_gets_the_full_body():
+    asset = CachedAsset(BODY, "text/css")
+    headers = {"accept-encoding": "identity", "if-none-match": asset.etags["gzip"]}
+
+    response = asset.response(headers, "no-cache")
+
+    assert response.status_code == 200
+    assert response.body == BODY
+    assert response.headers["etag"] == asset.etags["identity"]
@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import io
+import math
+import struct
+import wave
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+from api.main import app
+from core.resumable import ResumableUploads, UploadSessionError, verify_checksum
+from core.upload_store import UploadStoreFullError
+
+CHUNK = 8192
+
+
+def wav(seconds: float = 1.0, rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(
+            b"".join(
+                struct.pack("<h", int(8000 * math.sin(2 * math.pi * 220 * i / rate)))
+                for i in range(int(rate * seconds))
+            )
+        )
+    return buffer.getvalue()
+
+
+def crc32(data: bytes) -> str:
+    return f"crc32 {zlib.crc32(data):08x}"
+
+
+def sha256(data: bytes) -> str:
+    return f"sha256 {hashlib.sha256(data).hexdigest()}"
+
+
+@pytest.fixture
+def client():
+    return TestClient(app)
+
+
+def open_upload(client, size: int) -> str:
+    response = client.post("/uploads", data={"size": size, "filename": "clip.wav"})
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def send(client, upload_id: str, offset: int, data: bytes, checksum: str):
+    return client.patch(
+        f"/uploads/{upload_id}",
+        content=data,
+        headers={"Upload-Offset": str(offset), "Upload-Checksum": checksum},
+    )
+
+
+def test_chunks_with_crc32_or_sha256_are_assembled_and_transcribed(client):
+    audio = wav()
+    upload_id = open_upload(client, len(audio))
+    for n, offset in enumerate(range(0, len(audio), CHUNK)):
+        chunk = audio[offset : offset + CHUNK]
+        response = send(
+            client, upload_id, offset, chunk, (crc32 if n % 2 else sha256)(chunk)
+        )
+        assert response.status_code == 200
+        assert response.headers["Upload-Offset"] == str(offset + len(chunk))
+
+    response = client.post(f"/uploads/{upload_id}/finalize")
+    assert response.status_code == 200
+    assert response.json()["success"]
+
+
+def test_corrupted_chunk_is_refused_whole_and_can_be_resent(client):
+    audio = wav()
+    upload_id = open_upload(client, len(audio))
+    chunk = audio[:CHUNK]
+    corrupted = bytes([chunk[0] ^ 0xFF]) + chunk[1:]
+
+    response = send(client, upload_id, 0, corrupted, crc32(chunk))
+    assert response.status_code == 422
+    assert response.headers["Upload-Offset"] == "0"
+
+    assert send(client, upload_id, 0, chunk, crc32(chunk)).status_code == 200
+    client.delete(f"/uploads/{upload_id}")
+
+
+def test_chunk_at_the_wrong_offset_gets_the_offset_to_resume_from(client):
+    audio = wav()
+    upload_id = open_upload(client, len(audio))
+    chunk = audio[CHUNK : 2 * CHUNK]
+
+    response = send(client, upload_id, CHUNK, chunk, sha256(chunk))
+
+    assert response.status_code == 409
+    assert response.headers["Upload-Offset"] == "0"
+    client.delete(f"/uploads/{upload_id}")
+
+
+def test_unknown_checksum_algorithm_is_refused():
+    with pytest.raises(UploadSessionError) as error:
+        verify_checksum(b"data", "md5 8d777f385d3dfec8815d20f7496026dc")
+    assert error.value.status_code == 400
+
+
+def test_sessions_are_capped_at_max_held_bytes():
+    audio = wav()
+    uploads = ResumableUploads()
+    first = uploads.create("first.wav", len(audio), None)
+    second = uploads.create("second.wav", len(audio), None)
+    asyncio.run(first.append(0, audio[:CHUNK]))
+    held = uploads.stats()["held_bytes"]
+    assert held >= CHUNK
+    # Room for what the first session holds plus one chunk
+    uploads.max_held_bytes = held + CHUNK
+
+    # Chunks ahead of the header are counted at twice their size
+    with pytest.raises(UploadStoreFullError):
+        uploads.check_room(second, CHUNK)
+
+    uploads.discard(first.id)
+    assert uploads.stats()["held_bytes"] == 0
+    uploads.check_room(second, CHUNK)
+    uploads.discard(second.id)
@@ -0,0 +1,91 @@
+import asyncio
+import io
+import os
+
+import pytest
+
+from core.spool import spool_upload
+from core.upload_store import UploadStore, UploadStoreFullError
+
+
+def spool_memfd(store: UploadStore, data: bytes):
+    path, fd, written = spool_upload(io.BytesIO(data), "clip.wav", "memfd", len(data))
+    return store.put_path(path, fd, written)
+
+
+@pytest.mark.skipif(not hasattr(os, "memfd_create"), reason="needs memfd_create")
+def test_late_release_of_a_freed_memfd_spares_the_upload_reusing_its_descriptor():
+    store = UploadStore(max_bytes=1024 * 1024)
+    first = spool_memfd(store, b"first")
+    store.release(first)
+    second = spool_memfd(store, b"second")
+    # The kernel hands the closed descriptor number to the next memfd
+    assert str(second) == str(first)
+
+    store.release(first)
+
+    assert second in store
+    assert first not in store
+    with open(second, "rb") as f:
+        assert f.read() == b"second"
+    store.release(second)
+    assert store.stats()["entries"] == 0
+
+
+def test_every_upload_gets_its_own_key_and_lives_until_its_last_reference():
+    store = UploadStore(max_bytes=1024)
+    first = store.put_memory(b"same bytes")
+    second = store.put_memory(b"same bytes")
+    assert first != second
+
+    store.acquire(first)
+    store.release(first)
+    assert store.get(first) == b"same bytes"
+    store.release(first)
+
+    assert first not in store
+    with pytest.raises(FileNotFoundError):
+        store.get(first)
+    assert store.stats()["resident_bytes"] == len(b"same bytes")
+
+
+def test_reserve_waits_for_room_freed_by_a_release():
+    store = UploadStore(max_bytes=100, wait_seconds=2)
+    held = store.put_memory(b"x" * 80)
+
+    async def upload():
+        waiting = asyncio.ensure_future(store.reserve(50))
+        await asyncio.sleep(0.1)
+        assert not waiting.done()
+        store.release(held)
+        await asyncio.wait_for(waiting, 1)
+
+    asyncio.run(upload())
+    key = store.put_memory(b"y" * 50, reserved=50)
+    assert store.stats()["resident_bytes"] == 50
+    assert store.stats()["reserved_bytes"] == 0
+    store.release(key)
+
+
+def test_reserve_is_rejected_when_no_room_frees_up():
+    store = UploadStore(max_bytes=100, wait_seconds=0.1)
+    store.put_memory(b"x" * 80)
+
+    with pytest.raises(UploadStoreFullError):
+        asyncio.run(store.reserve(50))
+    with pytest.raises(UploadStoreFullError):
+        # Larger than the whole budget; rejected without waiting
+        asyncio.run(store.reserve(101))
+
+    assert store.stats()["rejected"] == 2
+    assert store.stats()["reserved_bytes"] == 0
+
+
+def test_try_reserve_holds_bytes_until_unreserved():
+    store = UploadStore(max_bytes=100)
+    assert store.try_reserve(60)
+    assert not store.try_reserve(60)
+
+    store.unreserve(60)
+
+    assert store.try_reserve(60)
@@ -7,6 +7,7 @@ This script prepares the project for Vercel deployment by:
 4. Checking for dependencies
 5. Applying patches for Vercel compatibility
 """
+
 import os
 import sys
 import json
@@ -15,12 +16,14 @@ import importlib
 from pathlib import Path
 
 # Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
 logger = logging.getLogger("vercel-setup")
 
 # Create required directories
 directories = [
-    'audio',
+    "audio",
 ]
 
 for directory in directories:
@@ -31,12 +34,12 @@ for directory in directories:
         logger.warning(f"Could not create directory {directory}: {e}")
 
 # Check for required Python packages
-required_packages = ['fastapi', 'uvicorn', 'python-dotenv', 'jinja2']
+required_packages = ["fastapi", "uvicorn", "python-dotenv", "jinja2"]
 missing_packages = []
 
 for package in required_packages:
     try:
-        importlib.import_module(package.replace('-', '_'))
+        importlib.import_module(package.replace("-", "_"))
         logger.info(f"Package {package} is installed")
     except ImportError:
         missing_packages.append(package)
@@ -47,7 +50,10 @@ if missing_packages:
     logger.info("Installing missing packages...")
     try:
         import subprocess
-        subprocess.check_call([sys.executable, '-m', 'pip', 'install'] + missing_packages)
+
+        subprocess.check_call(
+            [sys.executable, "-m", "pip", "install"] + missing_packages
+        )
         logger.info("Packages installed successfully")
     except Exception as e:
         logger.error(f"Failed to install packages: {e}")
@@ -57,36 +63,22 @@ if missing_packages:
 logger.info("Updating vercel.json...")
 vercel_config = {
     "version": 2,
-    "builds": [
-        {
-            "src": "index.py",
-            "use": "@vercel/python"
-        }
-    ],    "routes": [
-        {
-            "src": "/static/(.*)",
-            "dest": "/static/$1"
-        },
-        {
-            "src": "/(.*)",
-            "dest": "/index.py"
-        }
+    "builds": [{"src": "index.py", "use": "@vercel/python"}],
+    "routes": [
+        {"src": "/static/(.*)", "dest": "/static/$1"},
+        {"src": "/(.*)", "dest": "/index.py"},
     ],
-    "env": {
-        "VERCEL": "1",
-        "DEBUG": "true",
-        "USE_MEMORY_STORAGE": "true"
-    }
+    "env": {"VERCEL": "1", "DEBUG": "true", "USE_MEMORY_STORAGE": "true"},
 }
 
-with open('vercel.json', 'w') as f:
+with open("vercel.json", "w") as f:
     json.dump(vercel_config, f, indent=2)
     logger.info("vercel.json updated")
 
 # Create a simple .env file if it doesn't exist
-if not os.path.exists('.env'):
+if not os.path.exists(".env"):
     logger.info("Creating .env file...")
-    with open('.env', 'w') as f:
+    with open(".env", "w") as f:
         f.write("# Environment variables for MyraSTT\n")
         f.write("ROOT_PATH=\n")
         f.write("DEBUG=true\n")